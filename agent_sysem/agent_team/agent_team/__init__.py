@@ -4,6 +4,7 @@ A minimal, elegant implementation of specialized agent patterns including:
 - Hub-and-Spoke orchestration
 - Pipeline execution
 - Parallel with merge
+- Dependency graph (DAG) scheduling
 """
 
 from agent_team.agents import Agent, AgentRole
@@ -1,8 +1,13 @@
 """Specialized agents with targeted system prompts."""
 
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional
+from typing import AsyncIterator, Optional
+import asyncio
+import re
+import weakref
+
 import anthropic
 
 
@@ -63,6 +68,136 @@ Output format: Provide clear task breakdown with dependencies and integration pl
 }
 
 
+class ClientPool:
+    """Anthropic clients shared by every agent that uses this pool.
+
+    One sync client and one async client per event loop, so a team of agents
+    shares a single connection pool instead of opening one per agent. Async
+    calls are limited to max_concurrency in flight per event loop, which
+    also bounds the number of open connections.
+    """
+
+    def __init__(self, max_concurrency: int = 16, **client_kwargs):
+        """
+        Args:
+            max_concurrency: Maximum concurrent async requests per event loop
+            client_kwargs: Passed to anthropic.Anthropic / anthropic.AsyncAnthropic
+        """
+        self.max_concurrency = max_concurrency
+        self.client_kwargs = client_kwargs
+        self._client: Optional[anthropic.Anthropic] = None
+        # Async clients and their semaphores are bound to the loop that created them
+        self._async: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def from_client(cls, client: anthropic.Anthropic, max_concurrency: int = 16) -> "ClientPool":
+        """Pool around an existing sync client; its async clients use the same endpoint and credentials."""
+        pool = cls(
+            max_concurrency,
+            api_key=client.api_key,
+            auth_token=client.auth_token,
+            base_url=client.base_url,
+            timeout=client.timeout,
+            max_retries=client.max_retries,
+            default_headers=client._custom_headers,
+            default_query=client._custom_query,
+        )
+        pool._client = client
+        return pool
+
+    @property
+    def client(self) -> anthropic.Anthropic:
+        if self._client is None:
+            self._client = anthropic.Anthropic(**self.client_kwargs)
+        return self._client
+
+    def _for_loop(self) -> tuple[anthropic.AsyncAnthropic, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        entry = self._async.get(loop)
+        if entry is None:
+            entry = self._async[loop] = (
+                anthropic.AsyncAnthropic(**self.client_kwargs),
+                asyncio.Semaphore(self.max_concurrency),
+            )
+        return entry
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[anthropic.AsyncAnthropic]:
+        """Wait for a concurrency slot and yield the running loop's async client."""
+        client, limit = self._for_loop()
+        async with limit:
+            yield client
+
+    async def aclose(self):
+        """Close the running loop's async client and its connections."""
+        entry = self._async.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            await entry[0].close()
+
+
+# Pool used by agents that are not given one
+default_client_pool = ClientPool()
+
+
+# Lines worth keeping when hand-off context has to shrink
+_HEADING = re.compile(r"^\s*(#+\s|\*\*[^*]+\*\*:?\s*$|[A-Z][\w /-]{0,60}:\s*$)")
+_LIST_ITEM = re.compile(r"^\s*([-*+]|\d+[.)])\s")
+_SIGNATURE = re.compile(r"^\s*(async def|def|class|function|interface|export)\b")
+_KEY_TERMS = re.compile(
+    r"\b(must|should|require[sd]?|critical|error|bug|risk|security|todo|fix|constraint)\b", re.IGNORECASE
+)
+
+
+def compress_context(text: str, max_chars: int = 1000) -> str:
+    """Shrink hand-off context to max_chars while keeping its structure.
+
+    Rather than cutting after max_chars, keeps headings, code signatures and
+    lines stating requirements or problems first, then list items and the
+    opening line of each paragraph, in their original order. Omitted runs
+    are marked with "...".
+    """
+    if len(text) <= max_chars:
+        return text
+
+    lines = text.splitlines()
+    scored = []
+    for i, line in enumerate(lines):
+        if not line.strip() or line.strip().startswith("```"):
+            continue
+        score = 0.0
+        if _HEADING.match(line):
+            score += 3
+        if _SIGNATURE.match(line):
+            score += 2
+        if _KEY_TERMS.search(line):
+            score += 2
+        if _LIST_ITEM.match(line):
+            score += 1
+        if i == 0 or not lines[i - 1].strip():
+            score += 1  # Opening line of a paragraph
+        if len(line) > 200:
+            line = re.split(r"(?<=[.!?])\s", line, maxsplit=1)[0][:200]  # First sentence only
+        scored.append((score, i, line))
+
+    kept: dict[int, str] = {}
+    used = 0
+    for score, i, line in sorted(scored, key=lambda item: (-item[0], item[1])):
+        cost = len(line) + 5  # Newline plus a possible "..." marker
+        if used + cost <= max_chars:
+            kept[i] = line
+            used += cost
+
+    out, previous = [], -1
+    for i in sorted(kept):
+        if i > previous + 1 and any(lines[j].strip() for j in range(previous + 1, i)):
+            out.append("...")
+        out.append(kept[i])
+        previous = i
+    if any(line.strip() for line in lines[previous + 1:]):
+        out.append("...")
+    return "\n".join(out)[:max_chars]
+
+
 @dataclass
 class AgentResponse:
     """Response from an agent execution."""
@@ -73,60 +208,126 @@ class AgentResponse:
     error: Optional[str] = None
 
 
+@dataclass
+class AgentChunk:
+    """Part of a streamed agent response; the last chunk carries the full response."""
+    text: str
+    role: AgentRole
+    response: Optional[AgentResponse] = None
+
+
 @dataclass
 class Agent:
-    """A specialized agent with a specific role."""
+    """A specialized agent with a specific role.
+
+    An explicit anthropic.Anthropic _client (without a pool) gets its own
+    ClientPool, so async calls go to the same endpoint with the same
+    credentials. Any other _client only supports sync execute(); async calls
+    fail unless a pool is given too.
+    """
     role: AgentRole
     model: str = "claude-sonnet-4-20250514"
     max_tokens: int = 4096
-    _client: anthropic.Anthropic = field(default_factory=anthropic.Anthropic, repr=False)
+    context_chars: int = 1000  # Hand-off context budget, see compress_context()
+    pool: ClientPool = field(default_factory=lambda: default_client_pool, repr=False)
+    _client: Optional[anthropic.Anthropic] = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if isinstance(self._client, anthropic.Anthropic) and self.pool is default_client_pool:
+            self.pool = ClientPool.from_client(self._client)
 
     @property
     def system_prompt(self) -> str:
         return SYSTEM_PROMPTS[self.role]
 
-    def execute(self, task: str, context: Optional[str] = None) -> AgentResponse:
-        """Execute a task with optional context from previous agents."""
+    @property
+    def client(self) -> anthropic.Anthropic:
+        return self._client or self.pool.client
+
+    def _messages(self, task: str, context: Optional[str]) -> list[dict]:
         messages = []
 
         # Add context if provided (minimal context passing)
         if context:
-            # Take first 1000 chars as summary per blog post recommendation
-            context_summary = context[:1000] if len(context) > 1000 else context
+            context_summary = compress_context(context, self.context_chars)
             messages.append({
                 "role": "user",
                 "content": f"Previous context:\n{context_summary}\n\n---\n\nTask: {task}"
             })
         else:
             messages.append({"role": "user", "content": task})
+        return messages
+
+    def _response(self, response) -> AgentResponse:
+        content = response.content[0].text
+        tokens = response.usage.input_tokens + response.usage.output_tokens
+
+        return AgentResponse(
+            content=content,
+            role=self.role,
+            tokens_used=tokens,
+            success=True,
+        )
+
+    def _failure(self, error: Exception) -> AgentResponse:
+        return AgentResponse(
+            content="",
+            role=self.role,
+            tokens_used=0,
+            success=False,
+            error=str(error),
+        )
+
+    def _async_pool(self) -> ClientPool:
+        if self._client is not None and self.pool is default_client_pool:
+            raise TypeError(f"{type(self._client).__name__} client has no async counterpart; pass pool= for async use")
+        return self.pool
 
+    def execute(self, task: str, context: Optional[str] = None) -> AgentResponse:
+        """Execute a task with optional context from previous agents."""
         try:
-            response = self._client.messages.create(
+            response = self.client.messages.create(
                 model=self.model,
                 max_tokens=self.max_tokens,
                 system=self.system_prompt,
-                messages=messages,
-            )
-
-            content = response.content[0].text
-            tokens = response.usage.input_tokens + response.usage.output_tokens
-
-            return AgentResponse(
-                content=content,
-                role=self.role,
-                tokens_used=tokens,
-                success=True,
+                messages=self._messages(task, context),
             )
+            return self._response(response)
         except Exception as e:
-            return AgentResponse(
-                content="",
-                role=self.role,
-                tokens_used=0,
-                success=False,
-                error=str(e),
-            )
+            return self._failure(e)
 
     async def execute_async(self, task: str, context: Optional[str] = None) -> AgentResponse:
-        """Async version for parallel execution."""
-        import asyncio
-        return await asyncio.to_thread(self.execute, task, context)
+        """Async version for parallel execution, on the pool's shared async client."""
+        try:
+            async with self._async_pool().acquire() as client:
+                response = await client.messages.create(
+                    model=self.model,
+                    max_tokens=self.max_tokens,
+                    system=self.system_prompt,
+                    messages=self._messages(task, context),
+                )
+            return self._response(response)
+        except Exception as e:
+            return self._failure(e)
+
+    async def stream_async(self, task: str, context: Optional[str] = None) -> AsyncIterator[AgentChunk]:
+        """Stream the response as it is generated; the last chunk carries the AgentResponse.
+
+        The pool's concurrency slot is held until the stream is consumed, so a
+        slow consumer holds back generation rather than buffering it.
+        """
+        try:
+            async with self._async_pool().acquire() as client:
+                async with client.messages.stream(
+                    model=self.model,
+                    max_tokens=self.max_tokens,
+                    system=self.system_prompt,
+                    messages=self._messages(task, context),
+                ) as stream:
+                    async for text in stream.text_stream:
+                        yield AgentChunk(text=text, role=self.role)
+                    message = await stream.get_final_message()
+            response = self._response(message)
+        except Exception as e:
+            response = self._failure(e)
+        yield AgentChunk(text="", role=self.role, response=response)
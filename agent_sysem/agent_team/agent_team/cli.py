@@ -31,7 +31,7 @@ Examples:
     parser.add_argument("task", help="The task to execute")
     parser.add_argument(
         "--pattern",
-        choices=["pipeline", "hub_and_spoke", "parallel_merge"],
+        choices=["pipeline", "hub_and_spoke", "parallel_merge", "dag", "streaming_pipeline"],
         help="Orchestration pattern to use",
     )
     parser.add_argument(
@@ -1,9 +1,10 @@
 """Main orchestrator that coordinates the agent team."""
 
-from dataclasses import dataclass, field
-from typing import Optional
+from dataclasses import dataclass, field, replace
+from typing import AsyncIterator, Optional
+import threading
 
-from agent_team.agents import Agent, AgentRole, AgentResponse
+from agent_team.agents import Agent, AgentChunk, AgentRole, AgentResponse
 from agent_team.router import Router, RouteResult, TaskComplexity
 from agent_team.patterns import (
     OrchestrationPattern,
@@ -15,23 +16,157 @@ from agent_team.patterns import (
 )
 
 
+# Conservative: most English text and code runs 3.5-4.5 characters per token
+CHARS_PER_TOKEN = 3.5
+
+
+def estimate_input_tokens(system: str, messages: list[dict]) -> int:
+    """Pre-flight estimate of a call's input tokens from its prompt length."""
+    chars = len(system) + sum(len(m["content"]) for m in messages)
+    return int(chars / CHARS_PER_TOKEN) + 10 * (len(messages) + 1)  # Plus per-message framing
+
+
+class BudgetExhausted(Exception):
+    """An agent call was refused because the token budget cannot cover it."""
+
+
+@dataclass
+class Reservation:
+    """Tokens held for one agent call until its actual usage is known."""
+    agent: str
+    tokens: int
+    model: str
+    max_tokens: int
+    degraded: bool = False
+
+
 @dataclass
 class TokenBudget:
-    """Manages token consumption across agents."""
+    """Manages token consumption across agents.
+
+    Each call reserves its estimated input plus max_tokens before it is made
+    and settles to its actual usage afterwards, so concurrent calls cannot
+    jointly overshoot the budget. Output is capped by max_tokens, so only an
+    underestimated input can go over. Once a call would leave less than
+    degrade_below of the budget free, it is degraded. It switches to
+    fallback_model and gets at most half of the remaining tokens, but never
+    less than min_output_tokens.
+    """
     total_budget: int = 100_000
     reserve_ratio: float = 0.1  # Reserve for coordination overhead
     consumed: int = 0
+    reserved: int = 0  # Held by calls in flight
+    degrade_below: float = 0.25
+    fallback_model: Optional[str] = None
+    min_output_tokens: int = 512
+    spent_by_agent: dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
 
     @property
     def available(self) -> int:
         reserve = int(self.total_budget * self.reserve_ratio)
         return self.total_budget - self.consumed - reserve
 
+    @property
+    def unreserved(self) -> int:
+        return self.available - self.reserved
+
+    @property
+    def overshoot(self) -> int:
+        """Tokens consumed beyond the admission limit (the budget minus its reserve)."""
+        return max(0, -self.available)
+
     def can_afford(self, estimated_tokens: int) -> bool:
-        return self.available >= estimated_tokens
+        return self.unreserved >= estimated_tokens
 
     def consume(self, tokens: int):
-        self.consumed += tokens
+        with self._lock:
+            self.consumed += tokens
+
+    def reserve(self, agent: str, input_tokens: int, model: str, max_tokens: int) -> Optional[Reservation]:
+        """Admit a call, possibly degraded; None if even a degraded call does not fit."""
+        with self._lock:
+            free = self.unreserved
+            degraded = free - input_tokens - max_tokens < self.total_budget * self.degrade_below
+            if degraded:
+                model = self.fallback_model or model
+                # Leave room for the agents after this one
+                max_tokens = min(max_tokens, max(self.min_output_tokens, (free - input_tokens) // 2))
+            tokens = input_tokens + max_tokens
+            if tokens > free:
+                return None
+            self.reserved += tokens
+            return Reservation(agent, tokens, model, max_tokens, degraded)
+
+    def settle(self, reservation: Reservation, tokens_used: int):
+        """Release a reservation and charge the call's actual usage."""
+        with self._lock:
+            self.reserved -= reservation.tokens
+            self.consumed += tokens_used
+            self.spent_by_agent[reservation.agent] = self.spent_by_agent.get(reservation.agent, 0) + tokens_used
+
+
+@dataclass
+class BudgetedAgent(Agent):
+    """Agent whose calls are admitted against a shared TokenBudget before they are made."""
+    budget: TokenBudget = field(default_factory=TokenBudget, repr=False)
+
+    def _admit(self, task: str, context: Optional[str]) -> tuple[Optional[Reservation], Agent]:
+        """Reserve tokens for a call; returns the reservation and the agent settings to call with."""
+        input_tokens = estimate_input_tokens(self.system_prompt, self._messages(task, context))
+        reservation = self.budget.reserve(self.role.value, input_tokens, self.model, self.max_tokens)
+        if reservation is None:
+            return None, self
+        return reservation, replace(self, model=reservation.model, max_tokens=reservation.max_tokens)
+
+    def _rejected(self) -> AgentResponse:
+        return self._failure(BudgetExhausted(
+            f"Token budget exhausted: {self.budget.unreserved:,} tokens left for {self.role.value}"
+        ))
+
+    def execute(self, task: str, context: Optional[str] = None) -> AgentResponse:
+        reservation, call = self._admit(task, context)
+        if reservation is None:
+            return self._rejected()
+        used = 0  # Nothing is charged if the call raises
+        try:
+            response = Agent.execute(call, task, context)
+            used = response.tokens_used
+            return response
+        finally:
+            self.budget.settle(reservation, used)
+
+    async def execute_async(self, task: str, context: Optional[str] = None) -> AgentResponse:
+        reservation, call = self._admit(task, context)
+        if reservation is None:
+            return self._rejected()
+        used = 0  # Nothing is charged if the call raises or is cancelled
+        try:
+            response = await Agent.execute_async(call, task, context)
+            used = response.tokens_used
+            return response
+        finally:
+            self.budget.settle(reservation, used)
+
+    async def stream_async(self, task: str, context: Optional[str] = None) -> AsyncIterator[AgentChunk]:
+        reservation, call = self._admit(task, context)
+        if reservation is None:
+            yield AgentChunk(text="", role=self.role, response=self._rejected())
+            return
+        streamed = 0
+        settled = False
+        try:
+            async for chunk in Agent.stream_async(call, task, context):
+                streamed += len(chunk.text)
+                if chunk.response is not None:
+                    self.budget.settle(reservation, chunk.response.tokens_used)
+                    settled = True
+                yield chunk
+        finally:
+            if not settled:
+                # Stopped early: charge the estimated input and the output seen so far
+                input_tokens = reservation.tokens - reservation.max_tokens
+                self.budget.settle(reservation, input_tokens + int(streamed / CHARS_PER_TOKEN))
 
 
 @dataclass
@@ -41,6 +176,11 @@ class OrchestratorConfig:
     token_budget: int = 100_000
     max_retries: int = 2
     auto_select_pattern: bool = True
+    fallback_model: Optional[str] = "claude-3-5-haiku-20241022"  # Used once the budget runs low
+    degrade_below: float = 0.25  # Fraction of the budget left when degradation starts
+    min_output_tokens: int = 512
+    route_confidence_floor: float = 0.6  # Local routing confidence below which the LLM classifies
+    route_cache_path: Optional[str] = None  # SQLite file persisting LLM classifications
 
 
 class Orchestrator:
@@ -49,18 +189,27 @@ class Orchestrator:
     Features:
     - Smart routing to select appropriate agents
     - Automatic pattern selection based on task complexity
-    - Token budget management
+    - Token budget admission control with graceful degradation
     - Error handling with retries
     """
 
     def __init__(self, config: Optional[OrchestratorConfig] = None):
         self.config = config or OrchestratorConfig()
-        self.router = Router(model=self.config.model)
-        self.budget = TokenBudget(total_budget=self.config.token_budget)
+        self.router = Router(
+            model=self.config.model,
+            confidence_floor=self.config.route_confidence_floor,
+            cache_path=self.config.route_cache_path,
+        )
+        self.budget = TokenBudget(
+            total_budget=self.config.token_budget,
+            degrade_below=self.config.degrade_below,
+            fallback_model=self.config.fallback_model,
+            min_output_tokens=self.config.min_output_tokens,
+        )
 
-        # Pre-initialize agent pool
+        # Pre-initialize agent pool; every call is admitted against the budget
         self._agents = {
-            role: Agent(role=role, model=self.config.model)
+            role: BudgetedAgent(role=role, model=self.config.model, budget=self.budget)
             for role in AgentRole
         }
 
@@ -80,27 +229,28 @@ class Orchestrator:
         Returns:
             WorkflowState with all responses and metrics
         """
-        # Route task to determine agents and complexity
-        route_result = self.router.route(task)
+        # Route task to determine agents and complexity, unless both are given
+        auto_pattern = pattern is None and self.config.auto_select_pattern
+        route_result = self.router.route(task) if not agents or auto_pattern else None
 
         # Select agents
         agent_roles = agents or route_result.suggested_agents
         selected_agents = [self._agents[role] for role in agent_roles]
 
         # Select pattern based on complexity
-        if pattern is None and self.config.auto_select_pattern:
+        if auto_pattern:
             pattern = self._select_pattern(route_result)
         elif pattern is None:
             pattern = OrchestrationPattern.PIPELINE
 
-        # Execute with selected pattern
-        executor = get_pattern(pattern)
-        state = executor.execute(task, selected_agents)
-
-        # Update budget
-        self.budget.consume(state.total_tokens)
-
-        return state
+        # Execute with selected pattern; coordinating agents are budgeted too
+        coordinator = self._agents[AgentRole.ORCHESTRATOR]
+        kwargs = {
+            OrchestrationPattern.HUB_AND_SPOKE: {"orchestrator": coordinator},
+            OrchestrationPattern.PARALLEL_MERGE: {"merger": coordinator},
+        }.get(pattern, {})
+        executor = get_pattern(pattern, **kwargs)
+        return executor.execute(task, selected_agents)
 
     def _select_pattern(self, route: RouteResult) -> OrchestrationPattern:
         """Auto-select pattern based on task complexity."""
@@ -120,10 +270,7 @@ class Orchestrator:
 
         Convenience method for straightforward tasks.
         """
-        agent = self._agents[role]
-        response = agent.execute(task)
-        self.budget.consume(response.tokens_used)
-        return response
+        return self._agents[role].execute(task)
 
     def analyze_and_implement(self, task: str) -> WorkflowState:
         """Common pattern: Analyst -> Developer -> Reviewer."""
@@ -146,3 +293,8 @@ class Orchestrator:
     @property
     def tokens_remaining(self) -> int:
         return self.budget.available
+
+    @property
+    def spend_by_agent(self) -> dict[str, int]:
+        """Tokens spent so far per agent role, updated as each call completes."""
+        return dict(self.budget.spent_by_agent)
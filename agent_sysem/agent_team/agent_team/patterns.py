@@ -1,12 +1,14 @@
-"""Orchestration patterns: Hub-and-Spoke, Pipeline, Parallel with Merge."""
+"""Orchestration patterns: Hub-and-Spoke, Pipeline, Parallel with Merge, DAG."""
 
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Callable
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Optional
 import asyncio
+import time
 
-from agent_team.agents import Agent, AgentRole, AgentResponse
+from agent_team.agents import Agent, AgentChunk, AgentRole, AgentResponse, ClientPool
 
 
 class OrchestrationPattern(Enum):
@@ -14,6 +16,21 @@ class OrchestrationPattern(Enum):
     HUB_AND_SPOKE = "hub_and_spoke"
     PIPELINE = "pipeline"
     PARALLEL_MERGE = "parallel_merge"
+    DAG = "dag"
+    STREAMING_PIPELINE = "streaming_pipeline"
+
+
+@dataclass
+class NodeTiming:
+    """When an agent ran, in seconds since the workflow started."""
+    role: AgentRole
+    depends_on: list[AgentRole]
+    started: float
+    finished: float
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
 
 
 @dataclass
@@ -25,6 +42,20 @@ class WorkflowState:
     total_tokens: int = 0
     success: bool = True
     error: Optional[str] = None
+    timings: dict[AgentRole, NodeTiming] = field(default_factory=dict)
+    first_output_seconds: Optional[float] = None  # First text of the final agent (streaming only)
+    elapsed_seconds: Optional[float] = None
+
+    def critical_path(self) -> list[AgentRole]:
+        """Chain of timed agents ending at the last to finish, each waiting on the previous."""
+        if not self.timings:
+            return []
+        node = max(self.timings.values(), key=lambda t: t.finished)
+        path = [node.role]
+        while node.depends_on:
+            node = max((self.timings[r] for r in node.depends_on), key=lambda t: t.finished)
+            path.append(node.role)
+        return path[::-1]
 
     def add_response(self, response: AgentResponse):
         self.agents_executed.append(response.role)
@@ -35,7 +66,29 @@ class WorkflowState:
             self.error = response.error
 
 
-from typing import Optional
+def _run_to_completion(
+    make_coroutine: Callable[[], Awaitable[WorkflowState]],
+    agents: Iterable[Agent],
+) -> WorkflowState:
+    """Run a pattern's coroutine from synchronous code, then close the agents' async clients.
+
+    Uses asyncio.run, or a worker thread with its own loop when called from
+    inside a running event loop (where asyncio.run is not allowed).
+    """
+    async def run() -> WorkflowState:
+        try:
+            return await make_coroutine()
+        finally:
+            # The loop ends with this call, so release its connections
+            for pool in {id(a.pool): a.pool for a in agents}.values():
+                await pool.aclose()
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(run())
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, run()).result()
 
 
 class BasePattern(ABC):
@@ -130,28 +183,178 @@ class Pipeline(BasePattern):
         return state
 
 
+def usable_prefix(text: str, min_chars: int) -> Optional[str]:
+    """Longest prefix of streamed output that ends at a paragraph or section break.
+
+    Returns None until the prefix has at least min_chars, or while a code block
+    is still open.
+    """
+    cut = text.rfind("\n\n")
+    if cut < min_chars:
+        return None
+    prefix = text[:cut]
+    if prefix.count("```") % 2:
+        return None
+    return prefix
+
+
+async def _merge(*streams: AsyncIterator) -> AsyncIterator:
+    """Interleave async iterators as their items arrive.
+
+    The hand-off queue holds one item, so each producer waits while the
+    consumer is behind.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+    done = object()
+
+    async def pump(stream: AsyncIterator):
+        try:
+            async for item in stream:
+                await queue.put(item)
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(done)
+
+    pumps = [asyncio.create_task(pump(stream)) for stream in streams]
+    try:
+        remaining = len(pumps)
+        while remaining:
+            item = await queue.get()
+            if item is done:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        for task in pumps:
+            task.cancel()
+
+
+class StreamingPipeline(Pipeline):
+    """Pipeline whose stages start on a usable prefix of the previous stage's output.
+
+    Each agent streams its response. The next agent starts once that stream
+    has min_prefix_chars up to a paragraph break (see usable_prefix()), with
+    the compressed prefix as context, while the previous stage is still
+    generating. Stages are chained async generators, so nothing is produced
+    faster than it is consumed. The trade-off is that later stages see only
+    the prefix that was available when they started.
+    """
+
+    def __init__(self, min_prefix_chars: int = 600):
+        """
+        Args:
+            min_prefix_chars: Upstream output needed before the next stage starts
+        """
+        self.min_prefix_chars = min_prefix_chars
+
+    def execute(self, task: str, agents: list[Agent]) -> WorkflowState:
+        """Synchronous wrapper; inside a running event loop, await execute_async instead."""
+        return _run_to_completion(lambda: self.execute_async(task, agents), agents)
+
+    async def execute_stream(self, task: str, agents: list[Agent]) -> AsyncIterator[AgentChunk]:
+        """Chunks from every stage as they are generated, interleaved."""
+        async for _, chunk in self._stream(task, agents, {}):
+            yield chunk
+
+    async def execute_async(self, task: str, agents: list[Agent]) -> WorkflowState:
+        state = WorkflowState(pattern=OrchestrationPattern.STREAMING_PIPELINE)
+        started: dict[int, float] = {}
+        start = time.perf_counter()
+
+        async for index, chunk in self._stream(task, agents, started):
+            now = time.perf_counter() - start
+            if chunk.response is not None:
+                state.add_response(chunk.response)
+                depends_on = [agents[index - 1].role] if index else []
+                state.timings[chunk.role] = NodeTiming(chunk.role, depends_on, started[index] - start, now)
+            elif index == len(agents) - 1 and state.first_output_seconds is None:
+                state.first_output_seconds = now
+
+        state.elapsed_seconds = time.perf_counter() - start
+        return state
+
+    def _stream(self, task: str, agents: list[Agent], started: dict[int, float]) -> AsyncIterator:
+        stream = None
+        for index, agent in enumerate(agents):
+            stream = self._stage(index, agent, task, stream, started)
+        return stream
+
+    async def _stage(
+        self,
+        index: int,
+        agent: Agent,
+        task: str,
+        upstream: Optional[AsyncIterator],
+        started: dict[int, float],
+    ) -> AsyncIterator[tuple[int, AgentChunk]]:
+        """(stage index, chunk) for this stage and every stage before it."""
+        if upstream is None:
+            started[index] = time.perf_counter()
+            async for chunk in agent.stream_async(task):
+                yield index, chunk
+            return
+
+        # Pass earlier stages through until the previous one has a usable prefix
+        received: list[str] = []
+        context = None
+        async for stage, chunk in upstream:
+            yield stage, chunk
+            if stage != index - 1:
+                continue
+            if chunk.response is not None:
+                if chunk.response.success:
+                    context = chunk.response.content
+                break
+            received.append(chunk.text)
+            context = usable_prefix("".join(received), self.min_prefix_chars)
+            if context is not None:
+                break
+
+        if context is None:
+            # The previous stage failed: drain what is left without running this one
+            async for item in upstream:
+                yield item
+            return
+
+        started[index] = time.perf_counter()
+        prompt = f"Continue working on this task based on previous agent's output:\n\n{task}"
+        own = ((index, chunk) async for chunk in agent.stream_async(prompt, context=context))
+        async for item in _merge(upstream, own):
+            yield item
+
+
 class ParallelMerge(BasePattern):
     """Execute independent subtasks concurrently, then merge results.
 
     Dramatically reduces latency for non-dependent work.
     """
 
-    def __init__(self, merge_strategy: str = "summarize"):
+    def __init__(
+        self,
+        merge_strategy: str = "summarize",
+        pool: Optional[ClientPool] = None,
+        merger: Optional[Agent] = None,
+    ):
         """
         Args:
             merge_strategy: How to merge results - "concatenate", "summarize", or "structured"
+            pool: Client pool for the merging agent (the default pool if None)
+            merger: Agent that merges the results (an orchestrator agent if None)
         """
         self.merge_strategy = merge_strategy
-        self._merger = Agent(role=AgentRole.ORCHESTRATOR)
+        self._merger = merger or Agent(role=AgentRole.ORCHESTRATOR, **({"pool": pool} if pool else {}))
 
     def execute(self, task: str, agents: list[Agent]) -> WorkflowState:
         """Synchronous wrapper for async execution."""
-        return asyncio.run(self.execute_async(task, agents))
+        return _run_to_completion(lambda: self.execute_async(task, agents), [*agents, self._merger])
 
     async def execute_async(self, task: str, agents: list[Agent]) -> WorkflowState:
         state = WorkflowState(pattern=OrchestrationPattern.PARALLEL_MERGE)
 
-        # Execute all agents in parallel
+        # Execute all agents in parallel on their pools' shared async clients
         tasks = [agent.execute_async(task) for agent in agents]
         responses = await asyncio.gather(*tasks)
 
@@ -162,12 +365,12 @@ class ParallelMerge(BasePattern):
             return state
 
         # Merge results
-        merged = self._merge_results(task, responses)
+        merged = await self._merge_results(task, responses)
         state.add_response(merged)
 
         return state
 
-    def _merge_results(self, task: str, responses: list[AgentResponse]) -> AgentResponse:
+    async def _merge_results(self, task: str, responses: list[AgentResponse]) -> AgentResponse:
         """Merge parallel results based on strategy."""
         if self.merge_strategy == "concatenate":
             content = "\n\n---\n\n".join(
@@ -191,7 +394,95 @@ Agent outputs:
 Strategy: {self.merge_strategy}
 Provide a unified result that incorporates insights from all agents."""
 
-        return self._merger.execute(merge_prompt)
+        return await self._merger.execute_async(merge_prompt)
+
+    def _format_outputs(self, responses: list[AgentResponse]) -> str:
+        return "\n\n---\n\n".join(
+            f"[{r.role.value}]:\n{r.content}" for r in responses
+        )
+
+
+# Default hand-offs: design feeds implementation and docs, implementation feeds review
+DEFAULT_DEPENDENCIES = {
+    AgentRole.DEVELOPER: [AgentRole.ANALYST],
+    AgentRole.REVIEWER: [AgentRole.DEVELOPER],
+    AgentRole.DOC_WRITER: [AgentRole.ANALYST],
+}
+
+
+class DagPattern(BasePattern):
+    """Agents with declared dependencies, each started as soon as its inputs are ready.
+
+    Independent branches run concurrently, so the workflow takes as long as
+    its critical path. Each agent receives the outputs of the agents it
+    depends on as context. Dependencies on roles that are not in the team are
+    ignored. Per-agent timing is recorded in WorkflowState.timings.
+    """
+
+    def __init__(self, dependencies: Optional[dict[AgentRole, list[AgentRole]]] = None):
+        """
+        Args:
+            dependencies: Roles each role waits for (DEFAULT_DEPENDENCIES if None)
+        """
+        self.dependencies = DEFAULT_DEPENDENCIES if dependencies is None else dependencies
+
+    def _topological_order(self, agents: list[Agent]) -> list[tuple[Agent, list[AgentRole]]]:
+        """Agents with their in-team dependencies, dependencies first."""
+        by_role = {agent.role: agent for agent in agents}
+        if len(by_role) != len(agents):
+            raise ValueError("DagPattern needs at most one agent per role")
+        deps = {
+            role: [d for d in self.dependencies.get(role, []) if d in by_role]
+            for role in by_role
+        }
+
+        order: list[tuple[Agent, list[AgentRole]]] = []
+        visiting: set[AgentRole] = set()
+        placed: set[AgentRole] = set()
+
+        def visit(role: AgentRole):
+            if role in placed:
+                return
+            if role in visiting:
+                raise ValueError(f"Dependency cycle through {role.value}")
+            visiting.add(role)
+            for dep in deps[role]:
+                visit(dep)
+            visiting.discard(role)
+            placed.add(role)
+            order.append((by_role[role], deps[role]))
+
+        for agent in agents:
+            visit(agent.role)
+        return order
+
+    def execute(self, task: str, agents: list[Agent]) -> WorkflowState:
+        """Synchronous wrapper; inside a running event loop, await execute_async instead."""
+        return _run_to_completion(lambda: self.execute_async(task, agents), agents)
+
+    async def execute_async(self, task: str, agents: list[Agent]) -> WorkflowState:
+        state = WorkflowState(pattern=OrchestrationPattern.DAG)
+        start = time.perf_counter()
+
+        async def run_node(agent: Agent, deps: list[AgentRole], upstream: list[asyncio.Task]) -> AgentResponse:
+            inputs = await asyncio.gather(*upstream)
+            if not all(r.success for r in inputs):
+                # Not recorded in the state, which already holds the upstream error
+                return AgentResponse(content="", role=agent.role, tokens_used=0, success=False,
+                                     error="Skipped: an upstream agent failed")
+            started = time.perf_counter() - start
+            context = self._format_outputs(inputs) if inputs else None
+            prompt = task if not deps else f"Continue working on this task based on the outputs above:\n\n{task}"
+            response = await agent.execute_async(prompt, context=context)
+            state.timings[agent.role] = NodeTiming(agent.role, deps, started, time.perf_counter() - start)
+            state.add_response(response)
+            return response
+
+        nodes: dict[AgentRole, asyncio.Task] = {}
+        for agent, deps in self._topological_order(agents):
+            nodes[agent.role] = asyncio.create_task(run_node(agent, deps, [nodes[d] for d in deps]))
+        await asyncio.gather(*nodes.values())
+        return state
 
     def _format_outputs(self, responses: list[AgentResponse]) -> str:
         return "\n\n---\n\n".join(
@@ -205,5 +496,7 @@ def get_pattern(pattern: OrchestrationPattern, **kwargs) -> BasePattern:
         OrchestrationPattern.HUB_AND_SPOKE: HubAndSpoke,
         OrchestrationPattern.PIPELINE: Pipeline,
         OrchestrationPattern.PARALLEL_MERGE: ParallelMerge,
+        OrchestrationPattern.DAG: DagPattern,
+        OrchestrationPattern.STREAMING_PIPELINE: StreamingPipeline,
     }
     return patterns[pattern](**kwargs)
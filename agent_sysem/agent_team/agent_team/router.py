@@ -1,11 +1,16 @@
 """Smart router for task classification and agent selection."""
 
-from dataclasses import dataclass
+from collections import Counter, OrderedDict
+from dataclasses import asdict, dataclass
 from enum import Enum
 from typing import Optional
-import anthropic
+import json
+import math
+import re
+import sqlite3
+import threading
 
-from agent_team.agents import AgentRole
+from agent_team.agents import SYSTEM_PROMPTS, AgentRole, ClientPool, default_client_pool
 
 
 class TaskComplexity(Enum):
@@ -22,6 +27,7 @@ class RouteResult:
     complexity: TaskComplexity
     suggested_agents: list[AgentRole]
     reasoning: str
+    confidence: float = 1.0
 
 
 # Keyword patterns for quick routing (avoids LLM call for obvious cases)
@@ -32,38 +38,279 @@ KEYWORD_PATTERNS = {
     AgentRole.DOC_WRITER: ["document", "readme", "explain", "api doc", "guide", "tutorial"],
 }
 
+# Order in which suggested agents run
+ROLE_ORDER = [AgentRole.ANALYST, AgentRole.DEVELOPER, AgentRole.REVIEWER, AgentRole.DOC_WRITER]
+
+_WORD = re.compile(r"[a-z][a-z0-9_]+")
+_STOPWORDS = frozenset(
+    "the and for with this that from into your you are our can will should would please "
+    "about have has was were been all any its their them then than when what which who how "
+    "also but not out use using via per each".split()
+)
+
+
+def normalize_task(task: str) -> str:
+    """Cache key form of a task: lowercase, single-spaced, without trailing punctuation."""
+    return " ".join(task.lower().split()).rstrip(".!?;:")
+
+
+def _terms(text: str) -> list[str]:
+    return [w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+
+
+class RoleIndex:
+    """TF-IDF centroid per role, scored by cosine similarity.
+
+    Seeded with each role's keywords and system prompt; labeled tasks added
+    with add() (e.g. past LLM classifications) sharpen the centroids. Vectors
+    are sparse dicts, rebuilt lazily after additions.
+    """
+
+    def __init__(self):
+        self._documents: list[tuple[AgentRole, Counter]] = []
+        self._centroids: Optional[dict[AgentRole, dict[str, float]]] = None
+        self._idf: dict[str, float] = {}
+        for role in ROLE_ORDER:
+            self.add(role, " ".join(KEYWORD_PATTERNS[role]))
+            for line in SYSTEM_PROMPTS[role].splitlines():
+                if line.startswith("- "):
+                    self.add(role, line)
+
+    def add(self, role: AgentRole, text: str):
+        terms = Counter(_terms(text))
+        if terms:
+            self._documents.append((role, terms))
+            self._centroids = None
+
+    def _vector(self, terms: Counter) -> dict[str, float]:
+        vector = {t: (1 + math.log(n)) * self._idf.get(t, 0.0) for t, n in terms.items()}
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {t: v / norm for t, v in vector.items() if v}
+
+    def _build(self):
+        df = Counter(t for _, terms in self._documents for t in terms)
+        n = len(self._documents)
+        self._idf = {t: math.log((1 + n) / (1 + d)) + 1 for t, d in df.items()}
+        sums: dict[AgentRole, Counter] = {role: Counter() for role in ROLE_ORDER}
+        for role, terms in self._documents:
+            sums[role].update(self._vector(terms))
+        self._centroids = {}
+        for role, total in sums.items():
+            norm = math.sqrt(sum(v * v for v in total.values())) or 1.0
+            self._centroids[role] = {t: v / norm for t, v in total.items()}
+
+    def scores(self, text: str) -> dict[AgentRole, float]:
+        """Cosine similarity of the text to each role's centroid."""
+        if self._centroids is None:
+            self._build()
+        query = self._vector(Counter(_terms(text)))
+        return {
+            role: sum(w * centroid.get(t, 0.0) for t, w in query.items())
+            for role, centroid in self._centroids.items()
+        }
+
+
+class ClassificationCache:
+    """LLM classifications keyed on normalized task text.
+
+    An in-memory LRU in front of an optional SQLite file, so classifications
+    survive restarts and can be shared between processes.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._memory: OrderedDict[str, RouteResult] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS route_cache (task TEXT PRIMARY KEY, result TEXT)")
+            self._db.commit()
+
+    @staticmethod
+    def _dump(result: RouteResult) -> str:
+        data = asdict(result)
+        data["primary_agent"] = result.primary_agent.value
+        data["complexity"] = result.complexity.value
+        data["suggested_agents"] = [a.value for a in result.suggested_agents]
+        return json.dumps(data)
+
+    @staticmethod
+    def _load(raw: str) -> RouteResult:
+        data = json.loads(raw)
+        return RouteResult(
+            primary_agent=AgentRole(data["primary_agent"]),
+            complexity=TaskComplexity(data["complexity"]),
+            suggested_agents=[AgentRole(a) for a in data["suggested_agents"]],
+            reasoning=data["reasoning"],
+            confidence=data.get("confidence", 1.0),
+        )
+
+    def get(self, key: str) -> Optional[RouteResult]:
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                return result
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT result FROM route_cache WHERE task = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            result = self._load(row[0])
+            self._remember(key, result)
+            return result
+
+    def put(self, key: str, result: RouteResult):
+        with self._lock:
+            self._remember(key, result)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO route_cache (task, result) VALUES (?, ?)", (key, self._dump(result))
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, result: RouteResult):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def items(self) -> list[tuple[str, RouteResult]]:
+        """Every stored classification (the file if there is one, else memory)."""
+        with self._lock:
+            if self._db is None:
+                return list(self._memory.items())
+            rows = self._db.execute("SELECT task, result FROM route_cache").fetchall()
+        return [(task, self._load(raw)) for task, raw in rows]
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
 
 class Router:
-    """Routes tasks to appropriate agents based on classification."""
+    """Routes tasks to appropriate agents based on classification.
+
+    Three stages, cheapest first:
+    1. Local scoring: keyword hits for every role plus TF-IDF similarity,
+       with a confidence
+    2. Cached LLM classification of the same normalized task
+    3. LLM classification, only when local confidence is below confidence_floor;
+       the result is cached and added to the TF-IDF index
+
+    Short tasks carry little text for the margin to build on, so one whose
+    winner no other role's keywords contest is kept local down to SHORT_TASK_FLOOR.
+    """
 
-    def __init__(self, model: str = "claude-sonnet-4-20250514"):
+    KEYWORD_WEIGHT = 0.25  # Score per distinct keyword hit, next to cosine similarity in [0, 1]
+    SATURATION = 0.6  # Top score at which a clear winner gets full confidence
+    SHORT_TASK_CHARS = 60  # Tasks shorter than this are eligible for SHORT_TASK_FLOOR
+    SHORT_TASK_FLOOR = 0.35  # Confidence floor for short tasks without competing keywords
+
+    def __init__(
+        self,
+        model: str = "claude-sonnet-4-20250514",
+        confidence_floor: float = 0.6,
+        cache_path: Optional[str] = None,
+        pool: Optional[ClientPool] = None,
+    ):
+        """
+        Args:
+            model: Model for LLM classification
+            confidence_floor: Local confidence below which the LLM is asked
+            cache_path: SQLite file persisting LLM classifications (memory only if None)
+            pool: Client pool for LLM calls (the default pool if None)
+        """
         self.model = model
-        self._client = anthropic.Anthropic()
+        self.confidence_floor = confidence_floor
+        self.pool = pool or default_client_pool
+        self.cache = ClassificationCache(cache_path)
+        self.index = RoleIndex()
+        self._keywords = {
+            role: [re.compile(r"\b" + re.escape(kw)) for kw in keywords]
+            for role, keywords in KEYWORD_PATTERNS.items()
+        }
+        self._stats = {"local": 0, "cache_hits": 0, "llm_calls": 0}
+        for task, result in self.cache.items():
+            self.index.add(result.primary_agent, task)
+
+    @property
+    def _client(self):
+        return self.pool.client
 
-    def _keyword_match(self, task: str) -> Optional[AgentRole]:
-        """Fast keyword-based routing."""
+    def _keyword_hits(self, task_lower: str) -> dict[AgentRole, int]:
+        return {role: sum(1 for p in self._keywords[role] if p.search(task_lower)) for role in ROLE_ORDER}
+
+    def score(self, task: str) -> dict[AgentRole, float]:
+        """Local score per role: keyword hits plus TF-IDF similarity."""
         task_lower = task.lower()
-        for role, keywords in KEYWORD_PATTERNS.items():
-            if any(kw in task_lower for kw in keywords):
-                return role
-        return None
+        similarity = self.index.scores(task_lower)
+        hits = self._keyword_hits(task_lower)
+        return {role: self.KEYWORD_WEIGHT * hits[role] + similarity[role] for role in ROLE_ORDER}
+
+    def _local_classify(self, task: str) -> RouteResult:
+        """Route from local scores; confidence reflects the winner's margin and strength."""
+        scores = self.score(task)
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        top, runner_up = scores[ranked[0]], scores[ranked[1]]
+        if top <= 0:
+            confidence = 0.0
+        else:
+            confidence = (1 - runner_up / top) ** 0.5 * min(1.0, top / self.SATURATION)
+
+        # Roles scoring close to the winner join it, in execution order
+        agents = [role for role in ROLE_ORDER if scores[role] >= 0.6 * top and scores[role] > 0]
+        if len(agents) >= 3:
+            complexity = TaskComplexity.COMPLEX
+        elif len(agents) == 2:
+            complexity = TaskComplexity.MEDIUM
+        else:
+            complexity = TaskComplexity.SIMPLE
+        return RouteResult(
+            primary_agent=ranked[0],
+            complexity=complexity,
+            suggested_agents=agents or [ranked[0]],
+            reasoning="Local match: " + ", ".join(f"{r.value} {scores[r]:.2f}" for r in ranked if scores[r] > 0),
+            confidence=confidence,
+        )
+
+    def _is_clear_short_task(self, task: str, local: RouteResult) -> bool:
+        """Short task whose local winner has no keyword competition from another role."""
+        if len(task) >= self.SHORT_TASK_CHARS or local.confidence < self.SHORT_TASK_FLOOR:
+            return False
+        hits = self._keyword_hits(task.lower())
+        return all(not n or role == local.primary_agent for role, n in hits.items())
 
     def route(self, task: str) -> RouteResult:
         """Route a task to appropriate agent(s)."""
-        # Try keyword matching first (fast path)
-        keyword_match = self._keyword_match(task)
-
-        if keyword_match and len(task) < 100:
-            # Simple task with clear keyword
-            return RouteResult(
-                primary_agent=keyword_match,
-                complexity=TaskComplexity.SIMPLE,
-                suggested_agents=[keyword_match],
-                reasoning=f"Keyword match: {keyword_match.value}",
-            )
-
-        # Use LLM for complex classification
-        return self._llm_classify(task)
+        # Local scoring first (fast path)
+        local = self._local_classify(task)
+        if local.confidence >= self.confidence_floor or self._is_clear_short_task(task, local):
+            self._stats["local"] += 1
+            return local
+
+        key = normalize_task(task)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._stats["cache_hits"] += 1
+            return cached
+
+        # Use LLM for nuanced classification
+        self._stats["llm_calls"] += 1
+        result = self._llm_classify(task)
+        self.cache.put(key, result)
+        self.index.add(result.primary_agent, key)
+        return result
+
+    def get_stats(self) -> dict:
+        routed = sum(self._stats.values())
+        return {
+            **self._stats,
+            "routed": routed,
+            "llm_rate": self._stats["llm_calls"] / routed if routed else 0.0,
+        }
 
     def _llm_classify(self, task: str) -> RouteResult:
         """Use LLM for nuanced task classification."""
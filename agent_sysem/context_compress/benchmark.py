@@ -0,0 +1,565 @@
+"""
+Benchmarks for the context compression strategies.
+
+Usage:
+    python benchmark.py sliding_window
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import statistics
+import tempfile
+import time
+from types import SimpleNamespace
+
+import main
+from main import (
+    IMPORTANCE_RANK,
+    BoundedUnitStore,
+    CharRatioTokenizer,
+    HierarchicalMemoryManager,
+    HierarchicalSummaryConfig,
+    HybridCompressionManager,
+    HybridConfig,
+    ImportanceLevel,
+    LLMCache,
+    LLMCacheConfig,
+    ProgressiveSummarizer,
+    ProgressiveSummaryConfig,
+    SemanticCompressor,
+    SemanticConfig,
+    SemanticUnit,
+    SlidingWindowConfig,
+    SlidingWindowManager,
+    SQLiteMemoryBackend,
+)
+from service import CompressionService, ServiceConfig
+
+
+class FakeLLMClient:
+    """
+    Offline stand-in for anthropic.Anthropic used by the benchmarks.
+    Answers each prompt shape used in main.py with a canned response.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self.messages = self
+
+    def create(self, model: str, max_tokens: int, messages: list[dict]):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = messages[0]["content"]
+        if "Classify each message" in prompt:
+            count = len(re.findall(r"^\d+\. ", prompt, re.MULTILINE))
+            text = json.dumps([{"type": "fact", "importance": 0.6}] * count)
+        elif "Classify this message" in prompt:
+            text = '{"type": "fact", "importance": 0.6}'
+        elif "Return only the JSON array" in prompt:
+            text = json.dumps([{"content": f"unit {self.calls}", "type": "fact", "importance": "high"}])
+        elif "JSON array" in prompt:
+            text = json.dumps([{"content": f"unit {self.calls}", "type": "fact", "importance": 0.7}])
+        elif "user profile" in prompt:
+            text = "{}"
+        else:
+            text = f"Summary #{self.calls}"
+        return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
+
+def install_fake_llm(latency: float = 0.0) -> FakeLLMClient:
+    """Route all LLM calls in main.py to a FakeLLMClient."""
+    fake = FakeLLMClient(latency)
+    main.client = fake
+    return fake
+
+
+# =============================================================================
+# Sliding Window: per-message cost vs history size
+# =============================================================================
+
+class RescanSlidingWindowManager(SlidingWindowManager):
+    """Reference implementation that re-estimates every message on each trim pass."""
+
+    def _total_tokens(self) -> int:
+        return sum(self._estimate_tokens(m["content"]) for m in self.messages)
+
+    def _trim_if_needed(self):
+        while len(self.messages) > self.config.max_turns * 2:
+            self._drop_oldest()
+        while self._total_tokens() > self.config.max_tokens and len(self.messages) > 2:
+            self._drop_oldest()
+
+
+def _time_per_message(manager_cls, num_messages: int) -> float:
+    """Return average microseconds per add_message for a window that holds ~num_messages."""
+    config = SlidingWindowConfig(max_turns=num_messages, max_tokens=num_messages * 8)
+    manager = manager_cls(config)
+    content = "x" * 20  # 8 estimated tokens per message
+
+    start = time.perf_counter()
+    for i in range(num_messages):
+        manager.add_message("user" if i % 2 == 0 else "assistant", content)
+    manager.get_stats()
+    elapsed = time.perf_counter() - start
+    return elapsed / num_messages * 1_000_000
+
+
+def bench_sliding_window(sizes: tuple[int, ...] = (1_000, 10_000, 100_000), rescan_limit: int = 10_000):
+    """Compare per-message cost of incremental vs rescanning token accounting."""
+    print("\n=== Sliding Window: per-message cost ===")
+    print(f"{'messages':>10} {'incremental (us)':>18} {'rescan (us)':>14}")
+    for size in sizes:
+        incremental = _time_per_message(SlidingWindowManager, size)
+        if size <= rescan_limit:
+            rescan = f"{_time_per_message(RescanSlidingWindowManager, size):14.2f}"
+        else:
+            rescan = f"{'skipped':>14}"
+        print(f"{size:>10} {incremental:18.2f} {rescan}")
+
+
+# =============================================================================
+# Progressive Summarization: add_turn latency, sync vs background
+# =============================================================================
+
+class SimulatedLatencySummarizer(ProgressiveSummarizer):
+    """Summarizer whose LLM call is replaced by a fixed sleep."""
+
+    llm_latency: float = 0.2
+
+    def _generate_summary(self, messages, existing_summary=None):
+        time.sleep(self.llm_latency)
+        return f"Summary of {len(messages)} messages"
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def bench_progressive_async(turns: int = 60, llm_latency: float = 0.2):
+    """Compare add_turn latency percentiles with blocking and background summarization."""
+    print(f"\n=== Progressive Summarization: add_turn latency ({llm_latency * 1000:.0f}ms LLM) ===")
+    print(f"{'mode':>8} {'p50 (ms)':>10} {'p99 (ms)':>10} {'max (ms)':>10} {'summaries':>10}")
+    for async_mode in (False, True):
+        summarizer = SimulatedLatencySummarizer(ProgressiveSummaryConfig(async_summarization=async_mode))
+        summarizer.llm_latency = llm_latency
+        samples = []
+        for i in range(turns):
+            start = time.perf_counter()
+            summarizer.add_turn(f"Question {i}", f"Answer {i}")
+            samples.append((time.perf_counter() - start) * 1000)
+            time.sleep(llm_latency / 4)  # User think time between turns
+        summarizer.close()
+        stats = summarizer.get_stats()
+        print(f"{'async' if async_mode else 'sync':>8} {statistics.median(samples):10.3f} "
+              f"{_percentile(samples, 0.99):10.3f} {max(samples):10.3f} {stats['summaries']:>10}")
+
+
+# =============================================================================
+# Semantic unit pruning: sort-and-truncate vs bounded heap
+# =============================================================================
+
+def _make_units(count: int, seed: int = 0) -> list[SemanticUnit]:
+    rng = random.Random(seed)
+    levels = list(ImportanceLevel)
+    types = ["fact", "decision", "question", "preference", "context"]
+    return [
+        SemanticUnit(f"unit {i}", rng.choice(types), rng.choice(levels), i // 10, [f"entity{i % 50}"])
+        for i in range(count)
+    ]
+
+
+def _sort_and_truncate(units: list[SemanticUnit], capacity: int, batch: int) -> int:
+    kept: list[SemanticUnit] = []
+    for start in range(0, len(units), batch):
+        kept.extend(units[start:start + batch])
+        if len(kept) > capacity:
+            kept.sort(key=lambda u: (IMPORTANCE_RANK[u.importance], u.turn_created), reverse=True)
+            kept = kept[:capacity]
+    return len(kept)
+
+
+def _bounded_heap(units: list[SemanticUnit], capacity: int, batch: int) -> int:
+    store = BoundedUnitStore(capacity)
+    for unit in units:
+        store.push(unit, IMPORTANCE_RANK[unit.importance], unit.turn_created)
+    return len(store)
+
+
+def bench_unit_pruning(sizes: tuple[int, ...] = (10_000, 100_000), batch: int = 10):
+    """Stream units in extraction-sized batches into a store capped at 10% of the stream."""
+    print(f"\n=== Semantic unit pruning (batches of {batch}, capacity = 10%) ===")
+    print(f"{'units':>10} {'sort+truncate (ms)':>20} {'bounded heap (ms)':>18} {'speedup':>8}")
+    for size in sizes:
+        units = _make_units(size)
+        capacity = size // 10
+        timings = []
+        for prune in (_sort_and_truncate, _bounded_heap):
+            start = time.perf_counter()
+            prune(units, capacity, batch)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{size:>10} {timings[0]:20.1f} {timings[1]:18.1f} {timings[0] / timings[1]:7.1f}x")
+
+
+# =============================================================================
+# Persistent memory: resume from snapshot vs rebuild from full log
+# =============================================================================
+
+def bench_resume(turns: int = 5_000, llm_latency: float = 0.002):
+    """Time resuming a hybrid session from its SQLite store vs replaying every turn."""
+    print(f"\n=== Persistent memory: startup after {turns} turns ({llm_latency * 1000:.0f}ms LLM) ===")
+    fake = install_fake_llm(llm_latency)
+    no_cache = LLMCache(LLMCacheConfig(max_entries=0))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteMemoryBackend(os.path.join(tmp, "memory.db"), snapshot_interval=100)
+        manager = HybridCompressionManager(HybridConfig(), cache=no_cache, backend=backend, session_id="bench")
+        start = time.perf_counter()
+        for i in range(turns):
+            manager.add_turn(f"We discussed topic {i} today", f"Noted topic {i}")
+        write_ms = (time.perf_counter() - start) * 1000
+
+        fake.calls = 0
+        resumed = HybridCompressionManager.resume(backend, "bench", HybridConfig(), cache=no_cache)
+        resume_calls = fake.calls
+
+        fake.calls = 0
+        log = backend.read_log("bench")
+        start = time.perf_counter()
+        rebuilt = HybridCompressionManager(HybridConfig(), cache=no_cache)
+        for _, record in log:
+            rebuilt.add_turn(record["user"], record["assistant"])
+        rebuild_ms = (time.perf_counter() - start) * 1000
+        backend.close()
+
+    assert resumed.get_context() == manager.get_context()
+    print(f"  logging {turns} turns:       {write_ms:10.1f} ms")
+    print(f"  resume (snapshot + tail):  {resumed.resume_stats['resume_ms']:10.1f} ms, "
+          f"{resumed.resume_stats['replayed_turns']} turns replayed, {resume_calls} LLM calls")
+    print(f"  rebuild (replay full log): {rebuild_ms:10.1f} ms, {fake.calls} LLM calls")
+
+
+# =============================================================================
+# Multi-tenant service: load test with a stubbed LLM
+# =============================================================================
+
+async def _run_service_load(service: CompressionService, tenants: int, sessions: int, turns: int):
+    futures = []
+    for turn in range(turns):
+        for t in range(tenants):
+            # Tenant 0 is a noisy neighbour with 5x the sessions of everyone else
+            tenant_sessions = sessions * 5 if t == 0 else sessions
+            for s in range(tenant_sessions):
+                futures.append(await service.submit_turn(
+                    f"tenant-{t}", f"session-{s}",
+                    f"Turn {turn}: we discussed item {turn} for session {s}",
+                    f"Acknowledged item {turn}"
+                ))
+    await asyncio.gather(*futures)
+    return len(futures)
+
+
+def bench_service(tenants: int = 8, sessions: int = 25, turns: int = 10,
+                  workers: int = 32, max_live_sessions: int = 200, llm_latency: float = 0.02):
+    """Throughput of CompressionService across many sessions with LRU eviction."""
+    print(f"\n=== Compression service: {tenants} tenants, {workers} workers, "
+          f"{max_live_sessions} live sessions, {llm_latency * 1000:.0f}ms LLM ===")
+    fake = install_fake_llm(llm_latency)
+
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = SQLiteMemoryBackend(os.path.join(tmp, "memory.db"), snapshot_interval=20)
+            config = ServiceConfig(max_live_sessions=max_live_sessions, workers=workers)
+            async with CompressionService(backend, config, cache=LLMCache()) as service:
+                start = time.perf_counter()
+                total = await _run_service_load(service, tenants, sessions, turns)
+                elapsed = time.perf_counter() - start
+                metrics = service.get_metrics(top_sessions=3)
+            backend.close()
+        return total, elapsed, metrics
+
+    total, elapsed, metrics = asyncio.run(run())
+    print(f"  turns processed:   {total} in {elapsed:.2f}s ({total / elapsed:,.0f} turns/s)")
+    print(f"  LLM calls:         {fake.calls}")
+    print(f"  sessions resumed:  {metrics['sessions_resumed']}, evicted: {metrics['sessions_evicted']}")
+    print(f"  live memory:       {metrics['live_memory_bytes'] / 1024:.0f} KiB "
+          f"across {metrics['live_sessions']} sessions")
+    print(f"  turns by tenant:   {metrics['turns_by_tenant']}")
+
+
+# =============================================================================
+# Strategy comparison: replay long conversations with planted facts
+# =============================================================================
+
+FACT_CODE = re.compile(r"\b[A-Z]{3}-\d{4}\b")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+FILLER_QUESTIONS = [
+    "How should we structure the retry logic for the ingestion job?",
+    "Can you explain the trade-offs between batching and streaming here?",
+    "What would a reasonable timeout be for the upstream call?",
+    "Could you review the error handling in the export step?",
+    "Why does the cache warm-up take so long after a deploy?",
+    "Is there a simpler way to express this configuration?",
+]
+FILLER_ANSWERS = [
+    "A bounded exponential backoff with jitter is usually enough, and it keeps the load on the upstream predictable.",
+    "Batching amortizes per-request overhead while streaming lowers latency, so it depends on which one you are optimizing.",
+    "Start from the observed p99 of the upstream and add some headroom, then tighten it once you have metrics.",
+    "The export step swallows exceptions in two places, which makes failures hard to trace from the logs.",
+    "The warm-up replays every key serially, so parallelizing it or warming only hot keys would help a lot.",
+    "Most of those options have sensible defaults, so the file can be reduced to the handful that actually differ.",
+]
+FACT_TEMPLATES = [
+    "Please remember that the staging database is {code}.",
+    "For reference, our deployment ticket is {code}.",
+    "Note that the customer account we are debugging is {code}.",
+    "The feature flag we agreed on is called {code}.",
+]
+
+
+class ExtractiveLLMClient(FakeLLMClient):
+    """
+    Deterministic fake LLM whose output depends on its input.
+    Summaries, profiles and units keep the most recent sentences that mention a
+    planted fact code, within max_tokens, so fact recall reflects what each
+    strategy actually forwards to (and keeps from) the LLM.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(latency)
+        self.input_tokens = 0
+        self._tokenizer = CharRatioTokenizer(tokens_per_char=0.25)
+
+    def _salient(self, text: str, max_tokens: int) -> list[str]:
+        sentences = []
+        for line in text.splitlines():
+            line = re.sub(r"^(\[(User|Assistant)\]:|-)\s*", "", line.strip())
+            sentences.extend(s for s in SENTENCE_SPLIT.split(line) if FACT_CODE.search(s))
+        # Newest first within the output budget, then back to conversation order
+        kept, used = [], 0
+        for sentence in reversed(list(dict.fromkeys(sentences))):
+            cost = self._tokenizer.count(sentence)
+            if used + cost > max_tokens:
+                break
+            kept.append(sentence)
+            used += cost
+        return kept[::-1]
+
+    def create(self, model: str, max_tokens: int, messages: list[dict]):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = messages[0]["content"]
+        self.input_tokens += self._tokenizer.count(prompt)
+
+        if "Classify each message" in prompt:
+            items = re.findall(r"^\d+\. (.*)$", prompt, re.MULTILINE)
+            text = json.dumps([self._label(item) for item in items])
+        elif "Classify this message" in prompt:
+            text = json.dumps(self._label(prompt.rsplit("Message:", 1)[-1]))
+        elif "Return only the JSON array" in prompt:
+            text = json.dumps([
+                {"content": s, "type": "fact", "importance": "high", "entities": FACT_CODE.findall(s)}
+                for s in self._salient(prompt, max_tokens)
+            ])
+        elif "JSON array" in prompt:
+            text = json.dumps([
+                {"content": s, "type": "fact", "importance": 0.8}
+                for s in self._salient(prompt, max_tokens)
+            ])
+        elif "user profile" in prompt:
+            text = json.dumps({"facts": self._salient(prompt.split("Conversation:", 1)[-1], max_tokens)})
+        else:
+            text = " ".join(self._salient(prompt, max_tokens)) or "No key facts yet."
+        return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
+    @staticmethod
+    def _label(message: str) -> dict:
+        if FACT_CODE.search(message):
+            return {"type": "fact", "importance": 0.9}
+        return {"type": "question", "importance": 0.3}
+
+
+def generate_conversation(turns: int, planted_facts: int, seed: int = 0, answer_sentences: int = 1) -> dict:
+    """Build a synthetic conversation with facts planted at evenly spaced turns."""
+    rng = random.Random(seed)
+    codes = [f"{rng.choice(['DBX', 'OPS', 'ACC', 'FLG'])}-{1000 + i * 97 % 9000:04d}" for i in range(planted_facts)]
+    # Plant facts in the first 80% so every fact has to survive some compression
+    spacing = max(1, int(turns * 0.8) // max(1, planted_facts))
+    planted = {i * spacing: code for i, code in enumerate(codes)}
+
+    records = []
+    for turn in range(turns):
+        if turn in planted:
+            user = rng.choice(FACT_TEMPLATES).format(code=planted[turn])
+            assistant = "Got it, I will keep that in mind."
+        else:
+            user = rng.choice(FILLER_QUESTIONS)
+            assistant = " ".join(rng.choice(FILLER_ANSWERS) for _ in range(answer_sentences))
+        records.append({"user": user, "assistant": assistant})
+    return {"turns": records, "facts": codes}
+
+
+def load_conversation(path: str) -> dict:
+    """Load a recorded conversation: {"turns": [{"user", "assistant"}, ...], "facts": [...]}."""
+    with open(path) as f:
+        return json.load(f)
+
+
+WORKLOADS = {
+    "chat": dict(turns=400, planted_facts=12, answer_sentences=1),
+    "long_answers": dict(turns=150, planted_facts=8, answer_sentences=6),
+}
+
+
+def _strategy_factories(profile_path: str) -> dict:
+    cache = lambda: LLMCache(LLMCacheConfig(max_entries=0))  # Count every LLM call
+    return {
+        "sliding_window": lambda: SlidingWindowManager(SlidingWindowConfig(max_turns=10, max_tokens=2000)),
+        "progressive": lambda: ProgressiveSummarizer(cache=cache()),
+        "progressive_sect": lambda: ProgressiveSummarizer(
+            ProgressiveSummaryConfig(sectioned_summary=True), cache=cache()
+        ),
+        "hierarchical": lambda: HierarchicalMemoryManager(
+            HierarchicalSummaryConfig(profile_path=profile_path), cache=cache()
+        ),
+        "semantic": lambda: SemanticCompressor(cache=cache()),
+        "semantic_query": lambda: SemanticCompressor(SemanticConfig(query_aware_retrieval=True), cache=cache()),
+        "hybrid": lambda: HybridCompressionManager(cache=cache()),
+        "hybrid_query": lambda: HybridCompressionManager(HybridConfig(query_aware_retrieval=True), cache=cache()),
+        "hybrid_sect": lambda: HybridCompressionManager(HybridConfig(sectioned_summary=True), cache=cache()),
+    }
+
+
+def replay_conversation(manager, conversation: dict, fake: ExtractiveLLMClient) -> dict:
+    """Feed every turn to manager and measure prompt size, LLM usage and fact recall."""
+    tokenizer = CharRatioTokenizer(tokens_per_char=0.25)
+    fake.calls = fake.input_tokens = 0
+    prompt_tokens = 0
+    elapsed = 0.0
+
+    for record in conversation["turns"]:
+        start = time.perf_counter()
+        if isinstance(manager, SlidingWindowManager):
+            manager.add_message("user", record["user"])
+            manager.add_message("assistant", record["assistant"])
+        else:
+            manager.add_turn(record["user"], record["assistant"])
+        messages = manager.get_messages()
+        elapsed += time.perf_counter() - start
+        prompt_tokens += sum(tokenizer.count(m["content"]) for m in messages)
+
+    final_prompt = "\n".join(m["content"] for m in manager.get_messages())
+    recalled = sum(1 for code in conversation["facts"] if code in final_prompt)
+    turns = len(conversation["turns"])
+    return {
+        "prompt_tokens_per_turn": prompt_tokens / turns,
+        "llm_calls_per_turn": fake.calls / turns,
+        "llm_input_tokens_per_turn": fake.input_tokens / turns,
+        "wall_ms": elapsed * 1000,
+        "recall": recalled / max(1, len(conversation["facts"])),
+    }
+
+
+def bench_strategies(workloads: tuple[str, ...] = tuple(WORKLOADS), seed: int = 7,
+                     conversation_path: str = None, llm_latency: float = 0.0):
+    """Compare all strategies on the same replayed conversations."""
+    fake = ExtractiveLLMClient(llm_latency)
+    main.client = fake
+
+    if conversation_path:
+        conversations = {os.path.basename(conversation_path): load_conversation(conversation_path)}
+    else:
+        conversations = {name: generate_conversation(seed=seed, **WORKLOADS[name]) for name in workloads}
+
+    for name, conversation in conversations.items():
+        print(f"\n=== Strategy comparison: {name} "
+              f"({len(conversation['turns'])} turns, {len(conversation['facts'])} planted facts) ===")
+        print(f"{'strategy':>16} {'prompt tok/turn':>16} {'LLM calls/turn':>15} "
+              f"{'LLM in tok/turn':>16} {'wall (ms)':>10} {'recall':>7}")
+        with tempfile.TemporaryDirectory() as tmp:
+            for strategy, factory in _strategy_factories(os.path.join(tmp, "profile.json")).items():
+                result = replay_conversation(factory(), conversation, fake)
+                print(f"{strategy:>16} {result['prompt_tokens_per_turn']:16.1f} "
+                      f"{result['llm_calls_per_turn']:15.3f} {result['llm_input_tokens_per_turn']:16.1f} "
+                      f"{result['wall_ms']:10.1f} {result['recall']:7.0%}")
+
+
+# =============================================================================
+# Summarization input tokens per cycle: full rewrite vs sectioned
+# =============================================================================
+
+def _summary_cycle_tokens(summarizer: ProgressiveSummarizer, conversation: dict,
+                          fake: ExtractiveLLMClient) -> list[int]:
+    """Return LLM input tokens spent at each summarization cycle (0 if merged locally)."""
+    per_cycle = []
+    for record in conversation["turns"]:
+        before_tokens, before_summaries = fake.input_tokens, summarizer.get_stats()["summaries"]
+        summarizer.add_turn(record["user"], record["assistant"])
+        if summarizer.get_stats()["summaries"] > before_summaries:
+            per_cycle.append(fake.input_tokens - before_tokens)
+    return per_cycle
+
+
+def bench_summary_cycles(turns: int = 400, seed: int = 7):
+    """Compare summarization input tokens per cycle for full-rewrite and sectioned summaries."""
+    print(f"\n=== Summarization input tokens per cycle ({turns} turns) ===")
+    fake = ExtractiveLLMClient()
+    main.client = fake
+    conversation = generate_conversation(turns, planted_facts=20, seed=seed, answer_sentences=3)
+
+    results = {}
+    for label, sectioned in (("full rewrite", False), ("sectioned", True)):
+        fake.calls = fake.input_tokens = 0
+        summarizer = ProgressiveSummarizer(
+            ProgressiveSummaryConfig(sectioned_summary=sectioned),
+            cache=LLMCache(LLMCacheConfig(max_entries=0))
+        )
+        results[label] = (_summary_cycle_tokens(summarizer, conversation, fake), fake.calls)
+
+    cycles = len(results["full rewrite"][0])
+    checkpoints = sorted({0, cycles // 4, cycles // 2, cycles - 1})
+    print(f"{'':>14} " + " ".join(f"{'cycle ' + str(c + 1):>10}" for c in checkpoints)
+          + f" {'mean':>10} {'LLM calls':>10}")
+    for label, (per_cycle, calls) in results.items():
+        print(f"{label:>14} " + " ".join(f"{per_cycle[c]:10d}" for c in checkpoints)
+              + f" {statistics.mean(per_cycle):10.1f} {calls:10d}")
+    baseline = statistics.mean(results["full rewrite"][0])
+    sectioned = statistics.mean(results["sectioned"][0])
+    print(f"  mean input tokens per cycle cut by {1 - sectioned / baseline:.0%}")
+
+
+BENCHMARKS = {
+    "sliding_window": bench_sliding_window,
+    "progressive_async": bench_progressive_async,
+    "unit_pruning": bench_unit_pruning,
+    "resume": bench_resume,
+    "service": bench_service,
+    "strategies": bench_strategies,
+    "summary_cycles": bench_summary_cycles,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run context compression benchmarks")
+    parser.add_argument("names", nargs="*", metavar="NAME",
+                        help=f"Benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("--conversation", metavar="PATH",
+                        help="Recorded conversation JSON to replay in the 'strategies' benchmark")
+    args = parser.parse_args()
+    unknown = [n for n in args.names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    for name in args.names or BENCHMARKS:
+        if name == "strategies" and args.conversation:
+            bench_strategies(conversation_path=args.conversation)
+        else:
+            BENCHMARKS[name]()
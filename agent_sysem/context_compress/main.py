@@ -12,9 +12,23 @@ Reference: https://yennj12.js.org/yennj12_blog_V4/posts/context-compression-summ
 """
 
 import anthropic
+import numpy as np
+import hashlib
+import heapq
+import itertools
 import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Any, Callable, Optional, Union
 from enum import Enum
 from datetime import datetime
 from pathlib import Path
@@ -23,70 +37,800 @@ from pathlib import Path
 client = anthropic.Anthropic()
 
 
+# =============================================================================
+# Shared LLM Result Cache
+# =============================================================================
+
+@dataclass
+class LLMCacheConfig:
+    """Configuration for the content-addressed LLM result cache."""
+    max_entries: int = 1000  # In-memory LRU capacity (0 disables caching)
+    ttl_seconds: Optional[float] = 24 * 3600  # None = never expire
+    sqlite_path: Optional[str] = None  # Optional on-disk tier shared across processes
+
+
+class LLMCache:
+    """
+    Content-addressed cache for LLM completions.
+
+    Keys are a SHA-256 hash of (model, max_tokens, prompt), so identical
+    message spans from replays, retries or forked sessions are only sent to
+    the model once. Entries live in an in-memory LRU with TTL, optionally
+    backed by a SQLite table that survives restarts.
+    """
+
+    def __init__(self, config: Optional[LLMCacheConfig] = None):
+        self.config = config or LLMCacheConfig()
+        self._memory: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0, "expired": 0}
+        self._db: Optional[sqlite3.Connection] = None
+        if self.config.sqlite_path:
+            self._db = sqlite3.connect(self.config.sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model: str, max_tokens: int, prompt: str) -> str:
+        """Hash the request content into a cache key."""
+        payload = json.dumps([model, max_tokens, prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _is_expired(self, created_at: float) -> bool:
+        ttl = self.config.ttl_seconds
+        return ttl is not None and time.time() - created_at > ttl
+
+    def _remember(self, key: str, value: str, created_at: float):
+        """Insert into the memory tier, evicting the least recently used entry."""
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.config.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a cached completion, checking memory then disk."""
+        if self.config.max_entries <= 0:
+            return None
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._is_expired(created_at):
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return value
+                del self._memory[key]
+                self._stats["expired"] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if not self._is_expired(created_at):
+                        self._remember(key, value, created_at)
+                        self._stats["hits"] += 1
+                        self._stats["disk_hits"] += 1
+                        return value
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._stats["expired"] += 1
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, value: str):
+        """Store a completion in all tiers."""
+        if self.config.max_entries <= 0:
+            return
+
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, value, created_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, value, created_at)
+                )
+                self._db.commit()
+
+    def clear(self):
+        """Remove all entries from every tier."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def get_stats(self) -> dict:
+        """Get hit/miss statistics."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._memory),
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0
+            }
+
+
+# Process-wide cache shared by all compressors unless one is passed explicitly
+default_llm_cache = LLMCache()
+
+
+def cached_completion(
+    cache: LLMCache,
+    prompt: str,
+    max_tokens: int,
+    model: str = "claude-haiku-4-5-20251001"
+) -> str:
+    """Return the completion text for a single-turn prompt, using the cache."""
+    key = LLMCache.make_key(model, max_tokens, prompt)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    response = client.messages.create(
+        model=model,
+        max_tokens=max_tokens,
+        messages=[{"role": "user", "content": prompt}]
+    )
+    text = response.content[0].text
+    cache.put(key, text)
+    return text
+
+
+# =============================================================================
+# Persistent Memory Store
+# =============================================================================
+
+class MemoryBackend(ABC):
+    """
+    Storage for conversation memory: an append-only log of turns plus
+    periodic snapshots of derived state (summaries, units, counters).
+    """
+
+    snapshot_interval: int = 50  # Turns between periodic snapshots
+
+    @abstractmethod
+    def append_turn(self, session_id: str, record: dict) -> int:
+        """Append a turn record and return its sequence number."""
+        pass
+
+    @abstractmethod
+    def save_snapshot(self, session_id: str, seq: int, state: dict):
+        """Store the state as of turn seq, replacing older snapshots."""
+        pass
+
+    @abstractmethod
+    def load(self, session_id: str) -> tuple[Optional[tuple[int, dict]], list[tuple[int, dict]]]:
+        """Return the latest (seq, state) snapshot and the (seq, record) turns after it."""
+        pass
+
+
+class SQLiteMemoryBackend(MemoryBackend):
+    """SQLite-backed memory store using WAL mode for cheap appends."""
+
+    def __init__(self, path: str, snapshot_interval: int = 50, compact_on_snapshot: bool = False):
+        self.path = path
+        self.snapshot_interval = snapshot_interval
+        self.compact_on_snapshot = compact_on_snapshot  # Delete turns covered by a snapshot
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS turns (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                record TEXT NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            );
+            CREATE TABLE IF NOT EXISTS snapshots (
+                session_id TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+        """)
+        self._db.commit()
+
+    def append_turn(self, session_id: str, record: dict) -> int:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM turns WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            snapshot = self._db.execute(
+                "SELECT seq FROM snapshots WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            seq = max(row[0], snapshot[0] if snapshot else 0) + 1
+            self._db.execute(
+                "INSERT INTO turns (session_id, seq, record) VALUES (?, ?, ?)",
+                (session_id, seq, json.dumps(record, ensure_ascii=False))
+            )
+            self._db.commit()
+            return seq
+
+    def save_snapshot(self, session_id: str, seq: int, state: dict):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO snapshots (session_id, seq, state, created_at) VALUES (?, ?, ?, ?)",
+                (session_id, seq, json.dumps(state, ensure_ascii=False), time.time())
+            )
+            if self.compact_on_snapshot:
+                self._db.execute("DELETE FROM turns WHERE session_id = ? AND seq <= ?", (session_id, seq))
+            self._db.commit()
+
+    def load(self, session_id: str) -> tuple[Optional[tuple[int, dict]], list[tuple[int, dict]]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT seq, state FROM snapshots WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            snapshot = (row[0], json.loads(row[1])) if row else None
+            after = snapshot[0] if snapshot else 0
+            tail = [
+                (seq, json.loads(record))
+                for seq, record in self._db.execute(
+                    "SELECT seq, record FROM turns WHERE session_id = ? AND seq > ? ORDER BY seq",
+                    (session_id, after)
+                )
+            ]
+            return snapshot, tail
+
+    def read_log(self, session_id: str) -> list[tuple[int, dict]]:
+        """Return every logged (seq, record) for a session, oldest first."""
+        with self._lock:
+            return [
+                (seq, json.loads(record))
+                for seq, record in self._db.execute(
+                    "SELECT seq, record FROM turns WHERE session_id = ? ORDER BY seq", (session_id,)
+                )
+            ]
+
+    def list_sessions(self) -> list[str]:
+        """Return all session ids with logged turns or snapshots."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT session_id FROM turns UNION SELECT session_id FROM snapshots"
+            ).fetchall()
+            return [r[0] for r in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class PersistentMemoryMixin(ABC):
+    """
+    Adds turn logging, snapshotting and resume to a memory manager.
+
+    Subclasses implement _snapshot_state, _restore_state and _replay_record,
+    call _log_turn before processing a turn, and call _mark_dirty whenever an
+    LLM-derived result (summary, units) changes so the next turn snapshots it
+    and a resume never has to regenerate it.
+    """
+
+    def _init_persistence(self, backend: Optional[MemoryBackend], session_id: Optional[str]):
+        self.backend = backend
+        self.memory_session_id = session_id or datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self._log_seq = 0
+        self._last_snapshot_seq = 0
+        self._dirty = False
+        self._replaying = False
+        self.resume_stats: dict = {}
+
+    @abstractmethod
+    def _snapshot_state(self) -> dict:
+        """Return the derived state to store in a snapshot."""
+        pass
+
+    @abstractmethod
+    def _restore_state(self, state: dict):
+        """Restore the derived state from a snapshot."""
+        pass
+
+    @abstractmethod
+    def _replay_record(self, record: dict):
+        """Re-apply a logged turn while resuming."""
+        pass
+
+    def _log_turn(self, record: dict):
+        """Append a turn to the log (skipped while replaying)."""
+        if self.backend is None or self._replaying:
+            return
+        self._log_seq = self.backend.append_turn(self.memory_session_id, record)
+
+    def _mark_dirty(self):
+        self._dirty = True
+
+    def _maybe_snapshot(self):
+        """Snapshot after derived state changed or every snapshot_interval turns."""
+        if self.backend is None or self._replaying:
+            return
+        due = self._log_seq - self._last_snapshot_seq >= self.backend.snapshot_interval
+        if self._dirty or due:
+            self.snapshot()
+
+    def snapshot(self):
+        """Write a snapshot of the current state to the backend."""
+        if self.backend is None:
+            return
+        self.backend.save_snapshot(self.memory_session_id, self._log_seq, {
+            "kind": type(self).__name__,
+            "state": self._snapshot_state()
+        })
+        self._last_snapshot_seq = self._log_seq
+        self._dirty = False
+
+    @classmethod
+    def resume(cls, backend: MemoryBackend, session_id: str, *args, **kwargs):
+        """
+        Rebuild a manager from the latest snapshot plus the logged tail.
+        Extra arguments are passed to the constructor (config, cache, ...).
+        """
+        start = time.perf_counter()
+        manager = cls(*args, backend=backend, session_id=session_id, **kwargs)
+        snapshot, tail = backend.load(session_id)
+
+        if snapshot is not None:
+            seq, payload = snapshot
+            if payload.get("kind") != cls.__name__:
+                raise ValueError(f"Snapshot for {session_id} was written by {payload.get('kind')}, not {cls.__name__}")
+            manager._restore_state(payload["state"])
+            manager._log_seq = manager._last_snapshot_seq = seq
+
+        manager._replaying = True
+        try:
+            for seq, record in tail:
+                manager._replay_record(record)
+                manager._log_seq = seq
+        finally:
+            manager._replaying = False
+
+        manager.resume_stats = {
+            "snapshot_seq": snapshot[0] if snapshot else 0,
+            "replayed_turns": len(tail),
+            "resume_ms": (time.perf_counter() - start) * 1000
+        }
+        return manager
+
+
+# =============================================================================
+# Vector Retrieval
+# =============================================================================
+
+class HashingEmbedder:
+    """
+    Local embedding via feature hashing of words and bigrams.
+    Needs no model download or network call; swap in a real embedder by
+    passing any object with the same embed() signature to VectorIndex.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Return an L2-normalized (len(texts), dim) float32 matrix."""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = re.findall(r"[\w']+", text.lower())
+            for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                h = zlib.crc32(token.encode("utf-8"))
+                vectors[row, h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+class VectorIndex:
+    """
+    In-process cosine-similarity index over a NumPy matrix.
+    Rows are appended incrementally into a capacity-doubling buffer.
+    """
+
+    def __init__(self, embedder: Optional[HashingEmbedder] = None, initial_capacity: int = 64):
+        self.embedder = embedder or HashingEmbedder()
+        self.items: list[Any] = []
+        self._matrix = np.zeros((initial_capacity, self.embedder.dim), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes allocated for the embedding matrix."""
+        return self._matrix.nbytes
+
+    def add(self, item: Any, text: str):
+        """Embed text and append it as a new row."""
+        if len(self.items) == self._matrix.shape[0]:
+            grown = np.zeros((max(1, self._matrix.shape[0]) * 2, self._matrix.shape[1]), dtype=np.float32)
+            grown[:len(self.items)] = self._matrix[:len(self.items)]
+            self._matrix = grown
+        self._matrix[len(self.items)] = self.embedder.embed([text])[0]
+        self.items.append(item)
+
+    def retain(self, keep: Callable[[Any], bool]):
+        """Drop rows whose item fails the predicate, compacting the matrix."""
+        mask = np.fromiter((keep(item) for item in self.items), dtype=bool, count=len(self.items))
+        if mask.all():
+            return
+        kept = self._matrix[:len(self.items)][mask]
+        self._matrix[:len(kept)] = kept
+        self.items = [item for item, k in zip(self.items, mask) if k]
+
+    def clear(self):
+        self.items = []
+
+    def search(self, query: str, k: int) -> list[tuple[Any, float]]:
+        """Return up to k (item, similarity) pairs, most similar first."""
+        n = len(self.items)
+        if n == 0 or k <= 0:
+            return []
+        scores = self._matrix[:n] @ self.embedder.embed([query])[0]
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.items[i], float(scores[i])) for i in top]
+
+    def select(
+        self,
+        query: str,
+        top_k: int,
+        token_budget: int,
+        is_pinned: Callable[[Any], bool],
+        token_count: Callable[[Any], int]
+    ) -> list[Any]:
+        """
+        Pick pinned items plus the top_k most relevant others that fit in the
+        token budget. Pinned items are always included and count toward the budget.
+        Returned items keep their insertion order.
+        """
+        selected = {id(item) for item in self.items if is_pinned(item)}
+        used = sum(token_count(item) for item in self.items if id(item) in selected)
+
+        chosen = 0
+        # Over-fetch so budget skips can still fill top_k
+        for item, _ in self.search(query, top_k * 4):
+            if chosen >= top_k:
+                break
+            if id(item) in selected:
+                continue
+            tokens = token_count(item)
+            if used + tokens > token_budget:
+                continue
+            selected.add(id(item))
+            used += tokens
+            chosen += 1
+
+        return [item for item in self.items if id(item) in selected]
+
+
+# =============================================================================
+# Sectioned Summaries
+# =============================================================================
+
+# Message type -> section title, in render order. Assistant and unclassified
+# messages go to "context"; chitchat is dropped.
+SUMMARY_SECTIONS = {
+    "fact": "Facts",
+    "instruction": "Instructions & Decisions",
+    "question": "Open Questions",
+    "feedback": "Feedback",
+    "context": "Discussion",
+}
+
+
+@dataclass
+class SummarySection:
+    """One summary section: a coarse rollup plus recent fine-grained notes."""
+    rollup: str = ""  # LLM-condensed older notes
+    notes: list[str] = field(default_factory=list)  # Locally merged recent notes
+    note_tokens: int = 0
+
+
+class SectionedSummary:
+    """
+    Structured running summary that is updated incrementally.
+
+    New messages are routed to sections and merged locally as short notes.
+    Only a section whose notes exceed the token budget is sent to the LLM,
+    which folds its oldest notes into that section's rollup tier; the other
+    sections are untouched. Per-cycle prompt size is therefore bounded by one
+    section rather than growing with the whole summary.
+
+    update() is copy-on-write, so it can run in a background thread against
+    the current value while readers keep using it.
+    """
+
+    def __init__(self, note_token_budget: int = 200, rollup_max_tokens: int = 150,
+                 max_note_chars: int = 240, tokenizer: Optional["Tokenizer"] = None):
+        self.note_token_budget = note_token_budget
+        self.rollup_max_tokens = rollup_max_tokens
+        self.max_note_chars = max_note_chars
+        self.tokenizer = tokenizer or CharRatioTokenizer()
+        self.sections: dict[str, SummarySection] = {}
+        self.stats = {"local_merges": 0, "rollups": 0, "rollup_input_tokens": 0}
+
+    def __bool__(self) -> bool:
+        return any(s.rollup or s.notes for s in self.sections.values())
+
+    def copy(self) -> "SectionedSummary":
+        clone = SectionedSummary(self.note_token_budget, self.rollup_max_tokens,
+                                 self.max_note_chars, self.tokenizer)
+        clone.sections = {
+            key: SummarySection(s.rollup, list(s.notes), s.note_tokens)
+            for key, s in self.sections.items()
+        }
+        clone.stats = dict(self.stats)
+        return clone
+
+    def _route(self, message: dict) -> Optional[str]:
+        """Pick the section for a message, using its stored label or the heuristic rules."""
+        if message["role"] == "assistant":
+            return "context"
+        msg_type = message.get("_type")
+        if msg_type is None:
+            result = HeuristicMessageClassifier().classify(message["content"])
+            msg_type = result[0].value if result else "context"
+        if msg_type == MessageType.CHITCHAT.value:
+            return None
+        return msg_type if msg_type in SUMMARY_SECTIONS else "context"
+
+    def _to_note(self, content: str) -> str:
+        note = " ".join(content.split())
+        if len(note) > self.max_note_chars:
+            note = note[:self.max_note_chars].rsplit(" ", 1)[0] + "..."
+        return note
+
+    def update(self, messages: list[dict], complete: Callable[[str, int], str]) -> "SectionedSummary":
+        """Return a new summary with messages merged in. complete(prompt, max_tokens) is the LLM."""
+        updated = self.copy()
+        touched = []
+        for message in messages:
+            key = self._route(message)
+            if key is None:
+                continue
+            note = self._to_note(message["content"])
+            section = updated.sections.setdefault(key, SummarySection())
+            if note in section.notes:
+                continue
+            section.notes.append(note)
+            section.note_tokens += self.tokenizer.count(note)
+            updated.stats["local_merges"] += 1
+            if key not in touched:
+                touched.append(key)
+
+        for key in touched:
+            if updated.sections[key].note_tokens > self.note_token_budget:
+                updated._roll_up(key, complete)
+        return updated
+
+    def _roll_up(self, key: str, complete: Callable[[str, int], str]):
+        """Fold the oldest notes of one section into its rollup, keeping about half the budget as notes."""
+        section = self.sections[key]
+        keep, kept_tokens = len(section.notes), 0
+        while keep > 0:
+            tokens = self.tokenizer.count(section.notes[keep - 1])
+            if kept_tokens + tokens > self.note_token_budget // 2:
+                break
+            kept_tokens += tokens
+            keep -= 1
+        old_notes, section.notes = section.notes[:keep], section.notes[keep:]
+        section.note_tokens = kept_tokens
+
+        notes_text = "\n".join(f"- {note}" for note in old_notes)
+        prompt = f"""Condense these notes into the "{SUMMARY_SECTIONS[key]}" section of a conversation summary.
+
+Current section summary:
+{section.rollup or "None."}
+
+New notes to fold in:
+{notes_text}
+
+Write the updated section summary. Keep every name, number and identifier; stay under {self.rollup_max_tokens} tokens:"""
+
+        section.rollup = complete(prompt, self.rollup_max_tokens).strip()
+        self.stats["rollups"] += 1
+        self.stats["rollup_input_tokens"] += self.tokenizer.count(prompt)
+
+    def render(self) -> str:
+        """Render sections as markdown in a fixed order."""
+        parts = []
+        for key, title in SUMMARY_SECTIONS.items():
+            section = self.sections.get(key)
+            if section is None or not (section.rollup or section.notes):
+                continue
+            lines = [f"## {title}"]
+            if section.rollup:
+                lines.append(section.rollup)
+            lines.extend(f"- {note}" for note in section.notes)
+            parts.append("\n".join(lines))
+        return "\n\n".join(parts)
+
+    def to_dict(self) -> dict:
+        return {
+            "sections": {key: [s.rollup, s.notes, s.note_tokens] for key, s in self.sections.items()},
+            "stats": self.stats
+        }
+
+    def restore(self, data: dict):
+        """Load sections and stats saved by to_dict(), keeping this instance's settings."""
+        self.sections = {
+            key: SummarySection(rollup, list(notes), note_tokens)
+            for key, (rollup, notes, note_tokens) in data["sections"].items()
+        }
+        self.stats = dict(data["stats"])
+
+
 # =============================================================================
 # Strategy 1: Sliding Window Manager
 # =============================================================================
 
+class Tokenizer(ABC):
+    """Interface for counting tokens in a piece of text."""
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """Return the number of tokens in text."""
+        pass
+
+
+class CharRatioTokenizer(Tokenizer):
+    """Cheap estimate based on a fixed tokens-per-character ratio."""
+
+    def __init__(self, tokens_per_char: float = 0.4):
+        self.tokens_per_char = tokens_per_char
+
+    def count(self, text: str) -> int:
+        return int(len(text) * self.tokens_per_char)
+
+
+class CachedTokenCounter(Tokenizer):
+    """
+    Exact token counter backed by the Anthropic count_tokens endpoint.
+    Results are memoized in an LRU cache so repeated content is counted once.
+    """
+
+    def __init__(
+        self,
+        model: str = "claude-haiku-4-5-20251001",
+        max_entries: int = 10_000,
+        count_fn: Optional[Callable[[str], int]] = None
+    ):
+        self.model = model
+        self.max_entries = max_entries
+        self._count_fn = count_fn or self._count_with_api
+        self._cache: OrderedDict[str, int] = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def _count_with_api(self, text: str) -> int:
+        """Count tokens for a single user message via the API."""
+        response = client.messages.count_tokens(
+            model=self.model,
+            messages=[{"role": "user", "content": text}]
+        )
+        return response.input_tokens
+
+    def count(self, text: str) -> int:
+        if text in self._cache:
+            self._cache.move_to_end(text)
+            self._stats["hits"] += 1
+            return self._cache[text]
+
+        self._stats["misses"] += 1
+        tokens = self._count_fn(text)
+        self._cache[text] = tokens
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return tokens
+
+    def get_stats(self) -> dict:
+        """Get cache statistics."""
+        return {**self._stats, "cached_entries": len(self._cache)}
+
+
 @dataclass
 class SlidingWindowConfig:
     """Configuration for sliding window context management."""
     max_turns: int = 10  # Maximum conversation turns to keep
     max_tokens: int = 8000  # Maximum estimated tokens
     tokens_per_char: float = 0.4  # Rough estimation ratio
+    tokenizer: Optional[Tokenizer] = None  # Defaults to CharRatioTokenizer(tokens_per_char)
 
 
-class SlidingWindowManager:
+class SlidingWindowManager(PersistentMemoryMixin):
     """
     Simple sliding window that keeps only the most recent N turns.
     Oldest messages are dropped when limits are exceeded.
+
+    Token counts are computed once per message and kept as a running total,
+    so adding a message and trimming are O(1) amortized regardless of
+    history size.
     """
 
-    def __init__(self, config: Optional[SlidingWindowConfig] = None):
+    def __init__(
+        self,
+        config: Optional[SlidingWindowConfig] = None,
+        backend: Optional[MemoryBackend] = None,
+        session_id: Optional[str] = None
+    ):
         self.config = config or SlidingWindowConfig()
-        self.messages: list[dict] = []
+        self.tokenizer = self.config.tokenizer or CharRatioTokenizer(self.config.tokens_per_char)
+        self.messages: deque[dict] = deque()
+        self._message_tokens: deque[int] = deque()  # Token count per message, parallel to messages
+        self._token_total: int = 0
         self._stats = {"total_messages": 0, "dropped_messages": 0}
+        self._init_persistence(backend, session_id)
 
     def _estimate_tokens(self, text: str) -> int:
-        """Estimate token count from text length."""
-        return int(len(text) * self.config.tokens_per_char)
+        """Estimate token count from text."""
+        return self.tokenizer.count(text)
 
     def _total_tokens(self) -> int:
-        """Calculate total estimated tokens in current context."""
-        return sum(
-            self._estimate_tokens(m["content"])
-            for m in self.messages
-        )
+        """Get total estimated tokens in current context."""
+        return self._token_total
 
     def add_message(self, role: str, content: str):
         """Add a message and trim if needed."""
+        self._log_turn({"role": role, "content": content})
+        tokens = self._estimate_tokens(content)
         self.messages.append({"role": role, "content": content})
+        self._message_tokens.append(tokens)
+        self._token_total += tokens
         self._stats["total_messages"] += 1
         self._trim_if_needed()
+        self._maybe_snapshot()
+
+    def _drop_oldest(self):
+        """Drop the oldest message and its token count."""
+        self.messages.popleft()
+        self._token_total -= self._message_tokens.popleft()
+        self._stats["dropped_messages"] += 1
 
     def _trim_if_needed(self):
         """Remove oldest messages if limits exceeded."""
         # Trim by turn count (each turn = 2 messages: user + assistant)
         while len(self.messages) > self.config.max_turns * 2:
-            self.messages.pop(0)
-            self._stats["dropped_messages"] += 1
+            self._drop_oldest()
 
         # Trim by token count
-        while self._total_tokens() > self.config.max_tokens and len(self.messages) > 2:
-            self.messages.pop(0)
-            self._stats["dropped_messages"] += 1
+        while self._token_total > self.config.max_tokens and len(self.messages) > 2:
+            self._drop_oldest()
 
     def get_messages(self) -> list[dict]:
         """Get current message context."""
-        return self.messages.copy()
+        return list(self.messages)
 
     def get_stats(self) -> dict:
         """Get usage statistics."""
         return {
             **self._stats,
             "current_messages": len(self.messages),
-            "estimated_tokens": self._total_tokens()
+            "estimated_tokens": self._token_total
         }
 
+    def _snapshot_state(self) -> dict:
+        return {
+            "messages": list(self.messages),
+            "message_tokens": list(self._message_tokens),
+            "stats": self._stats
+        }
+
+    def _restore_state(self, state: dict):
+        self.messages = deque(state["messages"])
+        self._message_tokens = deque(state["message_tokens"])
+        self._token_total = sum(self._message_tokens)
+        self._stats = dict(state["stats"])
+
+    def _replay_record(self, record: dict):
+        self.add_message(record["role"], record["content"])
+
 
 # =============================================================================
 # Strategy 2: Progressive Summarization
@@ -98,6 +842,9 @@ class ProgressiveSummaryConfig:
     summarize_threshold: int = 5  # Turns before summarization
     recent_turns_to_keep: int = 3  # Recent turns kept complete
     max_summary_tokens: int = 500  # Max tokens for summary
+    async_summarization: bool = False  # Summarize in a background thread instead of inside add_turn
+    sectioned_summary: bool = False  # Merge into per-section notes; LLM only rolls up overflowing sections
+    section_token_budget: int = 200  # Note tokens per section before it is rolled up
 
 
 @dataclass
@@ -108,15 +855,43 @@ class ConversationState:
     total_turns: int = 0
 
 
-class ProgressiveSummarizer:
+class ProgressiveSummarizer(PersistentMemoryMixin):
     """
     Compresses older conversations into summaries while keeping
     recent messages complete for context continuity.
+
+    With async_summarization enabled, summaries are generated in a background
+    executor against a snapshot of the messages. Until a job completes, the
+    summarized messages stay in recent_messages, so get_context always returns
+    the last completed summary plus everything not yet folded into it.
+    Triggers that fire while a job is in flight are coalesced into one follow-up job.
+
+    With sectioned_summary enabled, the summary is a SectionedSummary: older
+    messages are merged locally and the LLM only condenses sections that overflow.
     """
 
-    def __init__(self, config: Optional[ProgressiveSummaryConfig] = None):
+    def __init__(
+        self,
+        config: Optional[ProgressiveSummaryConfig] = None,
+        executor: Optional[Executor] = None,
+        cache: Optional[LLMCache] = None,
+        backend: Optional[MemoryBackend] = None,
+        session_id: Optional[str] = None
+    ):
         self.config = config or ProgressiveSummaryConfig()
         self.state = ConversationState()
+        self.cache = cache if cache is not None else default_llm_cache
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._lock = threading.RLock()
+        self._in_flight: Optional[Future] = None
+        self._stats = {"summaries": 0, "coalesced_triggers": 0, "failed_summaries": 0}
+        self.last_error: Optional[BaseException] = None
+        self._sections = SectionedSummary(
+            note_token_budget=self.config.section_token_budget,
+            rollup_max_tokens=self.config.max_summary_tokens // 2
+        )
+        self._init_persistence(backend, session_id)
 
     def _format_messages_for_summary(self, messages: list[dict]) -> str:
         """Format messages into text for summarization."""
@@ -155,27 +930,49 @@ Conversation:
 
 Summary:"""
 
-    def _generate_summary(self, messages: list[dict]) -> str:
-        """Use LLM to generate summary of messages."""
+    def _generate_summary(
+        self,
+        messages: list[dict],
+        existing_summary: Optional[str] = None
+    ) -> Union[str, SectionedSummary]:
+        """Use LLM to generate summary of messages (or an updated SectionedSummary)."""
+        if self.config.sectioned_summary:
+            # Only one summary job runs at a time, so the current sections are a stable base
+            return self._sections.update(
+                messages,
+                lambda prompt, max_tokens: cached_completion(self.cache, prompt, max_tokens=max_tokens)
+            )
+        if existing_summary is None:
+            existing_summary = self.state.summary
         messages_text = self._format_messages_for_summary(messages)
-        prompt = self._create_summary_prompt(messages_text, self.state.summary)
+        prompt = self._create_summary_prompt(messages_text, existing_summary)
 
-        response = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=self.config.max_summary_tokens,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text
+        return cached_completion(self.cache, prompt, max_tokens=self.config.max_summary_tokens)
+
+    def _apply_summary(self, result: Union[str, SectionedSummary]):
+        """Install a generated summary. Caller holds the lock."""
+        if isinstance(result, SectionedSummary):
+            self._sections = result
+            result = result.render()
+        self.state.summary = result
 
     def add_turn(self, user_message: str, assistant_message: str):
         """Add a conversation turn and check if summarization needed."""
-        self.state.recent_messages.append({"role": "user", "content": user_message})
-        self.state.recent_messages.append({"role": "assistant", "content": assistant_message})
-        self.state.total_turns += 1
+        self._log_turn({"user": user_message, "assistant": assistant_message})
+        with self._lock:
+            self.state.recent_messages.append({"role": "user", "content": user_message})
+            self.state.recent_messages.append({"role": "assistant", "content": assistant_message})
+            self.state.total_turns += 1
         self._check_and_summarize()
+        with self._lock:
+            self._maybe_snapshot()
 
     def _check_and_summarize(self):
         """Check if summarization threshold reached and summarize if needed."""
+        if self.config.async_summarization:
+            self._schedule_summary()
+            return
+
         recent_turn_count = len(self.state.recent_messages) // 2
 
         if recent_turn_count > self.config.summarize_threshold:
@@ -184,38 +981,150 @@ Summary:"""
             messages_to_summarize = self.state.recent_messages[:-keep_count]
 
             # Generate new summary
-            self.state.summary = self._generate_summary(messages_to_summarize)
+            self._apply_summary(self._generate_summary(messages_to_summarize))
+            self._stats["summaries"] += 1
+            self._mark_dirty()
 
             # Keep only recent messages
             self.state.recent_messages = self.state.recent_messages[-keep_count:]
 
+    def _schedule_summary(self):
+        """Submit a background summary job for a snapshot of the older messages."""
+        with self._lock:
+            if len(self.state.recent_messages) // 2 <= self.config.summarize_threshold:
+                return
+            if self._in_flight is not None:
+                # The completion callback re-checks the threshold, so this trigger is coalesced
+                self._stats["coalesced_triggers"] += 1
+                return
+
+            keep_count = self.config.recent_turns_to_keep * 2
+            snapshot = list(self.state.recent_messages[:-keep_count])
+            existing_summary = self.state.summary
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarizer")
+            self._in_flight = self._executor.submit(self._generate_summary, snapshot, existing_summary)
+            self._in_flight.add_done_callback(
+                lambda future: self._on_summary_done(future, len(snapshot))
+            )
+
+    def _on_summary_done(self, future: Future, summarized_count: int):
+        """Fold a completed summary into the state and re-trigger if needed."""
+        with self._lock:
+            self._in_flight = None
+            error = future.exception()
+            if error is not None:
+                # Keep the messages; they will be retried on the next trigger
+                self.last_error = error
+                self._stats["failed_summaries"] += 1
+                return
+
+            self._apply_summary(future.result())
+            # New turns are only ever appended, so the snapshot is still the prefix
+            del self.state.recent_messages[:summarized_count]
+            self._stats["summaries"] += 1
+            self._mark_dirty()  # Persisted with the next turn's snapshot
+
+        self._schedule_summary()
+
+    def wait_for_summary(self, timeout: Optional[float] = None) -> bool:
+        """Block until no background summary is in flight. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                future = self._in_flight
+            if future is None:
+                return True
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            try:
+                future.result(timeout=remaining)
+            except FuturesTimeoutError:
+                return False
+            except Exception:
+                pass  # Recorded in last_error by the callback
+
+    def close(self):
+        """Wait for pending work and release the background executor if owned."""
+        self.wait_for_summary()
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
     def get_context(self) -> str:
         """Get the current context (summary + recent)."""
+        with self._lock:
+            summary = self.state.summary
+            recent_messages = list(self.state.recent_messages)
+
         parts = []
-        if self.state.summary:
-            parts.append(f"[Previous conversation summary]\n{self.state.summary}")
-        if self.state.recent_messages:
+        if summary:
+            parts.append(f"[Previous conversation summary]\n{summary}")
+        if recent_messages:
             parts.append("[Recent conversation]\n" +
-                        self._format_messages_for_summary(self.state.recent_messages))
+                        self._format_messages_for_summary(recent_messages))
         return "\n\n".join(parts)
 
     def get_messages(self) -> list[dict]:
         """Get messages formatted for API call."""
+        with self._lock:
+            summary = self.state.summary
+            recent_messages = list(self.state.recent_messages)
+
         messages = []
 
-        if self.state.summary:
+        if summary:
             messages.append({
                 "role": "user",
-                "content": f"[Context from previous conversation]\n{self.state.summary}\n\nPlease continue based on this context."
+                "content": f"[Context from previous conversation]\n{summary}\n\nPlease continue based on this context."
             })
             messages.append({
                 "role": "assistant",
                 "content": "I understand the context. Please continue with your question."
             })
 
-        messages.extend(self.state.recent_messages)
+        messages.extend(recent_messages)
         return messages
 
+    def get_stats(self) -> dict:
+        """Get summarization statistics."""
+        with self._lock:
+            return {
+                **self._stats,
+                "total_turns": self.state.total_turns,
+                "recent_messages": len(self.state.recent_messages),
+                "summary_in_flight": self._in_flight is not None,
+                "has_summary": bool(self.state.summary),
+                "sections": self._sections.stats if self.config.sectioned_summary else None,
+                "cache": self.cache.get_stats()
+            }
+
+    def _snapshot_state(self) -> dict:
+        with self._lock:
+            return {
+                "summary": self.state.summary,
+                "recent_messages": list(self.state.recent_messages),
+                "total_turns": self.state.total_turns,
+                "sections": self._sections.to_dict(),
+                "stats": dict(self._stats)
+            }
+
+    def _restore_state(self, state: dict):
+        with self._lock:
+            self.state = ConversationState(
+                summary=state["summary"],
+                recent_messages=list(state["recent_messages"]),
+                total_turns=state["total_turns"]
+            )
+            self._stats = dict(state["stats"])
+            if "sections" in state:
+                self._sections.restore(state["sections"])
+
+    def _replay_record(self, record: dict):
+        self.add_turn(record["user"], record["assistant"])
+
 
 # =============================================================================
 # Strategy 3: Hierarchical Memory
@@ -265,7 +1174,7 @@ class SessionState:
     total_turns: int = 0
 
 
-class HierarchicalMemoryManager:
+class HierarchicalMemoryManager(PersistentMemoryMixin):
     """
     Multi-layer memory structure:
     - Layer 1: Recent messages (complete)
@@ -274,13 +1183,21 @@ class HierarchicalMemoryManager:
     - Layer 4: User profile
     """
 
-    def __init__(self, config: Optional[HierarchicalSummaryConfig] = None):
+    def __init__(
+        self,
+        config: Optional[HierarchicalSummaryConfig] = None,
+        cache: Optional[LLMCache] = None,
+        backend: Optional[MemoryBackend] = None,
+        session_id: Optional[str] = None
+    ):
         self.config = config or HierarchicalSummaryConfig()
+        self.cache = cache if cache is not None else default_llm_cache
         self.user_profile = self._load_user_profile()
         self.session = SessionState(
-            session_id=datetime.now().strftime("%Y%m%d_%H%M%S"),
+            session_id=session_id or datetime.now().strftime("%Y%m%d_%H%M%S_%f"),
             started_at=datetime.now().isoformat()
         )
+        self._init_persistence(backend, self.session.session_id)
 
     def _load_user_profile(self) -> UserProfile:
         """Load user profile from file or create new."""
@@ -318,15 +1235,10 @@ Conversation:
 
 Return only new/updated information as JSON (empty object if nothing new):"""
 
-        response = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=500,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        text = cached_completion(self.cache, prompt, max_tokens=500)
 
         try:
             # Parse response and merge with existing profile
-            text = response.content[0].text
             # Try to extract JSON from the response
             if "{" in text:
                 json_str = text[text.find("{"):text.rfind("}") + 1]
@@ -375,15 +1287,11 @@ New messages:
 
 Updated summary:"""
 
-        response = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=self.config.max_session_summary_tokens,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text
+        return cached_completion(self.cache, prompt, max_tokens=self.config.max_session_summary_tokens)
 
     def add_turn(self, user_message: str, assistant_message: str):
         """Add a conversation turn."""
+        self._log_turn({"user": user_message, "assistant": assistant_message})
         self.session.recent_messages.append({"role": "user", "content": user_message})
         self.session.recent_messages.append({"role": "assistant", "content": assistant_message})
         self.session.total_turns += 1
@@ -394,6 +1302,9 @@ Updated summary:"""
             self.session.summary = self._generate_session_summary(self.session.recent_messages)
             # Keep only last 3 turns (6 messages)
             self.session.recent_messages = self.session.recent_messages[-6:]
+            self._mark_dirty()
+
+        self._maybe_snapshot()
 
     def get_context(self) -> str:
         """Get full hierarchical context."""
@@ -440,6 +1351,36 @@ Updated summary:"""
         messages.extend(self.session.recent_messages)
         return messages
 
+    def get_stats(self) -> dict:
+        """Get memory statistics."""
+        return {
+            "session_id": self.session.session_id,
+            "total_turns": self.session.total_turns,
+            "recent_messages": len(self.session.recent_messages),
+            "has_session_summary": bool(self.session.summary),
+            "profile_facts": len(self.user_profile.facts),
+            "cache": self.cache.get_stats()
+        }
+
+    def _snapshot_state(self) -> dict:
+        return {
+            "session": {
+                "session_id": self.session.session_id,
+                "started_at": self.session.started_at,
+                "summary": self.session.summary,
+                "recent_messages": self.session.recent_messages,
+                "total_turns": self.session.total_turns
+            },
+            "user_profile": self.user_profile.to_dict()
+        }
+
+    def _restore_state(self, state: dict):
+        self.session = SessionState(**state["session"])
+        self.user_profile = UserProfile.from_dict(state["user_profile"])
+
+    def _replay_record(self, record: dict):
+        self.add_turn(record["user"], record["assistant"])
+
 
 # =============================================================================
 # Strategy 4: Semantic Compression
@@ -453,7 +1394,63 @@ class ImportanceLevel(Enum):
     LOW = "low"
 
 
-@dataclass
+IMPORTANCE_RANK = {
+    ImportanceLevel.CRITICAL: 4,
+    ImportanceLevel.HIGH: 3,
+    ImportanceLevel.MEDIUM: 2,
+    ImportanceLevel.LOW: 1
+}
+
+
+class BoundedUnitStore:
+    """
+    Bounded min-heap keyed on (importance, recency).
+
+    Insert is O(log n); once over capacity the least important, oldest unit
+    is evicted in O(log n) instead of re-sorting the whole collection.
+    """
+
+    __slots__ = ("capacity", "_heap", "_seq", "_ordered")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._heap: list[tuple[float, int, int, Any]] = []
+        self._seq = itertools.count()  # Tie-breaker so items are never compared
+        self._ordered: Optional[list] = None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, item: Any, importance: float, recency: int) -> Optional[Any]:
+        """Insert an item; return the evicted item if capacity was exceeded."""
+        self._ordered = None
+        entry = (importance, recency, next(self._seq), item)
+        if len(self._heap) < self.capacity:
+            heapq.heappush(self._heap, entry)
+            return None
+        # Push then pop the minimum; returns the new item itself if it ranks lowest
+        return heapq.heappushpop(self._heap, entry)[3]
+
+    def items(self) -> list:
+        """Items in heap order (O(n), unsorted)."""
+        return [entry[3] for entry in self._heap]
+
+    def entries(self) -> list[tuple[Any, float, int]]:
+        """(item, importance, recency) triples in heap order, for persistence."""
+        return [(entry[3], entry[0], entry[1]) for entry in self._heap]
+
+    def ordered(self) -> list:
+        """Items by descending (importance, recency), cached until the next push."""
+        if self._ordered is None:
+            self._ordered = [entry[3] for entry in sorted(self._heap, reverse=True)]
+        return self._ordered
+
+    def clear(self):
+        self._heap.clear()
+        self._ordered = None
+
+
+@dataclass(slots=True)
 class SemanticUnit:
     """A semantic unit extracted from conversation."""
     content: str
@@ -462,6 +1459,12 @@ class SemanticUnit:
     turn_created: int
     related_entities: list[str] = field(default_factory=list)
 
+    def __post_init__(self):
+        # Types and entities repeat heavily across units; share one string object each
+        if isinstance(self.unit_type, str):
+            self.unit_type = sys.intern(self.unit_type)
+        self.related_entities = [sys.intern(e) if isinstance(e, str) else e for e in self.related_entities]
+
     def to_dict(self) -> dict:
         return {
             "content": self.content,
@@ -474,11 +1477,11 @@ class SemanticUnit:
     @classmethod
     def from_dict(cls, data: dict, turn: int) -> "SemanticUnit":
         return cls(
-            content=data.get("content", ""),
-            unit_type=data.get("type", "context"),
-            importance=ImportanceLevel(data.get("importance", "medium")),
+            content=data.get("content") or "",
+            unit_type=data.get("type") or "context",
+            importance=ImportanceLevel(data.get("importance") or "medium"),
             turn_created=turn,
-            related_entities=data.get("entities", [])
+            related_entities=data.get("entities") or []
         )
 
 
@@ -488,19 +1491,32 @@ class SemanticConfig:
     max_units: int = 20
     extraction_interval: int = 3  # Extract every N turns
     recent_turns_to_keep: int = 2
+    query_aware_retrieval: bool = False  # Select relevant units per query instead of all
+    retrieval_top_k: int = 8  # Non-pinned units selected per query
+    retrieval_token_budget: int = 800  # Estimated tokens for selected units (incl. pinned)
 
 
-class SemanticCompressor:
+class SemanticCompressor(PersistentMemoryMixin):
     """
     Extracts meaning units (facts, decisions, questions) from conversation
     rather than keeping full text.
     """
 
-    def __init__(self, config: Optional[SemanticConfig] = None):
+    def __init__(
+        self,
+        config: Optional[SemanticConfig] = None,
+        cache: Optional[LLMCache] = None,
+        backend: Optional[MemoryBackend] = None,
+        session_id: Optional[str] = None
+    ):
         self.config = config or SemanticConfig()
-        self.semantic_units: list[SemanticUnit] = []
+        self.cache = cache if cache is not None else default_llm_cache
+        self._unit_store = BoundedUnitStore(self.config.max_units)
         self.recent_messages: list[dict] = []
         self.turn_count: int = 0
+        self.index = VectorIndex()
+        self._tokenizer = CharRatioTokenizer()
+        self._init_persistence(backend, session_id)
 
     def _extract_semantic_units(self, messages: list[dict]) -> list[SemanticUnit]:
         """Extract semantic units from messages using LLM."""
@@ -524,46 +1540,40 @@ Conversation:
 
 Return only the JSON array:"""
 
-        response = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=1000,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        text = cached_completion(self.cache, prompt, max_tokens=1000)
 
         units = []
         try:
-            text = response.content[0].text
             if "[" in text:
                 json_str = text[text.find("["):text.rfind("]") + 1]
                 data = json.loads(json_str)
                 for item in data:
-                    units.append(SemanticUnit.from_dict(item, self.turn_count))
-        except (json.JSONDecodeError, KeyError):
+                    try:
+                        units.append(SemanticUnit.from_dict(item, self.turn_count))
+                    except (AttributeError, KeyError, TypeError, ValueError):
+                        continue  # Drop the malformed unit, keep the rest
+        except (json.JSONDecodeError, TypeError):
             pass
 
         return units
 
-    def _prune_units(self):
-        """Remove low-importance units if exceeding max."""
-        if len(self.semantic_units) <= self.config.max_units:
-            return
+    @property
+    def semantic_units(self) -> list[SemanticUnit]:
+        """Stored units by descending importance and recency."""
+        return self._unit_store.ordered()
 
-        # Sort by importance and recency
-        importance_order = {
-            ImportanceLevel.CRITICAL: 4,
-            ImportanceLevel.HIGH: 3,
-            ImportanceLevel.MEDIUM: 2,
-            ImportanceLevel.LOW: 1
-        }
-
-        self.semantic_units.sort(
-            key=lambda u: (importance_order[u.importance], u.turn_created),
-            reverse=True
-        )
-        self.semantic_units = self.semantic_units[:self.config.max_units]
+    def _add_units(self, units: list[SemanticUnit]) -> list[SemanticUnit]:
+        """Insert units into the bounded store; return any evicted units."""
+        evicted = []
+        for unit in units:
+            dropped = self._unit_store.push(unit, IMPORTANCE_RANK[unit.importance], unit.turn_created)
+            if dropped is not None:
+                evicted.append(dropped)
+        return evicted
 
     def add_turn(self, user_message: str, assistant_message: str):
         """Add a conversation turn."""
+        self._log_turn({"user": user_message, "assistant": assistant_message})
         self.recent_messages.append({"role": "user", "content": user_message})
         self.recent_messages.append({"role": "assistant", "content": assistant_message})
         self.turn_count += 1
@@ -575,20 +1585,45 @@ Return only the JSON array:"""
 
             if messages_to_process:
                 new_units = self._extract_semantic_units(messages_to_process)
-                self.semantic_units.extend(new_units)
-                self._prune_units()
+                for unit in new_units:
+                    self.index.add(unit, unit.content)
+                evicted = self._add_units(new_units)
+                if evicted:
+                    evicted_ids = {id(u) for u in evicted}
+                    self.index.retain(lambda u: id(u) not in evicted_ids)
 
                 # Keep only recent messages
                 self.recent_messages = self.recent_messages[-keep_count:]
+                self._mark_dirty()
+
+        self._maybe_snapshot()
+
+    def _select_units(self, query: Optional[str]) -> list[SemanticUnit]:
+        """Return all units, or the relevant subset for query in query-aware mode."""
+        if not self.config.query_aware_retrieval:
+            return self.semantic_units
+        if query is None:
+            # Default to the latest user message
+            query = next((m["content"] for m in reversed(self.recent_messages) if m["role"] == "user"), "")
+        if not query:
+            return self.semantic_units
+        return self.index.select(
+            query,
+            top_k=self.config.retrieval_top_k,
+            token_budget=self.config.retrieval_token_budget,
+            is_pinned=lambda u: u.importance == ImportanceLevel.CRITICAL,
+            token_count=lambda u: self._tokenizer.count(u.content)
+        )
 
-    def get_context(self) -> str:
-        """Get semantic context."""
-        if not self.semantic_units:
+    def get_context(self, query: Optional[str] = None) -> str:
+        """Get semantic context, optionally restricted to units relevant to query."""
+        units = self._select_units(query)
+        if not units:
             return ""
 
         # Group by type
         grouped = {}
-        for unit in self.semantic_units:
+        for unit in units:
             if unit.unit_type not in grouped:
                 grouped[unit.unit_type] = []
             grouped[unit.unit_type].append(unit)
@@ -602,11 +1637,11 @@ Return only the JSON array:"""
 
         return "\n".join(parts)
 
-    def get_messages(self) -> list[dict]:
+    def get_messages(self, query: Optional[str] = None) -> list[dict]:
         """Get messages for API call."""
         messages = []
 
-        context = self.get_context()
+        context = self.get_context(query)
         if context:
             messages.append({
                 "role": "user",
@@ -620,6 +1655,35 @@ Return only the JSON array:"""
         messages.extend(self.recent_messages)
         return messages
 
+    def get_stats(self) -> dict:
+        """Get compression statistics."""
+        return {
+            "turn_count": self.turn_count,
+            "recent_messages": len(self.recent_messages),
+            "semantic_units": len(self._unit_store),
+            "cache": self.cache.get_stats()
+        }
+
+    def _snapshot_state(self) -> dict:
+        return {
+            "units": [u.to_dict() for u in self._unit_store.items()],
+            "recent_messages": self.recent_messages,
+            "turn_count": self.turn_count
+        }
+
+    def _restore_state(self, state: dict):
+        self._unit_store.clear()
+        self.index.clear()
+        units = [SemanticUnit.from_dict(d, d["turn"]) for d in state["units"]]
+        for unit in units:
+            self.index.add(unit, unit.content)
+        self._add_units(units)
+        self.recent_messages = list(state["recent_messages"])
+        self.turn_count = state["turn_count"]
+
+    def _replay_record(self, record: dict):
+        self.add_turn(record["user"], record["assistant"])
+
 
 # =============================================================================
 # Strategy 5: Hybrid Compression
@@ -634,6 +1698,121 @@ class MessageType(Enum):
     FEEDBACK = "feedback"
 
 
+# (message type, importance, confidence) from a local classifier
+LocalClassification = tuple[MessageType, float, float]
+
+
+class HeuristicMessageClassifier:
+    """
+    Zero-network classifier for the obvious cases using regex/keyword rules.
+    Rules are checked in order; the first match wins.
+    """
+
+    RULES: list[tuple[MessageType, float, float, re.Pattern]] = [
+        (MessageType.CHITCHAT, 0.1, 0.95, re.compile(
+            r"^\s*(hi|hello|hey|thanks|thank you|thx|ok|okay|cool|great|got it|bye|good (morning|night))\W*$",
+            re.IGNORECASE)),
+        (MessageType.FACT, 0.9, 0.9, re.compile(
+            r"\b(my name is|i am a|i'm a|i work (at|for|as)|i live in|my (role|job|team|company) is)\b",
+            re.IGNORECASE)),
+        (MessageType.FEEDBACK, 0.4, 0.85, re.compile(
+            r"\b(that's (wrong|right|correct|not)|doesn't work|didn't work|not what i|"
+            r"perfect|exactly what|well done|that helped|this is wrong)\b",
+            re.IGNORECASE)),
+        (MessageType.INSTRUCTION, 0.7, 0.85, re.compile(
+            r"^\s*(please |always |never |don't |do not |make sure |remember |use |write |create |"
+            r"add |remove |change |update |generate |show me )",
+            re.IGNORECASE)),
+        (MessageType.FACT, 0.7, 0.8, re.compile(
+            r"\b(i'm working on|i am working on|we use|we have|our (team|project|stack|data)|i prefer|i use)\b",
+            re.IGNORECASE)),
+        (MessageType.QUESTION, 0.5, 0.9, re.compile(
+            r"(\?\s*$)|^\s*(what|why|how|when|where|who|which|can you|could you|is there|are there|does|do you)\b",
+            re.IGNORECASE)),
+    ]
+
+    def classify(self, message: str) -> Optional[LocalClassification]:
+        """Return a classification, or None if no rule matches."""
+        for msg_type, importance, confidence, pattern in self.RULES:
+            if pattern.search(message):
+                return msg_type, importance, confidence
+        return None
+
+
+class LogisticMessageClassifier:
+    """
+    Small multinomial logistic regression over hashed word/bigram features,
+    trained from LLM labels logged by HybridCompressionManager.
+    Importance is predicted as the mean labelled importance of the chosen type.
+    """
+
+    def __init__(self, num_features: int = 4096, learning_rate: float = 0.5,
+                 epochs: int = 20, l2: float = 1e-4):
+        self.num_features = num_features
+        self.learning_rate = learning_rate
+        self.epochs = epochs
+        self.l2 = l2
+        self.classes: list[MessageType] = list(MessageType)
+        self.weights: Optional[np.ndarray] = None  # (classes, num_features)
+        self.bias: Optional[np.ndarray] = None
+        self.mean_importance: dict[MessageType, float] = {}
+
+    def _features(self, message: str) -> tuple[np.ndarray, np.ndarray]:
+        """Hash unigrams, bigrams and a few shape signals into a sparse (indices, values) vector."""
+        words = re.findall(r"[\w']+", message.lower())
+        tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        tokens.append(f"__len_{min(len(words) // 5, 6)}")
+        if message.rstrip().endswith("?"):
+            tokens.append("__qmark")
+        hashed = np.array([zlib.crc32(token.encode("utf-8")) % self.num_features for token in tokens])
+        indices, counts = np.unique(hashed, return_counts=True)
+        values = counts.astype(np.float64)
+        return indices, values / np.linalg.norm(values)
+
+    def _probabilities(self, features: tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+        indices, values = features
+        scores = self.bias + self.weights[:, indices] @ values
+        exps = np.exp(scores - scores.max())
+        return exps / exps.sum()
+
+    @property
+    def is_trained(self) -> bool:
+        return self.weights is not None
+
+    def fit(self, samples: list[tuple[str, MessageType, float]]):
+        """Fit on (message, llm_type, llm_importance) samples with SGD."""
+        if not samples:
+            return
+        self.weights = np.zeros((len(self.classes), self.num_features))
+        self.bias = np.zeros(len(self.classes))
+
+        importance_by_type: dict[MessageType, list[float]] = {}
+        for _, msg_type, importance in samples:
+            importance_by_type.setdefault(msg_type, []).append(importance)
+        self.mean_importance = {c: sum(v) / len(v) for c, v in importance_by_type.items()}
+
+        encoded = [(self._features(message), self.classes.index(msg_type)) for message, msg_type, _ in samples]
+        for _ in range(self.epochs):
+            for features, label in encoded:
+                indices, values = features
+                gradient = self._probabilities(features)
+                gradient[label] -= 1.0
+                rows = self.weights[:, indices]
+                self.weights[:, indices] = rows - self.learning_rate * (
+                    np.outer(gradient, values) + self.l2 * rows
+                )
+                self.bias -= self.learning_rate * gradient
+
+    def classify(self, message: str) -> Optional[LocalClassification]:
+        """Return the most likely type with its probability as confidence."""
+        if not self.is_trained:
+            return None
+        probs = self._probabilities(self._features(message))
+        best = int(probs.argmax())
+        msg_type = self.classes[best]
+        return msg_type, self.mean_importance.get(msg_type, 0.5), float(probs[best])
+
+
 @dataclass
 class HybridConfig:
     """Configuration for hybrid compression."""
@@ -643,6 +1822,16 @@ class HybridConfig:
     max_session_summary_tokens: int = 500
     max_facts: int = 10
     importance_threshold: float = 0.5
+    local_classification: bool = True  # Try heuristic/learned classifiers before the LLM
+    local_confidence_threshold: float = 0.8  # Below this, fall through to the LLM
+    batch_llm_classification: bool = True  # Defer LLM classification to one call per interval
+    label_log_size: int = 2000  # LLM labels kept for training the logistic classifier
+    query_aware_retrieval: bool = False  # Select relevant units per query instead of all
+    retrieval_top_k: int = 8
+    retrieval_token_budget: int = 800
+    pin_importance: float = 0.9  # Units at or above this are always included
+    sectioned_summary: bool = False  # Incremental per-section session summary (see SectionedSummary)
+    section_token_budget: int = 200  # Note tokens per section before it is rolled up
 
 
 @dataclass
@@ -654,7 +1843,7 @@ class HybridMemory:
     long_term_facts: list = field(default_factory=list)  # Cross-session facts
 
 
-class HybridCompressionManager:
+class HybridCompressionManager(PersistentMemoryMixin):
     """
     Production-ready hybrid system combining all strategies:
     - Message classification
@@ -664,10 +1853,31 @@ class HybridCompressionManager:
     - Long-term memory
     """
 
-    def __init__(self, config: Optional[HybridConfig] = None):
+    def __init__(
+        self,
+        config: Optional[HybridConfig] = None,
+        cache: Optional[LLMCache] = None,
+        learned_classifier: Optional[LogisticMessageClassifier] = None,
+        backend: Optional[MemoryBackend] = None,
+        session_id: Optional[str] = None
+    ):
         self.config = config or HybridConfig()
+        self.cache = cache if cache is not None else default_llm_cache
         self.memory = HybridMemory()
         self.turn_count: int = 0
+        self.heuristic_classifier = HeuristicMessageClassifier()
+        self.learned_classifier = learned_classifier
+        self.label_log: deque[tuple[str, MessageType, float]] = deque(maxlen=self.config.label_log_size)
+        self._pending_classification: list[dict] = []  # User messages awaiting a batched LLM label
+        self._unit_store = BoundedUnitStore(self.config.max_semantic_units)
+        self.index = VectorIndex()
+        self._tokenizer = CharRatioTokenizer()
+        self._classifier_stats = {"heuristic": 0, "learned": 0, "llm": 0, "llm_calls": 0}
+        self._summary_sections = SectionedSummary(
+            note_token_budget=self.config.section_token_budget,
+            rollup_max_tokens=self.config.max_session_summary_tokens // 2
+        )
+        self._init_persistence(backend, session_id)
 
     def _classify_message(self, message: str) -> tuple[MessageType, float]:
         """Classify message type and importance."""
@@ -682,14 +1892,9 @@ Return JSON with:
 
 JSON response:"""
 
-        response = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=200,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        text = cached_completion(self.cache, prompt, max_tokens=200)
 
         try:
-            text = response.content[0].text
             if "{" in text:
                 json_str = text[text.find("{"):text.rfind("}") + 1]
                 data = json.loads(json_str)
@@ -701,8 +1906,105 @@ JSON response:"""
 
         return MessageType.CHITCHAT, 0.5
 
+    def _classify_locally(self, message: str) -> Optional[tuple[MessageType, float]]:
+        """Try the zero-network classifiers; return None if none is confident enough."""
+        threshold = self.config.local_confidence_threshold
+
+        result = self.heuristic_classifier.classify(message)
+        if result and result[2] >= threshold:
+            self._classifier_stats["heuristic"] += 1
+            return result[0], result[1]
+
+        if self.learned_classifier is not None:
+            result = self.learned_classifier.classify(message)
+            if result and result[2] >= threshold:
+                self._classifier_stats["learned"] += 1
+                return result[0], result[1]
+
+        return None
+
+    def _classify_batch(self, messages: list[str]) -> list[tuple[MessageType, float]]:
+        """Classify several messages with a single LLM call."""
+        numbered = "\n".join(f'{i + 1}. "{m}"' for i, m in enumerate(messages))
+        prompt = f"""Classify each message and rate its importance for future context.
+
+Messages:
+{numbered}
+
+Return a JSON array with one object per message, in the same order, each with:
+- type: One of "fact", "question", "instruction", "chitchat", "feedback"
+- importance: Float 0-1 (1 = critical for future context)
+
+JSON array:"""
+
+        text = cached_completion(self.cache, prompt, max_tokens=60 * len(messages) + 100)
+
+        results = [(MessageType.CHITCHAT, 0.5)] * len(messages)
+        try:
+            if "[" in text:
+                json_str = text[text.find("["):text.rfind("]") + 1]
+                data = json.loads(json_str)
+                if not isinstance(data, list):
+                    return results
+                for i, item in enumerate(data[:len(messages)]):
+                    try:
+                        results[i] = (
+                            MessageType(item.get("type", "chitchat")),
+                            float(item.get("importance", 0.5))
+                        )
+                    except (ValueError, AttributeError, TypeError):
+                        pass
+        except json.JSONDecodeError:
+            pass
+        return results
+
+    def _flush_pending_classifications(self):
+        """Label all deferred user messages with one batched LLM call."""
+        if not self._pending_classification:
+            return
+        pending, self._pending_classification = self._pending_classification, []
+
+        self._classifier_stats["llm_calls"] += 1
+        results = self._classify_batch([m["content"] for m in pending])
+        for message, (msg_type, importance) in zip(pending, results):
+            self._apply_classification(message, msg_type, importance, from_llm=True)
+
+    def _apply_classification(self, message: dict, msg_type: MessageType,
+                              importance: float, from_llm: bool = False):
+        """Record a classification on a stored user message and promote facts."""
+        message["_type"] = msg_type.value
+        message["_importance"] = importance
+        if from_llm:
+            self._classifier_stats["llm"] += 1
+            self.label_log.append((message["content"], msg_type, importance))
+
+        # Check for long-term facts (high importance facts)
+        content = message["content"]
+        if msg_type == MessageType.FACT and importance >= 0.8:
+            if content not in self.memory.long_term_facts:
+                self.memory.long_term_facts.append(content)
+                if len(self.memory.long_term_facts) > self.config.max_facts:
+                    self.memory.long_term_facts.pop(0)
+
+    def train_classifier(self, min_samples: int = 50) -> bool:
+        """Fit the logistic classifier on logged LLM labels. Returns True if trained."""
+        if len(self.label_log) < min_samples:
+            return False
+        classifier = self.learned_classifier or LogisticMessageClassifier()
+        classifier.fit(list(self.label_log))
+        self.learned_classifier = classifier
+        return True
+
     def _update_session_summary(self, messages: list[dict]) -> str:
         """Update session summary with new messages."""
+        if self.config.sectioned_summary:
+            # Messages carry their classification, so they route to sections without an LLM call
+            self._summary_sections = self._summary_sections.update(
+                messages,
+                lambda prompt, max_tokens: cached_completion(self.cache, prompt, max_tokens=max_tokens)
+            )
+            return self._summary_sections.render()
+
         messages_text = "\n".join(
             f"[{'User' if m['role'] == 'user' else 'Assistant'}]: {m['content']}"
             for m in messages
@@ -718,12 +2020,7 @@ New messages:
 
 Generate updated summary (keep it concise, ~200 words):"""
 
-        response = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=self.config.max_session_summary_tokens,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text
+        return cached_completion(self.cache, prompt, max_tokens=self.config.max_session_summary_tokens)
 
     def _extract_units(self, messages: list[dict]) -> list[dict]:
         """Extract semantic units from messages."""
@@ -740,14 +2037,9 @@ Conversation:
 
 JSON array:"""
 
-        response = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=500,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        text = cached_completion(self.cache, prompt, max_tokens=500)
 
         try:
-            text = response.content[0].text
             if "[" in text:
                 json_str = text[text.find("["):text.rfind("]") + 1]
                 return json.loads(json_str)
@@ -768,51 +2060,79 @@ JSON array:"""
 
         # Extract semantic units
         new_units = self._extract_units(messages_to_compress)
+        evicted_ids = set()
         for unit in new_units:
             if unit.get("importance", 0) >= self.config.importance_threshold:
-                self.memory.semantic_units.append(unit)
-
-        # Prune semantic units
-        self.memory.semantic_units.sort(
-            key=lambda u: u.get("importance", 0), reverse=True
-        )
-        self.memory.semantic_units = self.memory.semantic_units[:self.config.max_semantic_units]
+                if isinstance(unit.get("type"), str):
+                    unit["type"] = sys.intern(unit["type"])
+                self.index.add(unit, unit.get("content", ""))
+                # Bounded heap prunes the least important, oldest unit on overflow
+                dropped = self._unit_store.push(unit, unit.get("importance", 0), self.turn_count)
+                if dropped is not None:
+                    evicted_ids.add(id(dropped))
+
+        self.memory.semantic_units = self._unit_store.items()
+        if evicted_ids:
+            self.index.retain(lambda u: id(u) not in evicted_ids)
 
         # Keep only recent messages
         self.memory.recent = self.memory.recent[-self.config.max_recent_messages:]
 
     def add_turn(self, user_message: str, assistant_message: str):
         """Add a conversation turn with classification."""
+        self._log_turn({"user": user_message, "assistant": assistant_message})
         self.turn_count += 1
 
-        # Classify user message
-        msg_type, importance = self._classify_message(user_message)
-
         # Add to recent messages
-        self.memory.recent.append({
-            "role": "user",
-            "content": user_message,
-            "_type": msg_type.value,
-            "_importance": importance
-        })
+        user_entry = {"role": "user", "content": user_message}
+        self.memory.recent.append(user_entry)
         self.memory.recent.append({
             "role": "assistant",
             "content": assistant_message
         })
 
-        # Check for long-term facts (high importance facts)
-        if msg_type == MessageType.FACT and importance >= 0.8:
-            if user_message not in self.memory.long_term_facts:
-                self.memory.long_term_facts.append(user_message)
-                if len(self.memory.long_term_facts) > self.config.max_facts:
-                    self.memory.long_term_facts.pop(0)
+        # Classify user message: local fast path, then (batched) LLM
+        local = self._classify_locally(user_message) if self.config.local_classification else None
+        if local is not None:
+            self._apply_classification(user_entry, *local)
+        elif self.config.batch_llm_classification:
+            # Provisional label until the batch is flushed at the next interval
+            user_entry["_type"] = MessageType.CHITCHAT.value
+            user_entry["_importance"] = 0.5
+            self._pending_classification.append(user_entry)
+        else:
+            self._classifier_stats["llm_calls"] += 1
+            msg_type, importance = self._classify_message(user_message)
+            self._apply_classification(user_entry, msg_type, importance, from_llm=True)
+            self._mark_dirty()
 
         # Perform compression at intervals
         if self.turn_count % self.config.compression_interval == 0:
+            self._flush_pending_classifications()
             self._perform_compression()
+            self._mark_dirty()
+
+        self._maybe_snapshot()
+
+    def _select_units(self, query: Optional[str]) -> list[dict]:
+        """Return all units, or the relevant subset for query in query-aware mode."""
+        if not self.config.query_aware_retrieval:
+            return self._unit_store.ordered()
+        if query is None:
+            # Default to the latest user message
+            query = next((m["content"] for m in reversed(self.memory.recent) if m["role"] == "user"), "")
+        if not query:
+            return self._unit_store.ordered()
+        return self.index.select(
+            query,
+            top_k=self.config.retrieval_top_k,
+            token_budget=self.config.retrieval_token_budget,
+            is_pinned=lambda u: u.get("importance", 0) >= self.config.pin_importance,
+            token_count=lambda u: self._tokenizer.count(u.get("content", ""))
+        )
 
-    def get_context(self) -> str:
-        """Get full hybrid context."""
+    def get_context(self, query: Optional[str] = None) -> str:
+        """Get full hybrid context, optionally restricting units to those relevant to query."""
         parts = []
 
         # Long-term facts
@@ -824,19 +2144,20 @@ JSON array:"""
             parts.append(f"Session Summary:\n{self.memory.session_summary}")
 
         # Semantic units
-        if self.memory.semantic_units:
+        units = self._select_units(query)
+        if units:
             units_text = "Key Information:\n"
-            for u in self.memory.semantic_units:
+            for u in units:
                 units_text += f"- [{u.get('type', 'info')}] {u.get('content', '')}\n"
             parts.append(units_text)
 
         return "\n\n".join(parts)
 
-    def get_messages(self) -> list[dict]:
+    def get_messages(self, query: Optional[str] = None) -> list[dict]:
         """Get messages for API call."""
         messages = []
 
-        context = self.get_context()
+        context = self.get_context(query)
         if context:
             messages.append({
                 "role": "user",
@@ -863,9 +2184,56 @@ JSON array:"""
             "recent_messages": len(self.memory.recent),
             "semantic_units": len(self.memory.semantic_units),
             "long_term_facts": len(self.memory.long_term_facts),
-            "has_session_summary": bool(self.memory.session_summary)
+            "has_session_summary": bool(self.memory.session_summary),
+            "summary_sections": self._summary_sections.stats if self.config.sectioned_summary else None,
+            "classification": self.get_classifier_stats(),
+            "cache": self.cache.get_stats()
+        }
+
+    def get_classifier_stats(self) -> dict:
+        """Get fast-path vs LLM classification counters."""
+        local = self._classifier_stats["heuristic"] + self._classifier_stats["learned"]
+        total = local + self._classifier_stats["llm"] + len(self._pending_classification)
+        return {
+            **self._classifier_stats,
+            "pending": len(self._pending_classification),
+            "fast_path_hit_rate": local / total if total else 0.0
         }
 
+    def _snapshot_state(self) -> dict:
+        pending_ids = {id(m) for m in self._pending_classification}
+        return {
+            "recent": self.memory.recent,
+            "pending": [i for i, m in enumerate(self.memory.recent) if id(m) in pending_ids],
+            "session_summary": self.memory.session_summary,
+            "summary_sections": self._summary_sections.to_dict(),
+            "units": [[u, importance, recency] for u, importance, recency in self._unit_store.entries()],
+            "long_term_facts": self.memory.long_term_facts,
+            "turn_count": self.turn_count,
+            "classifier_stats": self._classifier_stats
+        }
+
+    def _restore_state(self, state: dict):
+        self._unit_store.clear()
+        self.index.clear()
+        for unit, importance, recency in state["units"]:
+            self.index.add(unit, unit.get("content", ""))
+            self._unit_store.push(unit, importance, recency)
+        self.memory = HybridMemory(
+            recent=list(state["recent"]),
+            session_summary=state["session_summary"],
+            semantic_units=self._unit_store.items(),
+            long_term_facts=list(state["long_term_facts"])
+        )
+        self._pending_classification = [self.memory.recent[i] for i in state["pending"]]
+        if "summary_sections" in state:
+            self._summary_sections.restore(state["summary_sections"])
+        self.turn_count = state["turn_count"]
+        self._classifier_stats = dict(state["classifier_stats"])
+
+    def _replay_record(self, record: dict):
+        self.add_turn(record["user"], record["assistant"])
+
 
 # =============================================================================
 # Example Usage
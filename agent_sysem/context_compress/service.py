@@ -0,0 +1,302 @@
+"""
+Multi-tenant compression service.
+
+Hosts many HybridCompressionManager sessions in one process:
+- Sessions are sharded by (tenant_id, session_id) and kept in an LRU;
+  cold sessions are snapshotted to the persistent store and resumed on demand
+- Turn processing (which may trigger blocking LLM summarization) runs on a
+  bounded worker pool fed by a round-robin scheduler, so a busy tenant
+  cannot starve the others
+- Per-session memory footprint and queue metrics are exposed via get_metrics()
+"""
+
+import asyncio
+import sys
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from main import (
+    HybridCompressionManager,
+    HybridConfig,
+    LLMCache,
+    MemoryBackend,
+    default_llm_cache,
+)
+
+
+@dataclass
+class ServiceConfig:
+    """Configuration for the compression service."""
+    max_live_sessions: int = 1000  # Sessions kept in memory before LRU eviction
+    workers: int = 16  # Concurrent turn/summarization jobs
+    max_pending: int = 10_000  # Queued jobs before submitters are back-pressured
+    hybrid_config: HybridConfig = field(default_factory=HybridConfig)
+
+
+@dataclass
+class _TurnJob:
+    tenant_id: str
+    session_id: str
+    user_message: str
+    assistant_message: str
+    future: asyncio.Future
+
+
+class FairScheduler:
+    """
+    Per-tenant FIFO queues served round-robin.
+    Order is preserved within a tenant; tenants take turns across the pool.
+    """
+
+    def __init__(self):
+        self._queues: dict[str, deque] = {}
+        self._ready: deque[str] = deque()  # Tenants with queued work, in service order
+        self._available = asyncio.Condition()
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def depth_by_tenant(self) -> dict[str, int]:
+        return {tenant: len(q) for tenant, q in self._queues.items() if q}
+
+    async def put(self, tenant_id: str, job: Any):
+        async with self._available:
+            queue = self._queues.setdefault(tenant_id, deque())
+            if not queue:
+                self._ready.append(tenant_id)
+            queue.append(job)
+            self._available.notify()
+
+    async def get(self) -> Any:
+        async with self._available:
+            await self._available.wait_for(lambda: bool(self._ready))
+            tenant_id = self._ready.popleft()
+            queue = self._queues[tenant_id]
+            job = queue.popleft()
+            if queue:
+                self._ready.append(tenant_id)  # Back of the line for its next job
+            else:
+                del self._queues[tenant_id]
+            return job
+
+    def drain(self) -> list:
+        """Remove and return every queued job."""
+        jobs = [job for queue in self._queues.values() for job in queue]
+        self._queues.clear()
+        self._ready.clear()
+        return jobs
+
+
+def estimate_footprint(obj: Any, _seen: Optional[set] = None) -> int:
+    """Approximate deep size in bytes of plain containers, strings and numbers."""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_footprint(k, seen) + estimate_footprint(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(estimate_footprint(item, seen) for item in obj)
+    return size
+
+
+def session_footprint(manager: HybridCompressionManager) -> int:
+    """Approximate bytes held by a hybrid session's memory, pending labels and index."""
+    seen: set = set()
+    size = estimate_footprint(manager.memory.recent, seen)
+    size += estimate_footprint(manager.memory.session_summary, seen)
+    size += estimate_footprint(manager.memory.semantic_units, seen)
+    size += estimate_footprint(manager.memory.long_term_facts, seen)
+    size += estimate_footprint(list(manager.label_log), seen)
+    size += manager.index.nbytes
+    return size
+
+
+class CompressionService:
+    """
+    Owns many hybrid compression sessions and schedules their work.
+
+    Usage:
+        service = CompressionService(SQLiteMemoryBackend("memory.db"))
+        await service.start()
+        await service.add_turn("tenant-a", "session-1", user, assistant)
+        context = await service.get_context("tenant-a", "session-1")
+        await service.close()
+    """
+
+    def __init__(
+        self,
+        backend: MemoryBackend,
+        config: Optional[ServiceConfig] = None,
+        cache: Optional[LLMCache] = None
+    ):
+        self.backend = backend
+        self.config = config or ServiceConfig()
+        self.cache = cache if cache is not None else default_llm_cache
+        self._sessions: OrderedDict[str, HybridCompressionManager] = OrderedDict()
+        self._session_locks: dict[str, asyncio.Lock] = {}
+        self._scheduler = FairScheduler()
+        self._pending: Optional[asyncio.Semaphore] = None
+        self._pool = ThreadPoolExecutor(max_workers=self.config.workers, thread_name_prefix="compress")
+        self._workers: list[asyncio.Task] = []
+        self._stats = {
+            "turns_processed": 0, "turns_failed": 0,
+            "sessions_resumed": 0, "sessions_evicted": 0
+        }
+        self._turns_by_tenant: dict[str, int] = {}
+
+    @staticmethod
+    def _key(tenant_id: str, session_id: str) -> str:
+        return f"{tenant_id}:{session_id}"
+
+    async def start(self):
+        """Start the worker tasks on the running event loop."""
+        self._pending = asyncio.Semaphore(self.config.max_pending)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"compress-worker-{i}")
+            for i in range(self.config.workers)
+        ]
+
+    async def close(self):
+        """Stop workers, fail queued turns, snapshot live sessions and release the thread pool."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._pending = None  # Later submissions are refused
+        for job in self._scheduler.drain():
+            if not job.future.done():
+                job.future.set_exception(RuntimeError("service closed"))
+        loop = asyncio.get_running_loop()
+        for manager in self._sessions.values():
+            await loop.run_in_executor(self._pool, manager.snapshot)
+        self._sessions.clear()
+        self._pool.shutdown(wait=True)
+
+    async def __aenter__(self) -> "CompressionService":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _lock_for(self, key: str) -> asyncio.Lock:
+        lock = self._session_locks.get(key)
+        if lock is None:
+            lock = self._session_locks[key] = asyncio.Lock()
+        return lock
+
+    async def _get_session(self, key: str) -> HybridCompressionManager:
+        """Return a live session, resuming it from the store if needed. Caller holds its lock."""
+        manager = self._sessions.get(key)
+        if manager is not None:
+            self._sessions.move_to_end(key)
+            return manager
+
+        loop = asyncio.get_running_loop()
+        manager = await loop.run_in_executor(
+            self._pool,
+            lambda: HybridCompressionManager.resume(
+                self.backend, key, self.config.hybrid_config, cache=self.cache
+            )
+        )
+        self._stats["sessions_resumed"] += 1
+        self._sessions[key] = manager
+        await self._evict_if_needed()
+        return manager
+
+    async def _evict_if_needed(self):
+        """Snapshot and drop least recently used idle sessions over capacity."""
+        loop = asyncio.get_running_loop()
+        over = len(self._sessions) - self.config.max_live_sessions
+        for key in list(self._sessions):
+            if over <= 0:
+                break
+            lock = self._session_locks.get(key)
+            if lock is not None and lock.locked():
+                continue  # In use; try the next oldest
+            manager = self._sessions.pop(key)
+            self._session_locks.pop(key, None)
+            await loop.run_in_executor(self._pool, manager.snapshot)
+            self._stats["sessions_evicted"] += 1
+            over -= 1
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job: _TurnJob = await self._scheduler.get()
+            key = self._key(job.tenant_id, job.session_id)
+            try:
+                async with self._lock_for(key):
+                    manager = await self._get_session(key)
+                    await loop.run_in_executor(
+                        self._pool, manager.add_turn, job.user_message, job.assistant_message
+                    )
+                self._stats["turns_processed"] += 1
+                self._turns_by_tenant[job.tenant_id] = self._turns_by_tenant.get(job.tenant_id, 0) + 1
+                if not job.future.done():
+                    job.future.set_result(None)
+            except asyncio.CancelledError:
+                if not job.future.done():
+                    job.future.set_exception(RuntimeError("service closed"))
+                raise
+            except Exception as e:
+                self._stats["turns_failed"] += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                self._pending.release()
+
+    async def submit_turn(
+        self,
+        tenant_id: str,
+        session_id: str,
+        user_message: str,
+        assistant_message: str
+    ) -> asyncio.Future:
+        """Queue a turn; waits only if max_pending jobs are already queued."""
+        if self._pending is None:
+            raise RuntimeError("CompressionService is not running; call start() first")
+        await self._pending.acquire()
+        future = asyncio.get_running_loop().create_future()
+        await self._scheduler.put(
+            tenant_id, _TurnJob(tenant_id, session_id, user_message, assistant_message, future)
+        )
+        return future
+
+    async def add_turn(self, tenant_id: str, session_id: str, user_message: str, assistant_message: str):
+        """Queue a turn and wait until it has been applied."""
+        await (await self.submit_turn(tenant_id, session_id, user_message, assistant_message))
+
+    async def get_context(self, tenant_id: str, session_id: str, query: Optional[str] = None) -> str:
+        """Get a session's compressed context, resuming it if evicted."""
+        key = self._key(tenant_id, session_id)
+        async with self._lock_for(key):
+            manager = await self._get_session(key)
+            return manager.get_context(query)
+
+    async def get_messages(self, tenant_id: str, session_id: str, query: Optional[str] = None) -> list[dict]:
+        """Get a session's messages for an API call."""
+        key = self._key(tenant_id, session_id)
+        async with self._lock_for(key):
+            manager = await self._get_session(key)
+            return manager.get_messages(query)
+
+    def get_metrics(self, top_sessions: int = 10) -> dict:
+        """Service-level counters, queue depth and per-session memory footprint."""
+        footprints = {key: session_footprint(m) for key, m in self._sessions.items()}
+        largest = sorted(footprints.items(), key=lambda kv: kv[1], reverse=True)[:top_sessions]
+        return {
+            **self._stats,
+            "live_sessions": len(self._sessions),
+            "queued_jobs": len(self._scheduler),
+            "queue_depth_by_tenant": self._scheduler.depth_by_tenant(),
+            "turns_by_tenant": dict(self._turns_by_tenant),
+            "live_memory_bytes": sum(footprints.values()),
+            "largest_sessions": dict(largest),
+            "cache": self.cache.get_stats()
+        }
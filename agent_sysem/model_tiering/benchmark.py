@@ -0,0 +1,1066 @@
+"""
+Benchmarks for the model tiering routers.
+
+Usage:
+    python benchmark.py rule_routing
+    python benchmark.py quality_evaluator --corpus judged.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import random
+import os
+import re
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Callable
+
+import anthropic
+import numpy as np
+
+from main import (
+    MIN_CACHEABLE_TOKENS,
+    TIER_RANK,
+    ExecutionResult,
+    AsyncHybridRouter,
+    CascadingEvaluator,
+    CostEstimator,
+    ClassificationCache,
+    ClassificationCacheConfig,
+    DynamicEscalationRouter,
+    HeuristicQualityEvaluator,
+    HybridRouter,
+    LearnedRouter,
+    LLMClassifierRouter,
+    ModelTier,
+    RoutingDecision,
+    RoutingLog,
+    RoutingRule,
+    RoutingStrategy,
+    RuleBasedRouter,
+    ShadowRouter,
+    SpeculationPolicy,
+    QualityEstimate,
+    QualityEvaluator,
+    RouterMetrics,
+    TierRateLimit,
+    WorkloadClass,
+    WorkloadSimulator,
+    calculate_cost,
+    load_judge_corpus,
+    load_task_log,
+    replay_routing,
+    serve_metrics,
+)
+
+
+def block_text(content: str | list[dict]) -> str:
+    """Text of a message or system parameter given as a string or as content blocks."""
+    if isinstance(content, str):
+        return content
+    return "\n\n".join(block["text"] for block in content)
+
+
+class PromptCacheSimulator:
+    """
+    Prefix cache billed the way the Messages API bills it.
+
+    Entries are keyed by model and a hash of the prompt up to a cache_control
+    breakpoint (system blocks, then message blocks), and are only written when
+    that prefix reaches the model's minimum cacheable length. A request reads
+    the longest cached prefix and writes everything up to its last breakpoint.
+    Entries never expire.
+    """
+
+    def __init__(self) -> None:
+        self.entries: set[str] = set()
+
+    @staticmethod
+    def _blocks(request: dict) -> list[dict]:
+        blocks = []
+        for part in [request.get("system") or []] + [m["content"] for m in request["messages"]]:
+            blocks.extend([{"type": "text", "text": part}] if isinstance(part, str) else part)
+        return blocks
+
+    def usage(self, request: dict) -> dict[str, int]:
+        model = request["model"]
+        digest = hashlib.sha256(model.encode())
+        prefix_tokens, breakpoints = 0, []  # (prefix tokens, prefix key) at each breakpoint
+        for block in self._blocks(request):
+            digest.update(block["text"].encode() + b"\0")
+            prefix_tokens += len(block["text"]) // 4
+            if block.get("cache_control"):
+                breakpoints.append((prefix_tokens, digest.hexdigest()))
+
+        read = max((tokens for tokens, key in breakpoints if key in self.entries), default=0)
+        cacheable = [(tokens, key) for tokens, key in breakpoints if tokens >= MIN_CACHEABLE_TOKENS[ModelTier(model)]]
+        write = max(0, cacheable[-1][0] - read) if cacheable else 0
+        self.entries.update(key for _, key in cacheable)
+        return {
+            "input_tokens": prefix_tokens - read - write,
+            "cache_creation_input_tokens": write,
+            "cache_read_input_tokens": read,
+        }
+
+
+class FakeAnthropicClient:
+    """
+    Offline stand-in for anthropic.Anthropic used by the benchmarks.
+    Classification prompts get a deterministic answer derived from the task's
+    keywords; every other prompt is echoed back with token usage.
+    With prompt_cache, usage reports cache writes and reads for
+    cache_control breakpoints (see PromptCacheSimulator).
+    """
+
+    CATEGORY_KEYWORDS = [
+        ("security", "security", "expert"),
+        ("password", "security", "expert"),
+        ("refund", "general", "simple"),
+        ("invoice", "extraction", "simple"),
+        ("crash", "code", "complex"),
+        ("error", "code", "moderate"),
+        ("translate", "translation", "simple"),
+        ("summar", "summarization", "simple"),
+    ]
+
+    def __init__(
+        self,
+        model_latency: dict[ModelTier, tuple[float, float]] | None = None,
+        difficulty: Callable[[str], int] | None = None,
+        prompt_cache: bool = False,
+    ) -> None:
+        # (time to first token, per streamed chunk) in seconds, by model id
+        self.model_latency = {tier.value: lat for tier, lat in (model_latency or {}).items()}
+        self.difficulty = difficulty or (lambda task: 0)  # Lowest tier rank whose answer passes
+        self.prompt_cache = PromptCacheSimulator() if prompt_cache else None
+        self.calls = 0
+        self.cancelled_streams = 0
+        self.messages = self
+
+    def classify(self, task: str) -> dict[str, str]:
+        lowered = task.lower()
+        for keyword, category, complexity in self.CATEGORY_KEYWORDS:
+            if keyword in lowered:
+                return {"category": category, "complexity": complexity}
+        return {"category": "general", "complexity": "moderate"}
+
+    def respond(self, model: str, prompt: str) -> str:
+        """Canned response text for a prompt."""
+        if prompt.startswith("Analyze each of the following tasks"):
+            tasks = [json.loads(t) for t in re.findall(r"^\d+\. (.*)$", prompt, re.MULTILINE)]
+            return json.dumps([{**self.classify(t), "confidence": 0.9, "reasoning": "fake"} for t in tasks])
+        match = re.search(r"^Task: (.*)$", prompt, re.MULTILINE)
+        if "classify" in prompt and match:
+            return json.dumps({**self.classify(match.group(1)), "confidence": 0.9, "reasoning": "fake"})
+        if self._is_judge(prompt):
+            return self._judge(prompt)
+        return self._answer(model, prompt)
+
+    def usage(self, request: dict, text: str) -> dict[str, int]:
+        """Token usage for a request (model, system, messages) answered with text."""
+        if self.prompt_cache is not None:
+            prompt_usage = self.prompt_cache.usage(request)
+        else:
+            prompt = block_text(request.get("system") or "") + block_text(request["messages"][-1]["content"])
+            prompt_usage = {"input_tokens": len(prompt) // 4}
+        return {**prompt_usage, "output_tokens": len(text) // 4}
+
+    def create(self, model: str, max_tokens: int, messages: list[dict], **kwargs):
+        self.calls += 1
+        prompt = block_text(messages[-1]["content"])
+        first_token, per_chunk = self.model_latency.get(model, (0.0, 0.0))
+        if self._is_judge(prompt):
+            time.sleep(first_token)
+        elif first_token or per_chunk:
+            time.sleep(first_token + per_chunk * 10)
+        text = self.respond(model, prompt)
+        usage = self.usage({"model": model, "messages": messages, **kwargs}, text)
+        return SimpleNamespace(content=[SimpleNamespace(text=text)], usage=SimpleNamespace(**usage))
+
+    @staticmethod
+    def _is_judge(prompt: str) -> bool:
+        return "\n\nEvaluate the quality" in prompt
+
+    def _answer(self, model: str, prompt: str) -> str:
+        return f"[{model}] Answer to: {prompt[:80]} " + "detail " * 40
+
+    def _judge(self, prompt: str) -> str:
+        task = prompt.split("\n\nEvaluate the quality")[0]
+        answered_by = re.search(r"^Response: \[([^\]]+)\]", prompt, re.MULTILINE)
+        rank = TIER_RANK[ModelTier(answered_by.group(1))] if answered_by else -1
+        return "85" if rank >= self.difficulty(task) else "40"
+
+    def stream(self, model: str, max_tokens: int, messages: list[dict], **kwargs):
+        self.calls += 1
+        text = self._answer(model, block_text(messages[-1]["content"]))
+        return _FakeStream(self, model, text, self.usage({"model": model, "messages": messages, **kwargs}, text))
+
+
+class MockAnthropicServer:
+    """
+    Minimal HTTP server speaking enough of the Messages API for the SDK clients.
+    Runs in a child process so its CPU use does not compete with the client
+    for the GIL; responses come from a FakeAnthropicClient after a fixed
+    per-request latency. Prompt caching is simulated, and billed tokens and
+    cost across all requests are available from billing.
+    """
+
+    BILLING_FIELDS = ("input_tokens", "cache_creation_input_tokens", "cache_read_input_tokens", "output_tokens", "cost")
+
+    def __init__(self, latency: float = 0.0, difficulty: dict[str, int] | None = None) -> None:
+        self.latency = latency
+        self.difficulty = difficulty or {}  # Lowest passing tier rank by task, as for FakeAnthropicClient
+        self.port = 0
+        self._requests = multiprocessing.Value("i", 0)
+        self._billing = multiprocessing.Array("d", len(self.BILLING_FIELDS))
+        self._process: multiprocessing.Process | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def requests(self) -> int:
+        return self._requests.value
+
+    @property
+    def billing(self) -> dict[str, float]:
+        with self._billing.get_lock():
+            return dict(zip(self.BILLING_FIELDS, self._billing[:]))
+
+    def __enter__(self) -> "MockAnthropicServer":
+        ports = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_serve_mock_api,
+            args=(ports, self._requests, self._billing, self.latency, self.difficulty),
+            daemon=True,
+        )
+        self._process.start()
+        self.port = ports.get(timeout=10)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._process.terminate()
+        self._process.join()
+
+
+def mock_message_body(fake: FakeAnthropicClient, request: dict, request_id: int) -> dict:
+    """Build a Messages API response for a decoded request body."""
+    text = fake.respond(request["model"], block_text(request["messages"][-1]["content"]))
+    return {
+        "id": f"msg_{request_id}",
+        "type": "message",
+        "role": "assistant",
+        "model": request["model"],
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": fake.usage(request, text),
+    }
+
+
+def _serve_mock_api(ports: multiprocessing.Queue, counter, billing, latency: float, difficulty: dict[str, int]) -> None:
+    fake = FakeAnthropicClient(difficulty=lambda task: difficulty.get(task, 0), prompt_cache=True)
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                header = await reader.readuntil(b"\r\n\r\n")
+                length = int(re.search(rb"(?i)content-length:\s*(\d+)", header).group(1))
+                request = json.loads(await reader.readexactly(length))
+                with counter.get_lock():
+                    counter.value += 1
+                    request_id = counter.value
+                if latency:
+                    await asyncio.sleep(latency)
+                message = mock_message_body(fake, request, request_id)
+                usage = message["usage"]
+                cost = calculate_cost(ModelTier(request["model"]), *(usage[f] for f in (
+                    "input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens"
+                )))
+                with billing.get_lock():
+                    for i, name in enumerate(MockAnthropicServer.BILLING_FIELDS):
+                        billing[i] += cost if name == "cost" else usage[name]
+                body = json.dumps(message).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\ncontent-type: application/json\r\n"
+                    + f"content-length: {len(body)}\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve() -> None:
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        ports.put(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+class _FakeStream:
+    """Context manager mimicking anthropic's MessageStream."""
+
+    def __init__(self, client: FakeAnthropicClient, model: str, text: str, usage: dict[str, int]) -> None:
+        self.client = client
+        self.text = text
+        self.latency = client.model_latency.get(model, (0.0, 0.0))
+        self.usage = usage
+        self.current_message_snapshot = SimpleNamespace(usage=SimpleNamespace(**{**usage, "output_tokens": 1}))
+        self.closed_early = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.closed_early:
+            self.client.cancelled_streams += 1
+
+    @property
+    def text_stream(self):
+        first_token, per_chunk = self.latency
+        time.sleep(first_token)
+        chunk = max(1, len(self.text) // 10)
+        for i in range(0, len(self.text), chunk):
+            yield self.text[i:i + chunk]
+            time.sleep(per_chunk)
+        self.closed_early = False
+
+    def get_final_message(self):
+        return SimpleNamespace(content=[SimpleNamespace(text=self.text)], usage=SimpleNamespace(**self.usage))
+
+
+# =============================================================================
+# Rule-based routing: compiled matcher vs per-rule lambdas
+# =============================================================================
+
+class LambdaRuleRouter(RuleBasedRouter):
+    """Reference implementation that evaluates each rule's condition in priority order."""
+
+    def route(self, task: str):
+        for rule in self.rules:
+            if rule.matches(task):
+                return rule
+        return None
+
+
+def _synthetic_rules(count: int, keywords_per_rule: int, seed: int) -> list[RoutingRule]:
+    rng = random.Random(seed)
+    tiers = list(ModelTier)
+    return [
+        RoutingRule(
+            name=f"rule_{i}",
+            keywords=[f"kw{rng.randrange(count * 10)}x" for _ in range(keywords_per_rule)],
+            model=rng.choice(tiers),
+            priority=rng.randrange(1000),
+        )
+        for i in range(count)
+    ]
+
+
+def _synthetic_tasks(count: int, rules: list[RoutingRule], seed: int) -> list[str]:
+    rng = random.Random(seed)
+    filler = "please look at the attached report and tell me what you think about it".split()
+    tasks = []
+    for _ in range(count):
+        words = rng.choices(filler, k=20)
+        if rng.random() < 0.5:
+            words.insert(rng.randrange(len(words)), rng.choice(rng.choice(rules).keywords))
+        tasks.append(" ".join(words))
+    return tasks
+
+
+def _routes_per_second(route, tasks: list[str], min_seconds: float = 0.5) -> float:
+    done, start = 0, time.perf_counter()
+    while True:
+        for task in tasks:
+            route(task)
+        done += len(tasks)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return done / elapsed
+
+
+def bench_rule_routing(sizes: tuple[int, ...] = (10, 1_000, 10_000), keywords_per_rule: int = 3):
+    """Routing throughput of the compiled rule set vs per-rule evaluation."""
+    print("\n=== Rule-based routing throughput ===")
+    print(f"{'rules':>8} {'compile (ms)':>13} {'compiled (req/s)':>17} {'per-rule (req/s)':>17} {'speedup':>8}")
+    for size in sizes:
+        rules = _synthetic_rules(size, keywords_per_rule, seed=size)
+        tasks = _synthetic_tasks(200, rules, seed=size)
+
+        compiled = RuleBasedRouter()
+        start = time.perf_counter()
+        compiled.set_rules(rules)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        reference = LambdaRuleRouter()
+        reference.rules = compiled.rules
+        for task in tasks:
+            expected = reference.route(task)
+            assert compiled.route(task).rule_matched == (expected.name if expected else "default")
+
+        fast = _routes_per_second(compiled.route, tasks)
+        slow = _routes_per_second(reference.route, tasks)
+        print(f"{size:>8} {compile_ms:13.1f} {fast:17,.0f} {slow:17,.0f} {fast / slow:7.1f}x")
+
+
+# =============================================================================
+# Classification cache: support-ticket workload with near-duplicates
+# =============================================================================
+
+TICKET_TEMPLATES = [
+    "Hi, I was charged twice for order {order}, can I get a refund please",
+    "I need a copy of the invoice for order {order} for my accountant",
+    "The mobile app keeps crashing when I open the settings page on {device}",
+    "I forgot my password and the reset email never arrives at {email}",
+    "Getting error 500 when I upload a file larger than {size} MB",
+    "Can you translate our return policy into {language} for our customers",
+    "Please summarize the last {count} messages in this support thread",
+    "Where can I change the shipping address for order {order}",
+    "Is there a security audit report available for enterprise customers",
+    "How do I export my data to CSV from the dashboard",
+]
+
+
+def _support_tickets(count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    fillers = {
+        "order": lambda: f"#{rng.randrange(10_000, 99_999)}",
+        "device": lambda: rng.choice(["my iPhone", "a Pixel 8", "an iPad", "Android"]),
+        "email": lambda: f"user{rng.randrange(1000)}@example.com",
+        "size": lambda: str(rng.choice([10, 50, 100, 500])),
+        "language": lambda: rng.choice(["Spanish", "German", "Japanese", "French"]),
+        "count": lambda: str(rng.randrange(3, 30)),
+    }
+    tickets = []
+    for _ in range(count):
+        template = rng.choice(TICKET_TEMPLATES)
+        ticket = template.format(**{k: f() for k, f in fillers.items()})
+        if rng.random() < 0.3:
+            ticket = ticket.upper() if rng.random() < 0.2 else "  " + ticket + "  "
+        tickets.append(ticket)
+    return tickets
+
+
+def bench_classification_cache(tickets: int = 5_000, seed: int = 1):
+    """LLM classification calls saved by the exact and semantic cache levels."""
+    print(f"\n=== Classification cache: {tickets} support tickets ===")
+    workload = _support_tickets(tickets, seed)
+    print(f"{'cache':>16} {'LLM calls':>10} {'exact hits':>11} {'semantic hits':>14} "
+          f"{'hit rate':>9} {'wrong label':>12} {'us/route':>9}")
+
+    for label, semantic in (("exact only", False), ("exact + semantic", True)):
+        client = FakeAnthropicClient()
+        router = LLMClassifierRouter(client, cache=ClassificationCache(ClassificationCacheConfig(semantic=semantic)))
+        wrong = 0
+        start = time.perf_counter()
+        for task in workload:
+            decision = router.route(task)
+            if decision.classification.category.value != client.classify(task)["category"]:
+                wrong += 1
+        elapsed = time.perf_counter() - start
+        stats = router.stats.summary()["classification_cache"]
+        print(f"{label:>16} {client.calls:>10} {stats['hits'].get('exact', 0):>11} "
+              f"{stats['hits'].get('semantic', 0):>14} {stats['hit_rate']:>9.1%} "
+              f"{wrong / len(workload):>12.2%} {elapsed / len(workload) * 1e6:>9.0f}")
+
+
+# =============================================================================
+# Speculative escalation: latency vs cost
+# =============================================================================
+
+ESCALATION_TASKS = [
+    ("Translate 'good morning' to Spanish", 0),
+    ("Summarize this paragraph in one sentence", 0),
+    ("Extract all dates from this contract", 0),
+    ("Implement an LRU cache with O(1) operations", 1),
+    ("Refactor this module to remove the circular import", 1),
+    ("Analyze the trade-offs between these two queue designs", 1),
+    ("Explain what this stack trace means", 1),
+    ("Design a multi-region failover plan for the billing system", 2),
+]
+
+
+def bench_speculative_escalation(tasks: int = 80, thresholds: tuple[float, ...] = (0.7, 0.5, 0.3), seed: int = 3):
+    """Latency/cost of sequential vs speculative escalation with simulated model latencies."""
+    print(f"\n=== Speculative escalation: {tasks} tasks ===")
+    rng = random.Random(seed)
+    workload = [rng.choice(ESCALATION_TASKS) for _ in range(tasks)]
+    difficulty = dict(ESCALATION_TASKS)
+    model_latency = {  # (time to first token, per chunk) in seconds
+        ModelTier.HAIKU: (0.010, 0.001),
+        ModelTier.SONNET: (0.025, 0.002),
+        ModelTier.OPUS: (0.050, 0.004),
+    }
+
+    print(f"{'mode':>18} {'mean (ms)':>10} {'p95 (ms)':>9} {'serial (ms)':>12} {'cost ($)':>10} "
+          f"{'wasted ($)':>11} {'speculated':>11}")
+    modes = [("sequential", None)] + [(f"speculate >= {t}", t) for t in thresholds]
+    for label, threshold in modes:
+        client = FakeAnthropicClient(model_latency=model_latency, difficulty=difficulty.get)
+        speculation = SpeculationPolicy(threshold=threshold) if threshold is not None else None
+        router = DynamicEscalationRouter(client, max_escalations=3, speculation=speculation)
+        results = [router.execute_with_escalation(task, max_tokens=512) for task, _ in workload]
+        router.close()
+
+        latencies = sorted(r.latency_seconds * 1000 for r in results)
+        print(f"{label:>18} {sum(latencies) / len(latencies):10.1f} "
+              f"{latencies[int(len(latencies) * 0.95)]:9.1f} "
+              f"{sum(r.serial_latency_seconds for r in results) / len(results) * 1000:12.1f} "
+              f"{sum(r.cost for r in results):10.4f} {sum(r.wasted_cost for r in results):11.4f} "
+              f"{sum(r.speculated for r in results) / len(results):11.0%}")
+
+
+# =============================================================================
+# Async router: 1,000 tasks against a local mock API server
+# =============================================================================
+
+def _mixed_tasks(count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    templates = [task for task, _ in ESCALATION_TASKS] + [
+        "What is the status of ticket {n}?",
+        "Write a short product description for item {n}",
+        "Is order {n} eligible for free shipping?",
+    ]
+    return [rng.choice(templates).format(n=rng.randrange(100_000)) for _ in range(count)]
+
+
+def bench_async_router(tasks: int = 1_000, latency: float = 0.2, max_concurrency: int = 256,
+                       sync_sample: int = 20, threads: int = 32):
+    """Throughput of HybridRouter (sequential and thread pool) vs AsyncHybridRouter.execute_many."""
+    print(f"\n=== Async router: {tasks} tasks, {latency * 1000:.0f}ms mock API latency ===")
+    workload = _mixed_tasks(tasks, seed=5)
+
+    with MockAnthropicServer(latency) as server:
+        def sync_router() -> HybridRouter:
+            client = anthropic.Anthropic(base_url=server.base_url, api_key="mock", max_retries=0)
+            return HybridRouter(client)
+
+        router = sync_router()
+        start = time.perf_counter()
+        for task in workload[:sync_sample]:
+            router.execute(task, max_tokens=256)
+        sequential = sync_sample / (time.perf_counter() - start)
+
+        router, before = sync_router(), server.requests
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda t: router.execute(t, max_tokens=256), workload))
+        threaded = tasks / (time.perf_counter() - start)
+        threaded_requests = server.requests - before
+
+        async def run_async() -> tuple[float, dict]:
+            client = anthropic.AsyncAnthropic(base_url=server.base_url, api_key="mock", max_retries=0)
+            router = AsyncHybridRouter(
+                client,
+                max_concurrency=max_concurrency,
+                rate_limits={ModelTier.OPUS: TierRateLimit(requests_per_second=200, burst=20)},
+            )
+            start = time.perf_counter()
+            await router.execute_many(workload, max_tokens=256)
+            elapsed = time.perf_counter() - start
+            await client.close()
+            return tasks / elapsed, router.get_stats()
+
+        before = server.requests
+        async_rate, stats = asyncio.run(run_async())
+        async_requests = server.requests - before
+
+    print(f"  sync sequential:        {sequential:8.0f} tasks/s  (first {sync_sample} tasks)")
+    print(f"  sync, {threads} threads:       {threaded:8.0f} tasks/s  {threaded_requests} API requests")
+    print(f"  async execute_many:     {async_rate:8.0f} tasks/s  {async_requests} API requests "
+          f"(concurrency {max_concurrency}, Opus limited to 200 req/s)")
+    cache = stats["classification_cache"]
+    print(f"  classification:         {cache['misses']} tasks classified in "
+          f"{-(-cache['misses'] // 20)} batched prompts, {cache['hit_rate']:.0%} cache hits")
+
+
+# =============================================================================
+# Learned routing: trained tier classifier vs rules
+# =============================================================================
+
+# (template, cheapest passing tier rank). Several templates trip the default
+# rules: keywords that overshoot (password reset -> Opus) or undershoot
+# (summarizing a long contract -> Haiku), and unmatched tasks default to Sonnet.
+LEARNED_TEMPLATES = [
+    ("Translate '{phrase}' to {language}", 0),
+    ("Implement a function that returns the largest of {n} numbers", 0),
+    ("What are your opening hours on {day}?", 0),
+    ("Is order {n} eligible for free shipping?", 0),
+    ("Compare the prices of plan {n} and the premium plan", 0),
+    ("Send me a password reset link for account {n}", 0),
+    ("Summarize this {pages}-page legal contract and flag risky clauses", 1),
+    ("Extract the obligations and deadlines from this {pages}-page vendor agreement", 1),
+    ("Explain what this stack trace from service {n} means", 1),
+    ("Refactor the {module} module to remove the circular import", 1),
+    ("Design a multi-region failover plan for the {module} system", 2),
+    ("Review the authentication flow of the {module} service for vulnerabilities", 2),
+    ("Prove that the {module} scheduler never starves a task", 2),
+]
+
+
+def _learned_workload(count: int, seed: int, noise: float = 0.08) -> list[tuple[str, int]]:
+    """Tasks with their hidden difficulty; a noise fraction is one tier harder than its template."""
+    rng = random.Random(seed)
+    fillers = {
+        "phrase": lambda: rng.choice(["good morning", "thank you", "see you soon", "where is the station"]),
+        "language": lambda: rng.choice(["Spanish", "German", "Japanese", "French"]),
+        "n": lambda: str(rng.randrange(100_000)),
+        "day": lambda: rng.choice(["Monday", "Saturday", "public holidays"]),
+        "pages": lambda: str(rng.randrange(20, 80)),
+        "module": lambda: rng.choice(["billing", "auth", "search", "ingest", "payments"]),
+    }
+    workload = []
+    for _ in range(count):
+        template, difficulty = rng.choice(LEARNED_TEMPLATES)
+        if rng.random() < noise:
+            difficulty = min(difficulty + 1, 2)
+        workload.append((template.format(**{k: f() for k, f in fillers.items()}), difficulty))
+    return workload
+
+
+def _execute_routed(
+    client: FakeAnthropicClient,
+    escalation: DynamicEscalationRouter,
+    decision: RoutingDecision,
+    task: str,
+) -> ExecutionResult:
+    """Execute a decision the way HybridRouter.execute does: escalate from Haiku, else call directly."""
+    if decision.model == ModelTier.HAIKU:
+        return escalation.execute_with_escalation(task, max_tokens=512)
+    response = client.create(model=decision.model.value, max_tokens=512, messages=[{"role": "user", "content": task}])
+    usage = response.usage
+    return ExecutionResult(
+        content=response.content[0].text,
+        model_used=decision.model,
+        input_tokens=usage.input_tokens,
+        output_tokens=usage.output_tokens,
+        cost=calculate_cost(decision.model, usage.input_tokens, usage.output_tokens),
+    )
+
+
+def bench_learned_routing(train: int = 2_000, test: int = 1_000, thresholds: tuple[float, ...] = (0.5, 0.7, 0.9)):
+    """Cost and quality of LearnedRouter vs RuleBasedRouter on held-out tasks."""
+    print(f"\n=== Learned routing: {train} logged executions, {test} held-out tasks ===")
+    train_tasks = _learned_workload(train, seed=11)
+    test_tasks = _learned_workload(test, seed=12)
+    difficulty = dict(train_tasks + test_tasks)
+    client = FakeAnthropicClient(difficulty=difficulty.get)
+    escalation = DynamicEscalationRouter(client, max_escalations=3)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Exploration run: every task starts at Haiku, so each outcome labels its cheapest passing tier
+        log = RoutingLog(os.path.join(tmp, "routing_log.jsonl"))
+        for task, _ in train_tasks:
+            log.record(task, escalation.route(task), escalation.execute_with_escalation(task, max_tokens=512))
+        records = log.records()
+        start = time.perf_counter()
+        base = LearnedRouter.train(records, log.featurizer)
+        train_seconds = time.perf_counter() - start
+
+    routers: list[tuple[str, RoutingStrategy]] = [("rule_based", RuleBasedRouter())]
+    routers += [
+        (f"learned p>={t}", LearnedRouter(base.model, base.featurizer, min_pass_probability=t))
+        for t in thresholds
+    ]
+    print(f"  trained on {len(records)} logged records in {train_seconds * 1000:.0f} ms")
+    print(f"{'router':>16} {'haiku/sonnet/opus':>18} {'first-try ok':>13} {'escalated':>10} "
+          f"{'quality ok':>11} {'cost ($)':>9} {'vs rules':>9}")
+
+    baseline = None
+    for label, router in routers:
+        routed = [0, 0, 0]
+        first_try = escalated = passed = 0
+        cost = 0.0
+        for task, needed in test_tasks:
+            decision = router.route(task)
+            rank = TIER_RANK[decision.model]
+            routed[rank] += 1
+            result = _execute_routed(client, escalation, decision, task)
+            first_try += rank >= needed
+            escalated += result.escalated
+            passed += TIER_RANK[result.model_used] >= needed
+            cost += result.cost
+        baseline = baseline if baseline is not None else cost
+        mix = "/".join(f"{n / test:.0%}" for n in routed)
+        print(f"{label:>16} {mix:>18} {first_try / test:>13.1%} {escalated / test:>10.1%} "
+              f"{passed / test:>11.1%} {cost:>9.4f} {cost / baseline - 1:>+9.1%}")
+
+
+# =============================================================================
+# Quality evaluation: local heuristic vs the LLM judge
+# =============================================================================
+
+def _judged_responses(count: int, seed: int) -> list[tuple[str, str, float]]:
+    """
+    Synthetic stand-in for a recorded judge corpus: (task, response, judge score).
+    Response styles cover what the judge penalizes (refusals, hedging, truncation,
+    off-topic text, broken code) plus terse correct answers the heuristic may misjudge.
+    """
+    rng = random.Random(seed)
+    tasks = [task for task, _ in _learned_workload(count, seed)]
+    filler = "The approach keeps each step small and checks the result before moving on.".split()
+
+    def on_topic(task: str, sentences: int) -> str:
+        words = [w for w in re.findall(r"[\w']+", task) if len(w) > 3]
+        return " ".join(
+            " ".join(rng.sample(words, min(3, len(words))) + rng.sample(filler, 8)) + "."
+            for _ in range(sentences)
+        )
+
+    corpus = []
+    for task in tasks:
+        is_code = bool(HeuristicQualityEvaluator.CODE_REQUEST.search(task))
+        style = rng.choices(
+            ["good", "terse", "refusal", "hedged", "truncated", "off_topic", "broken_code"],
+            weights=[45, 8, 8, 12, 8, 10, 9 if is_code else 0],
+        )[0]
+        if style == "good":
+            response, score = on_topic(task, rng.randrange(2, 6)), rng.gauss(85, 7)
+            if is_code:
+                response += "\n```python\ndef solve(values):\n    return max(values)\n```"
+        elif style == "terse":
+            response, score = rng.choice(["Yes.", "Done, see above.", "Hola."]), rng.gauss(75, 10)
+        elif style == "refusal":
+            response, score = "I'm sorry, but I can't help with that request.", rng.gauss(15, 8)
+        elif style == "hedged":
+            response = "I think it might possibly work, but I'm not sure. " + on_topic(task, 1) + " Maybe."
+            score = rng.gauss(55, 10)
+        elif style == "truncated":
+            response, score = rng.choice(["Sure, here", "The answer is", "Step 1:"]), rng.gauss(25, 8)
+        elif style == "off_topic":
+            response, score = " ".join(rng.choices(filler, k=40)), rng.gauss(45, 10)
+        else:
+            response = on_topic(task, 2) + "\n```python\ndef solve(values:\n    return max(values\n```"
+            score = rng.gauss(45, 10)
+        corpus.append((task, response, min(100.0, max(0.0, score))))
+    return corpus
+
+
+class _RecordedJudge(QualityEvaluator):
+    """Replays recorded judge scores instead of calling the LLM."""
+
+    def __init__(self, corpus: list[tuple[str, str, float]]) -> None:
+        self.scores = {(task, response): score for task, response, score in corpus}
+        self.calls = 0
+
+    def evaluate(self, task: str, response: str, system_prompt: str | None = None) -> QualityEstimate:
+        self.calls += 1
+        return QualityEstimate(score=self.scores[(task, response)], confidence=1.0, source="llm_judge")
+
+
+def _expected_calibration_error(confidences: list[float], correct: list[bool], bins: int = 10) -> float:
+    total, error = len(confidences), 0.0
+    for b in range(bins):
+        lo, hi = 0.5 + b * 0.5 / bins, 0.5 + (b + 1) * 0.5 / bins
+        members = [i for i, c in enumerate(confidences) if lo <= c < hi or (b == bins - 1 and c == hi)]
+        if members:
+            accuracy = sum(correct[i] for i in members) / len(members)
+            mean_confidence = sum(confidences[i] for i in members) / len(members)
+            error += len(members) / total * abs(accuracy - mean_confidence)
+    return error
+
+
+def bench_quality_evaluator(corpus_path: str | None = None, samples: int = 4_000,
+                            min_confidences: tuple[float, ...] = (0.7, 0.8, 0.9), threshold: float = 70.0):
+    """Agreement of the heuristic and cascading evaluators with the LLM judge on a judged corpus."""
+    corpus = load_judge_corpus(corpus_path) if corpus_path else _judged_responses(samples, seed=21)
+    random.Random(0).shuffle(corpus)
+    fit_set, eval_set = corpus[:len(corpus) // 2], corpus[len(corpus) // 2:]
+    source = os.path.basename(corpus_path) if corpus_path else "synthetic corpus"
+    print(f"\n=== Quality evaluator: {len(corpus)} judged responses ({source}), "
+          f"calibrated on {len(fit_set)}, scored on {len(eval_set)} ===")
+    print(f"{'evaluator':>22} {'judge calls':>12} {'agreement':>10} {'ECE':>7} {'us/eval':>8}")
+
+    def report(label: str, evaluator: QualityEvaluator, judge: _RecordedJudge | None = None):
+        confidences, correct = [], []
+        start = time.perf_counter()
+        for task, response, judge_score in eval_set:
+            estimate = evaluator.evaluate(task, response)
+            confidences.append(estimate.confidence)
+            correct.append((estimate.score >= threshold) == (judge_score >= threshold))
+        elapsed = time.perf_counter() - start
+        calls = judge.calls / len(eval_set) if judge else 0.0
+        print(f"{label:>22} {calls:>12.1%} {sum(correct) / len(correct):>10.1%} "
+              f"{_expected_calibration_error(confidences, correct):>7.3f} {elapsed / len(eval_set) * 1e6:>8.0f}")
+
+    report("heuristic (defaults)", HeuristicQualityEvaluator(pass_threshold=threshold))
+    calibrated = HeuristicQualityEvaluator(pass_threshold=threshold).fit(fit_set)
+    report("heuristic (calibrated)", calibrated)
+    for min_confidence in min_confidences:
+        judge = _RecordedJudge(corpus)
+        report(f"cascade conf>={min_confidence}", CascadingEvaluator(calibrated, judge, min_confidence), judge)
+
+
+# =============================================================================
+# Streaming telemetry: time to first token and exported percentiles
+# =============================================================================
+
+def bench_streaming_telemetry(tasks: int = 200, seed: int = 7):
+    """Perceived latency of execute_stream vs execute, and the metrics exported for it."""
+    print(f"\n=== Streaming telemetry: {tasks} tasks ===")
+    workload = _mixed_tasks(tasks, seed)
+    # The rules send contract extraction to Haiku; make it fail there so some streams restart
+    difficulty = {**dict(ESCALATION_TASKS), "Extract all dates from this contract": 1}
+    model_latency = {  # (time to first token, per chunk) in seconds
+        ModelTier.HAIKU: (0.010, 0.002),
+        ModelTier.SONNET: (0.025, 0.004),
+        ModelTier.OPUS: (0.050, 0.008),
+    }
+
+    def router(metrics: RouterMetrics) -> HybridRouter:
+        client = FakeAnthropicClient(model_latency=model_latency, difficulty=lambda t: difficulty.get(t, 0))
+        return HybridRouter(client, use_llm_classification=False, metrics=metrics)
+
+    blocking = router(RouterMetrics())
+    blocking_latency = [blocking.execute(task, max_tokens=512).latency_seconds for task in workload]
+
+    metrics = RouterMetrics()
+    streaming = router(metrics)
+    first_tokens, restarts = [], 0
+    for task in workload:
+        for update in streaming.execute_stream(task, max_tokens=512):
+            restarts += update.restart
+            if update.result is not None:
+                first_tokens.append(update.result.first_token_seconds)
+
+    print(f"  execute():        first output after {np.median(blocking_latency) * 1000:6.1f} ms median (whole answer)")
+    print(f"  execute_stream(): first token after  {np.median(first_tokens) * 1000:6.1f} ms median, "
+          f"{restarts} restarts on escalation")
+
+    latency = metrics.quantiles("request_latency_seconds")
+    ttft = metrics.quantiles("time_to_first_token_seconds")
+    rate = metrics.quantiles("output_tokens_per_second")
+    print(f"{'tier':>8} {'rule':>18} {'latency p50/p95/p99 (ms)':>26} {'TTFT p50/p95/p99 (ms)':>23} {'tok/s p50':>10}")
+    for labels in sorted(latency):
+        tier, rule = (value for _, value in labels)
+        fmt = lambda q: "/".join(f"{q[p] * 1000:.0f}" for p in RouterMetrics.QUANTILES)
+        print(f"{tier:>8} {rule:>18} {fmt(latency[labels]):>26} {fmt(ttft[labels]):>23} {rate[labels][0.5]:>10.0f}")
+
+    server = serve_metrics(metrics, port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        request = urllib.request.Request(url, headers={"Accept": "application/openmetrics-text"})
+        with urllib.request.urlopen(request) as response:
+            exposition = response.read().decode()
+    finally:
+        server.shutdown()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "router.prom")
+        metrics.write_openmetrics(path)
+        size = os.path.getsize(path)
+    samples = [line for line in exposition.splitlines() if line and not line.startswith("#")]
+    print(f"  /metrics scrape: {len(samples)} samples, {len(exposition)} bytes; OpenMetrics file {size} bytes")
+
+
+# =============================================================================
+# Cost simulation: Monte-Carlo sweep over thresholds and rule changes
+# =============================================================================
+
+def _simulated_classes() -> list[WorkloadClass]:
+    """Traffic mix with per-tier judge-score distributions (mean, sd); tiers come from the rules."""
+    router = RuleBasedRouter()
+
+    def cls(name, weight, example, haiku, sonnet, opus):
+        quality = {ModelTier.HAIKU: haiku, ModelTier.SONNET: sonnet, ModelTier.OPUS: opus}
+        return WorkloadClass(name, weight, router.route(example).model, quality, example)
+
+    return [
+        cls("translation", 0.20, "Translate this email to German", (84, 8), (88, 6), (90, 5)),
+        cls("summaries", 0.20, "Summarize this support thread", (78, 10), (86, 7), (90, 5)),
+        cls("simple_code", 0.15, "Write function to parse ISO dates", (76, 10), (85, 7), (90, 5)),
+        cls("code", 0.15, "Refactor the payment module", (58, 12), (80, 8), (90, 5)),
+        cls("analysis", 0.10, "Analyze churn by plan", (66, 12), (82, 8), (90, 6)),
+        cls("unmatched", 0.10, "What should we name the new team?", (74, 12), (84, 8), (88, 6)),
+        cls("security", 0.10, "Audit the password reset flow", (50, 15), (72, 10), (88, 6)),
+    ]
+
+
+def bench_cost_simulation(requests: int = 1_000_000, thresholds: tuple[float, ...] = (60, 65, 70, 75, 80),
+                          requests_per_day: int = 10_000):
+    """Monte-Carlo cost/latency/quality percentiles across quality thresholds and rule changes."""
+    print(f"\n=== Cost simulation: {requests:,} requests per configuration ===")
+    simulator = WorkloadSimulator(_simulated_classes(), requests_per_day=requests_per_day)
+
+    # Candidate rule change: small code tasks to Haiku, outranking the generic code rule
+    candidate = RuleBasedRouter()
+    candidate.add_rule(RoutingRule(name="small_code", keywords=["write function"], model=ModelTier.HAIKU, priority=60))
+    policies = {"current rules": {}, "small_code->haiku": simulator.routing_policy(candidate)}
+
+    start = time.perf_counter()
+    results = simulator.sensitivity(list(thresholds), policies, requests=requests)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'policy':>18} {'threshold':>9} {'$/month':>9} {'$/req p50/p99':>16} {'latency p50/p95 (s)':>20} "
+          f"{'quality p5':>10} {'pass':>6} {'escalated':>9} {'haiku/sonnet/opus':>18}")
+    for r in results:
+        mix = "/".join(f"{share:.0%}" for share in r.model_distribution.values())
+        print(f"{r.policy:>18} {r.quality_threshold:>9.0f} {r.monthly_cost:>9,.0f} "
+              f"{r.cost_percentiles[50.0]:>7.4f}/{r.cost_percentiles[99.0]:.4f} "
+              f"{r.latency_percentiles[50.0]:>9.1f}/{r.latency_percentiles[95.0]:<10.1f} "
+              f"{r.quality_percentiles[5.0]:>10.0f} {r.quality_pass_rate:>6.1%} {r.escalation_rate:>9.1%} {mix:>18}")
+
+    fixed = CostEstimator.estimate_monthly_cost(requests_per_day)["smart_tiering"]
+    print(f"  {len(results)} configurations x {requests:,} requests in {elapsed:.1f}s; "
+          f"fixed-average CostEstimator says ${fixed:,.0f}/month")
+
+
+# =============================================================================
+# Shadow routing: live vs candidate rules, online and replayed
+# =============================================================================
+
+def candidate_rules() -> RuleBasedRouter:
+    """Candidate rule set: small code tasks to Haiku, plain questions to Haiku instead of the Sonnet default."""
+    router = RuleBasedRouter()
+    router.add_rule(RoutingRule(name="small_code", keywords=["write function", "implement a function"],
+                                model=ModelTier.HAIKU, priority=60))
+    router.add_rule(RoutingRule(name="faq", patterns=[r"^(what|is|where|when|how do i)\b"],
+                                model=ModelTier.HAIKU, priority=10))
+    return router
+
+
+def bench_shadow_replay(tasks: int = 200_000, online: int = 500, process_counts: tuple[int, ...] = (1, 4)):
+    """Disagreements and projected cost delta of a candidate rule set, online shadow and offline replay."""
+    print("\n=== Shadow routing: candidate rules vs live rules ===")
+    workload = [task for task, _ in _learned_workload(tasks, seed=31)]
+    rng = random.Random(31)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Online: the candidate shadows HybridRouter without being executed
+        shadow_log = os.path.join(tmp, "shadow.jsonl")
+        shadow = ShadowRouter(candidate_rules(), log_path=shadow_log)
+        router = HybridRouter(FakeAnthropicClient(), use_llm_classification=False, shadow=shadow)
+        for task in workload[:online]:
+            router.execute(task, max_tokens=256)
+        shadow.flush()
+        shadow.close()
+        stats = shadow.get_stats()
+        with open(shadow_log, encoding="utf-8") as f:
+            logged = sum(1 for _ in f)
+        print(f"  online shadow: {stats['compared']} decisions, {stats['disagreement_rate']:.1%} disagree "
+              f"({logged} logged), projected delta ${stats['projected_cost_delta']:+.4f}")
+
+        # Offline: replay a recorded task log through both rule sets
+        task_log = os.path.join(tmp, "tasks.jsonl")
+        with open(task_log, "w", encoding="utf-8") as f:
+            for task in workload:
+                record = {"task": task, "input_tokens": len(task) // 4 + rng.randrange(200, 2000),
+                          "output_tokens": rng.randrange(100, 1500)}
+                f.write(json.dumps(record) + "\n")
+        records = load_task_log(task_log)
+
+    print(f"{'processes':>10} {'tasks/s':>10} {'disagree':>9} {'live ($)':>10} {'candidate ($)':>14} {'delta':>8}")
+    for processes in process_counts:
+        report = replay_routing(records, RuleBasedRouter, candidate_rules, processes=processes)
+        summary = report.summary()
+        print(f"{processes:>10} {summary['tasks_per_second']:>10,} {report.disagreement_rate:>9.1%} "
+              f"{report.live_cost:>10.2f} {report.candidate_cost:>14.2f} {summary['projected_cost_delta_pct']:>+7.1f}%")
+    top = ", ".join(f"{k} {v}" for k, v in list(summary["transitions"].items())[:4])
+    print(f"  transitions: {top}")
+    example = report.examples[0]
+    print(f"  e.g. {example['task']!r}: {example['live']['rule']} ({example['live']['model']}) -> "
+          f"{example['candidate']['rule']} ({example['candidate']['model']})")
+
+
+# =============================================================================
+# Prompt caching: shared system context and the judge's answer prefix
+# =============================================================================
+
+def _shared_context(tokens: int, seed: int) -> str:
+    rng = random.Random(seed)
+    words = ("policy account order refund shipping warranty invoice region customer escalation "
+             "billing support tier contract renewal discount").split()
+    lines, length = ["You are the support assistant for Example Corp. Reference material:"], 0
+    while length < tokens * 4:
+        line = f"- {' '.join(rng.choices(words, k=12))}."
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+
+def bench_prompt_caching(tasks: int = 200, context_tokens: int = 3_000, seed: int = 13):
+    """Billed input tokens and cost with and without prompt-prefix caching, by execution path."""
+    print(f"\n=== Prompt caching: {tasks} tasks sharing a {context_tokens}-token system prompt ===")
+    rng = random.Random(seed)
+    workload = [rng.choice(ESCALATION_TASKS)[0] for _ in range(tasks)]
+    system_prompt = _shared_context(context_tokens, seed)
+    # The rules send these to Haiku; make some of them fail there so they escalate
+    difficulty = {**dict(ESCALATION_TASKS), "Extract all dates from this contract": 1,
+                  "Summarize this paragraph in one sentence": 2}
+
+    print(f"{'caching':>8} {'path':>20} {'tasks':>6} {'input':>10} {'cache write':>12} {'cache read':>11} "
+          f"{'cost ($)':>9} {'$/task':>8}")
+    totals = {}
+    for prompt_caching in (False, True):
+        with MockAnthropicServer(difficulty=difficulty) as server:
+            client = anthropic.Anthropic(base_url=server.base_url, api_key="mock", max_retries=0)
+            router = HybridRouter(client, use_llm_classification=False, prompt_caching=prompt_caching)
+            by_path: dict[str, dict[str, float]] = {}
+            for task in workload:
+                before = server.billing
+                result = router.execute(task, max_tokens=256, system_prompt=system_prompt)
+                if result.quality_score is None:
+                    path = "direct"
+                else:
+                    path = "escalated" if result.escalated else "judged, kept Haiku"
+                row = by_path.setdefault(path, dict.fromkeys(["tasks", *before], 0.0))
+                row["tasks"] += 1
+                for name, value in server.billing.items():
+                    row[name] += value - before[name]
+            billing = server.billing
+            client.close()
+
+        label = "on" if prompt_caching else "off"
+        for path, row in sorted(by_path.items()) + [("all", {"tasks": tasks, **billing})]:
+            print(f"{label:>8} {path:>20} {row['tasks']:>6.0f} {row['input_tokens']:>10,.0f} "
+                  f"{row['cache_creation_input_tokens']:>12,.0f} {row['cache_read_input_tokens']:>11,.0f} "
+                  f"{row['cost']:>9.4f} {row['cost'] / row['tasks']:>8.5f}")
+        totals[prompt_caching] = by_path
+
+    for path in totals[True]:
+        off, on = totals[False][path], totals[True][path]
+        print(f"  {path}: {1 - on['cost'] / off['cost']:.1%} cheaper with caching")
+
+
+BENCHMARKS = {
+    "rule_routing": bench_rule_routing,
+    "classification_cache": bench_classification_cache,
+    "speculative_escalation": bench_speculative_escalation,
+    "async_router": bench_async_router,
+    "learned_routing": bench_learned_routing,
+    "quality_evaluator": bench_quality_evaluator,
+    "streaming_telemetry": bench_streaming_telemetry,
+    "cost_simulation": bench_cost_simulation,
+    "shadow_replay": bench_shadow_replay,
+    "prompt_caching": bench_prompt_caching,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run model tiering benchmarks")
+    parser.add_argument("names", nargs="*", metavar="NAME",
+                        help=f"Benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("--corpus", metavar="PATH",
+                        help="Judged responses (JSON Lines from CascadingEvaluator) for 'quality_evaluator'")
+    args = parser.parse_args()
+    unknown = [n for n in args.names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    for name in args.names or BENCHMARKS:
+        if name == "quality_evaluator" and args.corpus:
+            bench_quality_evaluator(corpus_path=args.corpus)
+        else:
+            BENCHMARKS[name]()
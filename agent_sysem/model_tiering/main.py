@@ -9,22 +9,40 @@ Strategies:
 2. LLM-Assisted Classification - Use Haiku for task classification
 3. Dynamic Quality Escalation - Start cheap, upgrade if needed
 4. Hybrid Intelligent Router - Combines all approaches
+5. Learned Routing - Tier classifier trained on logged outcomes
 
 Reference: https://yennj12.js.org/yennj12_blog_V4/posts/model-tiering-cost-optimization-guide-zh/
 """
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
+import multiprocessing
+import os
 import re
+import threading
+import time
+import zlib
 from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from statistics import NormalDist
+from typing import Any, Callable, Generator, Iterator
 
 import anthropic
+import numpy as np
 from pydantic import BaseModel
 
+try:
+    import yaml
+except ImportError:  # Optional: only needed to load YAML rule files
+    yaml = None
+
 
 class ModelTier(str, Enum):
     """Claude model tiers from cheapest to most capable."""
@@ -55,22 +73,80 @@ class TaskCategory(str, Enum):
     GENERAL = "general"            # General purpose
 
 
-# Pricing per 1M tokens (as of 2025)
+# Pricing per 1M tokens (as of 2025); cache writes (5-minute TTL) are 1.25x input, cache reads 0.1x
 MODEL_PRICING = {
-    ModelTier.HAIKU: {"input": 0.80, "output": 4.00},
-    ModelTier.SONNET: {"input": 3.00, "output": 15.00},
-    ModelTier.OPUS: {"input": 15.00, "output": 75.00},
+    ModelTier.HAIKU: {"input": 0.80, "output": 4.00, "cache_write": 1.00, "cache_read": 0.08},
+    ModelTier.SONNET: {"input": 3.00, "output": 15.00, "cache_write": 3.75, "cache_read": 0.30},
+    ModelTier.OPUS: {"input": 15.00, "output": 75.00, "cache_write": 18.75, "cache_read": 1.50},
+}
+
+# Shortest prefix the API will cache, in tokens; shorter marked prefixes are simply not cached
+MIN_CACHEABLE_TOKENS = {
+    ModelTier.HAIKU: 2048,
+    ModelTier.SONNET: 1024,
+    ModelTier.OPUS: 1024,
 }
 
 
 @dataclass
 class RoutingRule:
-    """A single routing rule for task-to-model mapping."""
+    """
+    A single routing rule for task-to-model mapping.
+
+    Rules are normally declared as data: the rule matches when any keyword
+    (case-insensitive substring) or regex pattern is found, none of the
+    exclude keywords is present, and the task length is within bounds.
+    A rule with no keywords or patterns matches on length alone.
+    An optional condition callable is ANDed in; rules that use one are
+    evaluated individually instead of through the compiled matcher.
+    """
     name: str
-    condition: Callable[[str], bool]
-    model: ModelTier
+    condition: Callable[[str], bool] | None = None
+    model: ModelTier = ModelTier.SONNET
     priority: int = 0
     description: str = ""
+    keywords: list[str] = field(default_factory=list)
+    patterns: list[str] = field(default_factory=list)
+    exclude: list[str] = field(default_factory=list)
+    min_length: int = 0
+    max_length: int | None = None
+
+    def matches(self, task: str) -> bool:
+        """Evaluate this rule alone (the slow path used for condition rules)."""
+        if len(task) < self.min_length:
+            return False
+        if self.max_length is not None and len(task) > self.max_length:
+            return False
+        lowered = task.lower()
+        if any(kw.lower() in lowered for kw in self.exclude):
+            return False
+        if self.keywords or self.patterns:
+            if not (
+                any(kw.lower() in lowered for kw in self.keywords)
+                or any(re.search(p, task, re.IGNORECASE) for p in self.patterns)
+            ):
+                return False
+        return self.condition is None or self.condition(task)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> RoutingRule:
+        """Build a rule from a YAML/JSON mapping; model may be a tier name or model id."""
+        model = data.get("model", ModelTier.SONNET.name)
+        try:
+            tier = ModelTier[str(model).upper()]
+        except KeyError:
+            tier = ModelTier(model)
+        return cls(
+            name=data["name"],
+            model=tier,
+            priority=int(data.get("priority", 0)),
+            description=data.get("description", ""),
+            keywords=list(data.get("keywords", [])),
+            patterns=list(data.get("patterns", [])),
+            exclude=list(data.get("exclude", [])),
+            min_length=int(data.get("min_length", 0)),
+            max_length=data.get("max_length"),
+        )
 
 
 @dataclass
@@ -103,6 +179,27 @@ class ExecutionResult:
     cost: float
     quality_score: float | None = None
     escalated: bool = False
+    latency_seconds: float = 0.0  # Wall time of the whole execution
+    serial_latency_seconds: float = 0.0  # Same calls run back to back (equals latency unless speculating)
+    wasted_cost: float = 0.0  # Cost of speculative calls whose answer was discarded (included in cost)
+    speculated: bool = False
+    first_token_seconds: float | None = None  # Start to first token of the returned answer (streaming only)
+    tokens_per_second: float | None = None  # Generation rate of the returned answer (streaming only)
+    cache_creation_input_tokens: int = 0  # Prompt tokens written to the cache (not in input_tokens)
+    cache_read_input_tokens: int = 0  # Prompt tokens served from the cache (not in input_tokens)
+
+
+@dataclass
+class StreamUpdate:
+    """One step of a streamed execution."""
+    text: str  # New text since the previous update ("" on restart and final updates)
+    model: ModelTier
+    elapsed_seconds: float
+    output_tokens: int  # Of the current attempt; estimated from text until it completes
+    running_cost: float  # All attempts so far, including the current one's tokens so far
+    cost_by_tier: dict[ModelTier, float] = field(default_factory=dict)
+    restart: bool = False  # Escalating: discard the text so far, the next tier starts over
+    result: ExecutionResult | None = None  # Set on the final update only
 
 
 @dataclass
@@ -113,6 +210,8 @@ class RouterStats:
     total_cost: float = 0.0
     escalations: int = 0
     rule_hits: dict[str, int] = field(default_factory=dict)
+    classification_cache_hits: dict[str, int] = field(default_factory=dict)  # By cache level
+    classification_cache_misses: int = 0
 
     def record(self, result: ExecutionResult, decision: RoutingDecision) -> None:
         """Record an execution result."""
@@ -128,6 +227,15 @@ class RouterStats:
                 self.rule_hits.get(decision.rule_matched, 0) + 1
             )
 
+    def record_classification(self, cache_level: str | None) -> None:
+        """Record a classification lookup; cache_level is None on a miss (LLM call)."""
+        if cache_level is None:
+            self.classification_cache_misses += 1
+        else:
+            self.classification_cache_hits[cache_level] = (
+                self.classification_cache_hits.get(cache_level, 0) + 1
+            )
+
     def summary(self) -> dict[str, Any]:
         """Generate summary statistics."""
         return {
@@ -141,19 +249,522 @@ class RouterStats:
                 if self.total_requests > 0 else 0
             ),
             "rule_hits": self.rule_hits,
+            "classification_cache": self._classification_cache_summary(),
+        }
+
+    def _classification_cache_summary(self) -> dict[str, Any]:
+        hits = sum(self.classification_cache_hits.values())
+        lookups = hits + self.classification_cache_misses
+        return {
+            "hits": dict(self.classification_cache_hits),
+            "misses": self.classification_cache_misses,
+            "hit_rate": hits / lookups if lookups > 0 else 0,
+        }
+
+
+class RouterMetrics:
+    """
+    Prometheus/OpenMetrics telemetry for routed executions.
+
+    Counters (requests, tokens, cost, escalations) by tier, and latency,
+    time-to-first-token and tokens/sec by tier and rule: histograms for
+    aggregation across processes plus p50/p95/p99 over the last `window`
+    observations of each series. Export with render(), write_openmetrics()
+    or serve_metrics().
+    """
+
+    QUANTILES = (0.5, 0.95, 0.99)
+    LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+    COUNTERS = {
+        "requests": "Routed executions.",
+        "escalations": "Executions that escalated past their routed tier.",
+        "input_tokens": "Input tokens billed, including discarded attempts.",
+        "output_tokens": "Output tokens billed, including discarded attempts.",
+        "cache_creation_input_tokens": "Prompt tokens written to the prompt cache.",
+        "cache_read_input_tokens": "Prompt tokens read from the prompt cache.",
+        "cost_dollars": "Estimated spend in US dollars.",
+    }
+    DISTRIBUTIONS = {
+        "request_latency_seconds": ("Wall time of an execution.", True),
+        "time_to_first_token_seconds": ("Start of an execution to the first token of its answer.", True),
+        "output_tokens_per_second": ("Generation rate of the returned answer.", False),
+    }
+
+    def __init__(self, prefix: str = "model_router", window: int = 1024) -> None:
+        self.prefix = prefix
+        self.window = window
+        self._counters: dict[str, dict[tuple, float]] = {name: {} for name in self.COUNTERS}
+        self._histograms: dict[str, dict[tuple, list]] = {name: {} for name in self.DISTRIBUTIONS}
+        self._recent: dict[str, dict[tuple, deque]] = {name: {} for name in self.DISTRIBUTIONS}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def labels_for(decision: RoutingDecision, model: ModelTier) -> tuple[tuple[str, str], ...]:
+        return (("tier", model.name.lower()), ("rule", decision.rule_matched or decision.strategy))
+
+    def _count(self, name: str, labels: tuple, amount: float) -> None:
+        series = self._counters[name]
+        series[labels] = series.get(labels, 0.0) + amount
+
+    def _observe(self, name: str, labels: tuple, value: float) -> None:
+        histogram = self._histograms[name].get(labels)
+        if histogram is None:
+            histogram = self._histograms[name][labels] = [[0] * len(self.LATENCY_BUCKETS), 0.0, 0]
+        for i, bound in enumerate(self.LATENCY_BUCKETS):
+            if value <= bound:
+                histogram[0][i] += 1
+        histogram[1] += value
+        histogram[2] += 1
+        recent = self._recent[name].get(labels)
+        if recent is None:
+            recent = self._recent[name][labels] = deque(maxlen=self.window)
+        recent.append(value)
+
+    def observe(self, result: ExecutionResult, decision: RoutingDecision) -> None:
+        """Record one finished execution."""
+        labels = self.labels_for(decision, result.model_used)
+        tier = labels[:1]
+        with self._lock:
+            self._count("requests", labels, 1)
+            self._count("escalations", tier, int(result.escalated))
+            self._count("input_tokens", tier, result.input_tokens)
+            self._count("output_tokens", tier, result.output_tokens)
+            self._count("cache_creation_input_tokens", tier, result.cache_creation_input_tokens)
+            self._count("cache_read_input_tokens", tier, result.cache_read_input_tokens)
+            self._count("cost_dollars", tier, result.cost)
+            self._observe("request_latency_seconds", labels, result.latency_seconds)
+            if result.first_token_seconds is not None:
+                self._observe("time_to_first_token_seconds", labels, result.first_token_seconds)
+            if result.tokens_per_second is not None:
+                self._observe("output_tokens_per_second", labels, result.tokens_per_second)
+
+    def quantiles(self, name: str = "request_latency_seconds") -> dict[tuple, dict[float, float]]:
+        """p50/p95/p99 of a distribution over the recent window, by label set."""
+        with self._lock:
+            recent = {labels: np.fromiter(values, dtype=np.float64) for labels, values in self._recent[name].items()}
+        return {
+            labels: dict(zip(self.QUANTILES, np.quantile(values, self.QUANTILES).tolist()))
+            for labels, values in recent.items()
         }
 
+    @staticmethod
+    def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+        escape = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs = [f'{key}="{escape(value)}"' for key, value in labels + extra]
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    @staticmethod
+    def _format_value(value: float) -> str:
+        return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+    def render(self, openmetrics: bool = False) -> str:
+        """Text exposition: Prometheus 0.0.4 format, or OpenMetrics 1.0 when openmetrics is set."""
+        quantiles = {name: self.quantiles(name) for name in self.DISTRIBUTIONS}
+        lines: list[str] = []
+        with self._lock:
+            for name, help_text in self.COUNTERS.items():
+                family = f"{self.prefix}_{name}"
+                declared = family if openmetrics else f"{family}_total"
+                lines += [f"# HELP {declared} {help_text}", f"# TYPE {declared} counter"]
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append(f"{family}_total{self._format_labels(labels)} {self._format_value(value)}")
+
+            for name, (help_text, as_histogram) in self.DISTRIBUTIONS.items():
+                family = f"{self.prefix}_{name}"
+                if as_histogram:
+                    lines += [f"# HELP {family} {help_text}", f"# TYPE {family} histogram"]
+                    for labels, (buckets, total, count) in sorted(self._histograms[name].items()):
+                        for bound, cumulative in zip(self.LATENCY_BUCKETS, buckets):
+                            lines.append(f"{family}_bucket{self._format_labels(labels, (('le', str(bound)),))} {cumulative}")
+                        lines.append(f'{family}_bucket{self._format_labels(labels, (("le", "+Inf"),))} {count}')
+                        lines.append(f"{family}_sum{self._format_labels(labels)} {self._format_value(total)}")
+                        lines.append(f"{family}_count{self._format_labels(labels)} {count}")
+
+                summary = family.replace("_seconds", "_quantiles_seconds") if as_histogram else family
+                lines += [f"# HELP {summary} {help_text} Quantiles over the last {self.window} observations.",
+                          f"# TYPE {summary} summary"]
+                for labels, values in sorted(quantiles[name].items()):
+                    for q, value in values.items():
+                        lines.append(f"{summary}{self._format_labels(labels, (('quantile', str(q)),))} {value!r}")
+                    _, total, count = self._histograms[name][labels]
+                    lines.append(f"{summary}_sum{self._format_labels(labels)} {self._format_value(total)}")
+                    lines.append(f"{summary}_count{self._format_labels(labels)} {count}")
+
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_openmetrics(self, path: str) -> None:
+        """Atomically write an OpenMetrics file (e.g. for node_exporter's textfile collector)."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render(openmetrics=True))
+        os.replace(tmp_path, path)
+
+
+def serve_metrics(metrics: RouterMetrics, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve GET /metrics from a daemon thread; call shutdown() on the returned server to stop."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+            body = metrics.render(openmetrics).encode("utf-8")
+            self.send_response(200)
+            self.send_header(
+                "Content-Type",
+                "application/openmetrics-text; version=1.0.0; charset=utf-8" if openmetrics
+                else "text/plain; version=0.0.4; charset=utf-8",
+            )
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass  # Scrapes are frequent; keep stderr quiet
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="router-metrics", daemon=True).start()
+    return server
+
 
 def calculate_cost(
     model: ModelTier,
     input_tokens: int,
-    output_tokens: int
+    output_tokens: int,
+    cache_creation_input_tokens: int = 0,
+    cache_read_input_tokens: int = 0,
 ) -> float:
-    """Calculate cost for a model call."""
+    """Calculate cost for a model call. input_tokens excludes cached prompt tokens, as in API usage."""
     pricing = MODEL_PRICING[model]
     input_cost = (input_tokens / 1_000_000) * pricing["input"]
     output_cost = (output_tokens / 1_000_000) * pricing["output"]
-    return input_cost + output_cost
+    cache_cost = (
+        (cache_creation_input_tokens / 1_000_000) * pricing["cache_write"]
+        + (cache_read_input_tokens / 1_000_000) * pricing["cache_read"]
+    )
+    return input_cost + output_cost + cache_cost
+
+
+def usage_tokens(usage: Any) -> tuple[int, int, int, int]:
+    """(input, output, cache write, cache read) tokens from an API usage object."""
+    return (
+        usage.input_tokens,
+        usage.output_tokens,
+        getattr(usage, "cache_creation_input_tokens", None) or 0,
+        getattr(usage, "cache_read_input_tokens", None) or 0,
+    )
+
+
+def _text_block(text: str, cache: bool) -> dict[str, Any]:
+    block: dict[str, Any] = {"type": "text", "text": text}
+    if cache:
+        block["cache_control"] = {"type": "ephemeral"}
+    return block
+
+
+def build_request(
+    task: str,
+    system_prompt: str | None = None,
+    cache_system: bool = False,
+    cache_task: bool = False,
+) -> dict[str, Any]:
+    """
+    Messages API kwargs laid out for prefix caching.
+
+    Shared context goes in the system prompt and the task in its own
+    content block, so every call about the same task (each tier, the
+    quality judge) starts with an identical prefix. cache_system and
+    cache_task place cache breakpoints after each part.
+    """
+    request: dict[str, Any] = {
+        "messages": [{"role": "user", "content": [_text_block(task, cache_task)]}],
+    }
+    if system_prompt:
+        request["system"] = [_text_block(system_prompt, cache_system)]
+    return request
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over lowercase keywords.
+
+    Finds every keyword occurring in a text in a single pass, independent
+    of the number of keywords.
+    """
+
+    def __init__(self, keywords: list[str]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[tuple[int, ...]] = [()]
+        for index, keyword in enumerate(keywords):
+            self._insert(keyword, index)
+        self._build_failure_links()
+
+    def _insert(self, keyword: str, index: int) -> None:
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = nxt
+        self._output[state] += (index,)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # Inherit matches that end here via the suffix link
+                self._output[nxt] += self._output[self._fail[nxt]]
+
+    def find_all(self, text: str) -> set[int]:
+        """Return indices of all keywords occurring in text."""
+        goto, fail, output = self._goto, self._fail, self._output
+        found: set[int] = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class CompiledRuleSet:
+    """
+    Declarative rules compiled for one-pass matching.
+
+    All keywords and exclude keywords share one Aho-Corasick automaton;
+    regex patterns are OR-ed into one prefilter and only checked per rule
+    when it fires. match() returns positions of every matching rule, so the
+    caller can pick the highest priority one. Rules with a condition callable
+    are skipped and left to the caller.
+    """
+
+    def __init__(self, rules: list[RoutingRule]) -> None:
+        self.rules = rules
+        keyword_ids: dict[str, int] = {}
+        self._includes: list[list[int]] = []  # keyword id -> rule positions
+        self._excludes: list[list[int]] = []
+        self._length_only: list[int] = []
+        self._regex_rules: list[tuple[int, re.Pattern]] = []
+
+        def keyword_id(keyword: str) -> int:
+            keyword = keyword.lower()
+            if keyword not in keyword_ids:
+                keyword_ids[keyword] = len(keyword_ids)
+                self._includes.append([])
+                self._excludes.append([])
+            return keyword_ids[keyword]
+
+        for position, rule in enumerate(rules):
+            if rule.condition is not None:
+                continue
+            for kw in rule.keywords:
+                self._includes[keyword_id(kw)].append(position)
+            for kw in rule.exclude:
+                self._excludes[keyword_id(kw)].append(position)
+            if rule.patterns:
+                combined = "|".join(f"(?:{p})" for p in rule.patterns)
+                self._regex_rules.append((position, re.compile(combined, re.IGNORECASE)))
+            if not rule.keywords and not rule.patterns:
+                self._length_only.append(position)
+
+        self._automaton = KeywordAutomaton(list(keyword_ids))
+        self._regex_prefilter = (
+            re.compile("|".join(f"(?:{p.pattern})" for _, p in self._regex_rules), re.IGNORECASE)
+            if self._regex_rules else None
+        )
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def match(self, task: str) -> list[int]:
+        """Return positions (in priority order) of all rules matching task."""
+        candidates: set[int] = set(self._length_only)
+        excluded: set[int] = set()
+        for kw in self._automaton.find_all(task.lower()):
+            candidates.update(self._includes[kw])
+            excluded.update(self._excludes[kw])
+
+        if self._regex_prefilter is not None and self._regex_prefilter.search(task):
+            for position, pattern in self._regex_rules:
+                if position not in candidates and pattern.search(task):
+                    candidates.add(position)
+
+        length = len(task)
+        matched = []
+        for position in sorted(candidates - excluded):
+            rule = self.rules[position]
+            if length < rule.min_length or (rule.max_length is not None and length > rule.max_length):
+                continue
+            matched.append(position)
+        return matched
+
+
+def load_rules_file(path: str) -> list[RoutingRule]:
+    """
+    Load declarative rules from a YAML (needs pyyaml) or JSON file.
+
+    Expected layout: {"rules": [{"name", "model", "priority", "keywords",
+    "patterns", "exclude", "min_length", "max_length", "description"}, ...]}
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if path.endswith((".yaml", ".yml")):
+        if yaml is None:
+            raise ImportError("pyyaml is required to load YAML rule files: pip install pyyaml")
+        data = yaml.safe_load(text) or {}
+    else:
+        data = json.loads(text)
+    return [RoutingRule.from_dict(item) for item in data.get("rules", [])]
+
+
+# What a malformed or half-written rules file can raise from load_rules_file() or compiling its rules
+RULES_FILE_ERRORS = (
+    OSError, json.JSONDecodeError, KeyError, ValueError, TypeError, AttributeError, re.error,
+) + ((yaml.YAMLError,) if yaml is not None else ())
+
+
+class HashingEmbedder:
+    """
+    Local text embedding via feature hashing of words and bigrams.
+    No model download or network call; any object with the same embed()
+    signature can be passed to ClassificationCache instead.
+    """
+
+    def __init__(self, dim: int = 256) -> None:
+        self.dim = dim
+
+    def embed(self, text: str) -> np.ndarray:
+        """Return an L2-normalized float32 vector."""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = re.findall(r"[\w']+", text.lower())
+        for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            h = zlib.crc32(token.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+
+@dataclass
+class ClassificationCacheConfig:
+    """Configuration for the two-level classification cache."""
+    max_entries: int = 10_000  # Exact-match LRU size
+    ttl_seconds: float = 3600.0  # Applies to both levels
+    semantic: bool = True  # Enable nearest-neighbour lookup on exact misses
+    semantic_max_entries: int = 5_000  # Oldest embeddings are overwritten first
+    similarity_threshold: float = 0.9  # Cosine similarity needed for a semantic hit
+
+
+class ClassificationCache:
+    """
+    Two-level cache in front of the LLM classifier.
+
+    Level 1 ("exact") is an LRU keyed by normalized task text. Level 2
+    ("semantic") embeds the task and returns the classification of the most
+    similar past task if it clears the similarity threshold; its vectors live
+    in a fixed-size NumPy ring buffer. Expired entries are never returned.
+    """
+
+    def __init__(
+        self,
+        config: ClassificationCacheConfig | None = None,
+        embedder: HashingEmbedder | None = None,
+    ) -> None:
+        self.config = config or ClassificationCacheConfig()
+        self.embedder = embedder or HashingEmbedder()
+        self._lock = threading.Lock()
+        self._exact: OrderedDict[str, tuple[ClassificationResult, float]] = OrderedDict()
+        capacity = self.config.semantic_max_entries
+        self._vectors = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+        self._created = np.full(capacity, -np.inf)  # -inf marks an empty slot
+        self._results: list[ClassificationResult | None] = [None] * capacity
+        self._next_slot = 0
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    @staticmethod
+    def normalize(task: str) -> str:
+        return " ".join(task.lower().split())
+
+    def get(self, task: str) -> tuple[ClassificationResult | None, str | None]:
+        """Return (classification, level) where level is "exact", "semantic" or None on a miss."""
+        key = self.normalize(task)
+        now = time.time()
+        with self._lock:
+            entry = self._exact.get(key)
+            if entry is not None:
+                result, created = entry
+                if now - created <= self.config.ttl_seconds:
+                    self._exact.move_to_end(key)
+                    self.stats["exact_hits"] += 1
+                    return result, "exact"
+                del self._exact[key]
+                self.stats["expired"] += 1
+
+            if self.config.semantic and self.config.semantic_max_entries > 0:
+                scores = self._vectors @ self.embedder.embed(key)
+                scores[now - self._created > self.config.ttl_seconds] = -np.inf
+                best = int(np.argmax(scores))
+                if scores[best] >= self.config.similarity_threshold:
+                    self.stats["semantic_hits"] += 1
+                    return self._results[best], "semantic"
+
+            self.stats["misses"] += 1
+            return None, None
+
+    def put(self, task: str, result: ClassificationResult) -> None:
+        key = self.normalize(task)
+        now = time.time()
+        with self._lock:
+            self._exact[key] = (result, now)
+            self._exact.move_to_end(key)
+            while len(self._exact) > self.config.max_entries:
+                self._exact.popitem(last=False)
+                self.stats["evictions"] += 1
+
+            if self.config.semantic and self.config.semantic_max_entries > 0:
+                slot = self._next_slot
+                if self._results[slot] is not None:
+                    self.stats["evictions"] += 1
+                self._vectors[slot] = self.embedder.embed(key)
+                self._created[slot] = now
+                self._results[slot] = result
+                self._next_slot = (slot + 1) % self.config.semantic_max_entries
+
+    def clear(self) -> None:
+        with self._lock:
+            self._exact.clear()
+            self._vectors[:] = 0
+            self._created[:] = -np.inf
+            self._results = [None] * self.config.semantic_max_entries
+            self._next_slot = 0
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+            lookups = hits + self.stats["misses"]
+            return {
+                **self.stats,
+                "exact_entries": len(self._exact),
+                "semantic_entries": sum(r is not None for r in self._results),
+                "hit_rate": hits / lookups if lookups > 0 else 0,
+            }
 
 
 class RoutingStrategy(ABC):
@@ -170,22 +781,40 @@ class RuleBasedRouter(RoutingStrategy):
     Rule-based routing using predefined conditions.
 
     Fastest approach with zero LLM cost for routing decisions.
+    Declarative rules are compiled into a single matcher, so routing cost
+    grows with task length rather than with the number of rules. Rules can
+    be loaded from a YAML/JSON file and hot-reloaded when it changes.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        rules_path: str | None = None,
+        reload_interval: float = 2.0,
+    ) -> None:
         self.rules: list[RoutingRule] = []
-        self._setup_default_rules()
+        self._compiled: CompiledRuleSet | None = None
+        self._condition_positions: list[int] = []
+        self.rules_path = rules_path
+        self.reload_interval = reload_interval
+        self._rules_mtime: float | None = None
+        self._next_reload_check = 0.0
+        self.reload_errors = 0
+        self.last_reload_error: str | None = None
+        if rules_path:
+            self.load_rules(rules_path)
+        else:
+            self._setup_default_rules()
 
     def _setup_default_rules(self) -> None:
         """Initialize default routing rules."""
         # Security-critical tasks -> Opus
         self.add_rule(RoutingRule(
             name="security_critical",
-            condition=lambda t: any(kw in t.lower() for kw in [
+            keywords=[
                 "security", "vulnerability", "exploit", "authentication",
                 "authorization", "encryption", "password", "credential",
                 "injection", "xss", "csrf", "sql injection"
-            ]),
+            ],
             model=ModelTier.OPUS,
             priority=100,
             description="Security-critical tasks require highest accuracy"
@@ -194,10 +823,10 @@ class RuleBasedRouter(RoutingStrategy):
         # Complex reasoning -> Opus
         self.add_rule(RoutingRule(
             name="complex_reasoning",
-            condition=lambda t: any(kw in t.lower() for kw in [
+            keywords=[
                 "prove", "derive", "mathematical proof", "complex algorithm",
                 "architectural design", "system design", "trade-off analysis"
-            ]),
+            ],
             model=ModelTier.OPUS,
             priority=90,
             description="Complex reasoning tasks"
@@ -206,10 +835,10 @@ class RuleBasedRouter(RoutingStrategy):
         # Code generation/review -> Sonnet
         self.add_rule(RoutingRule(
             name="code_tasks",
-            condition=lambda t: any(kw in t.lower() for kw in [
+            keywords=[
                 "implement", "refactor", "debug", "code review",
                 "write function", "create class", "fix bug"
-            ]),
+            ],
             model=ModelTier.SONNET,
             priority=50,
             description="Code-related tasks"
@@ -218,9 +847,9 @@ class RuleBasedRouter(RoutingStrategy):
         # Analysis tasks -> Sonnet
         self.add_rule(RoutingRule(
             name="analysis_tasks",
-            condition=lambda t: any(kw in t.lower() for kw in [
+            keywords=[
                 "analyze", "compare", "evaluate", "assess", "investigate"
-            ]),
+            ],
             model=ModelTier.SONNET,
             priority=40,
             description="Analysis tasks"
@@ -229,9 +858,9 @@ class RuleBasedRouter(RoutingStrategy):
         # Simple translation -> Haiku
         self.add_rule(RoutingRule(
             name="translation",
-            condition=lambda t: any(kw in t.lower() for kw in [
+            keywords=[
                 "translate", "翻譯", "翻译", "translation"
-            ]),
+            ],
             model=ModelTier.HAIKU,
             priority=30,
             description="Translation tasks"
@@ -240,9 +869,9 @@ class RuleBasedRouter(RoutingStrategy):
         # Summarization -> Haiku
         self.add_rule(RoutingRule(
             name="summarization",
-            condition=lambda t: any(kw in t.lower() for kw in [
+            keywords=[
                 "summarize", "summary", "tldr", "brief overview", "摘要"
-            ]),
+            ],
             model=ModelTier.HAIKU,
             priority=30,
             description="Summarization tasks"
@@ -251,9 +880,9 @@ class RuleBasedRouter(RoutingStrategy):
         # Simple extraction -> Haiku
         self.add_rule(RoutingRule(
             name="extraction",
-            condition=lambda t: any(kw in t.lower() for kw in [
+            keywords=[
                 "extract", "parse", "find all", "list the", "get the"
-            ]),
+            ],
             model=ModelTier.HAIKU,
             priority=20,
             description="Data extraction tasks"
@@ -262,10 +891,10 @@ class RuleBasedRouter(RoutingStrategy):
         # Format conversion -> Haiku
         self.add_rule(RoutingRule(
             name="format_conversion",
-            condition=lambda t: any(kw in t.lower() for kw in [
+            keywords=[
                 "convert to json", "convert to yaml", "format as",
                 "reformat", "convert format"
-            ]),
+            ],
             model=ModelTier.HAIKU,
             priority=20,
             description="Format conversion tasks"
@@ -275,17 +904,87 @@ class RuleBasedRouter(RoutingStrategy):
         """Add a routing rule."""
         self.rules.append(rule)
         self.rules.sort(key=lambda r: r.priority, reverse=True)
+        self._compiled = None
+
+    def load_rules(self, path: str) -> None:
+        """
+        Replace the declarative rules with those in a YAML/JSON file.
+        Rules with a condition callable (added in code) are kept.
+        """
+        mtime = os.path.getmtime(path)
+        kept = [r for r in self.rules if r.condition is not None]
+        self.set_rules(kept + load_rules_file(path))
+        self.rules_path = path
+        self._rules_mtime = mtime
+
+    def set_rules(self, rules: list[RoutingRule]) -> None:
+        """Replace all rules and compile them immediately."""
+        rules = sorted(rules, key=lambda r: r.priority, reverse=True)
+        compiled = CompiledRuleSet(rules)
+        condition_positions = [i for i, r in enumerate(rules) if r.condition is not None]
+        # Swap everything at once so concurrent route() calls see old or new rules, never a mix
+        self.rules, self._compiled, self._condition_positions = rules, compiled, condition_positions
+
+    def _maybe_reload(self) -> None:
+        """
+        Reload the rules file if it changed, checking at most every reload_interval seconds.
+        A file that fails to load is counted in reload_errors and not retried until it changes again.
+        """
+        now = time.monotonic()
+        if now < self._next_reload_check:
+            return
+        self._next_reload_check = now + self.reload_interval
+        try:
+            mtime = os.path.getmtime(self.rules_path)
+        except OSError:
+            return  # Keep serving the last good rules
+        if mtime != self._rules_mtime:
+            try:
+                self.load_rules(self.rules_path)
+            except RULES_FILE_ERRORS as exc:
+                # load_rules() swaps rules only once parsed and compiled, so the last good set stays
+                self._rules_mtime = mtime
+                self.reload_errors += 1
+                self.last_reload_error = f"{type(exc).__name__}: {exc}"
+
+    def _snapshot(self) -> tuple[list[RoutingRule], CompiledRuleSet, list[int]]:
+        """Return a consistent (rules, compiled, condition positions), compiling if rules changed."""
+        if self.rules_path:
+            self._maybe_reload()
+        if self._compiled is None:
+            self._condition_positions = [i for i, r in enumerate(self.rules) if r.condition is not None]
+            self._compiled = CompiledRuleSet(self.rules)
+        return self.rules, self._compiled, self._condition_positions
+
+    def match_all(self, task: str) -> list[RoutingRule]:
+        """Return every rule matching task, highest priority first."""
+        rules, compiled, condition_positions = self._snapshot()
+        positions = set(compiled.match(task))
+        positions.update(i for i in condition_positions if rules[i].matches(task))
+        return [rules[i] for i in sorted(positions)]
 
     def route(self, task: str) -> RoutingDecision:
         """Route task based on rules."""
-        for rule in self.rules:
-            if rule.condition(task):
-                return RoutingDecision(
-                    model=rule.model,
-                    strategy="rule_based",
-                    confidence=1.0,
-                    rule_matched=rule.name,
-                )
+        rules, compiled, condition_positions = self._snapshot()
+
+        matched = compiled.match(task)
+        best = matched[0] if matched else len(rules)
+        # Condition rules can't be compiled; only those outranking the best match need evaluating
+        for position in condition_positions:
+            if position >= best:
+                break
+            if rules[position].matches(task):
+                best = position
+                break
+
+        if best < len(rules):
+            rule = rules[best]
+            return RoutingDecision(
+                model=rule.model,
+                strategy="rule_based",
+                confidence=1.0,
+                rule_matched=rule.name,
+            )
 
         # Default to Sonnet for unmatched tasks
         return RoutingDecision(
@@ -337,16 +1036,23 @@ Respond ONLY with the JSON object, no other text."""
         TaskCategory.EXTRACTION: ModelTier.HAIKU,
     }
 
-    def __init__(self, client: anthropic.Anthropic | None = None) -> None:
+    def __init__(
+        self,
+        client: anthropic.Anthropic | None = None,
+        cache: ClassificationCache | None = None,
+        stats: RouterStats | None = None,
+    ) -> None:
         self.client = client or anthropic.Anthropic()
-        self._cache: dict[str, ClassificationResult] = {}
+        self.cache = cache if cache is not None else ClassificationCache()
+        self.stats = stats if stats is not None else RouterStats()
 
     def _classify_task(self, task: str) -> ClassificationResult:
         """Classify task using Haiku."""
-        # Check cache first
-        cache_key = task[:200]  # Use first 200 chars as key
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+        # Check cache first (exact, then nearest neighbour)
+        cached, level = self.cache.get(task)
+        self.stats.record_classification(level)
+        if cached is not None:
+            return cached
 
         response = self.client.messages.create(
             model=ModelTier.HAIKU.value,
@@ -365,34 +1071,41 @@ Respond ONLY with the JSON object, no other text."""
                 data = json.loads(json_match.group())
             else:
                 data = json.loads(result_text)
+            classification = self.parse_classification(data)
+        except (json.JSONDecodeError, ValueError, KeyError, AttributeError, TypeError):
+            # Fallback classification (not cached, so the task is retried next time)
+            return self.fallback_classification()
 
-            classification = ClassificationResult(
-                complexity=TaskComplexity(data.get("complexity", "moderate")),
-                category=TaskCategory(data.get("category", "general")),
-                confidence=float(data.get("confidence", 0.5)),
-                reasoning=data.get("reasoning", ""),
-            )
-        except (json.JSONDecodeError, ValueError, KeyError):
-            # Fallback classification
-            classification = ClassificationResult(
-                complexity=TaskComplexity.MODERATE,
-                category=TaskCategory.GENERAL,
-                confidence=0.3,
-                reasoning="Failed to parse classification, using fallback",
-            )
-
-        self._cache[cache_key] = classification
+        self.cache.put(task, classification)
         return classification
 
-    def route(self, task: str) -> RoutingDecision:
-        """Route task based on LLM classification."""
-        classification = self._classify_task(task)
+    @staticmethod
+    def parse_classification(data: dict[str, Any]) -> ClassificationResult:
+        """Build a ClassificationResult from the model's JSON; raises ValueError on bad values."""
+        return ClassificationResult(
+            complexity=TaskComplexity(data.get("complexity", "moderate")),
+            category=TaskCategory(data.get("category", "general")),
+            confidence=float(data.get("confidence", 0.5)),
+            reasoning=data.get("reasoning", ""),
+        )
+
+    @staticmethod
+    def fallback_classification() -> ClassificationResult:
+        return ClassificationResult(
+            complexity=TaskComplexity.MODERATE,
+            category=TaskCategory.GENERAL,
+            confidence=0.3,
+            reasoning="Failed to parse classification, using fallback",
+        )
 
+    @classmethod
+    def decision_for(cls, classification: ClassificationResult) -> RoutingDecision:
+        """Map a classification to a routing decision."""
         # Check category overrides first
-        if classification.category in self.CATEGORY_OVERRIDES:
-            model = self.CATEGORY_OVERRIDES[classification.category]
+        if classification.category in cls.CATEGORY_OVERRIDES:
+            model = cls.CATEGORY_OVERRIDES[classification.category]
         else:
-            model = self.COMPLEXITY_TO_MODEL[classification.complexity]
+            model = cls.COMPLEXITY_TO_MODEL[classification.complexity]
 
         return RoutingDecision(
             model=model,
@@ -401,17 +1114,213 @@ Respond ONLY with the JSON object, no other text."""
             classification=classification,
         )
 
+    def route(self, task: str) -> RoutingDecision:
+        """Route task based on LLM classification."""
+        return self.decision_for(self._classify_task(task))
+
 
-class DynamicEscalationRouter(RoutingStrategy):
+TIER_RANK = {ModelTier.HAIKU: 0, ModelTier.SONNET: 1, ModelTier.OPUS: 2}
+
+
+class EscalationPredictor:
     """
-    Dynamic quality escalation: start cheap, upgrade if needed.
+    Estimates the probability that a tier's answer will fail the quality check.
 
-    Attempts with Haiku first, escalates based on quality evaluation.
+    Starts from a prior given by the rule router (a rule pointing above the
+    tier suggests escalation) and updates per (rule, tier) from observed
+    outcomes, so no extra LLM call is needed.
+    """
+
+    def __init__(self, rule_router: RuleBasedRouter | None = None, prior_weight: float = 4.0) -> None:
+        self.rule_router = rule_router or RuleBasedRouter()
+        self.prior_weight = prior_weight
+        self._counts: dict[tuple[str, ModelTier], tuple[int, int]] = {}  # -> (escalations, attempts)
+        self._lock = threading.Lock()
+
+    def _key_and_prior(self, task: str, tier: ModelTier) -> tuple[tuple[str, ModelTier], float]:
+        decision = self.rule_router.route(task)
+        if decision.rule_matched == "default":
+            prior = 0.5
+        elif TIER_RANK[decision.model] > TIER_RANK[tier]:
+            prior = 0.8
+        else:
+            prior = 0.2
+        return (decision.rule_matched or "default", tier), prior
+
+    def predict(self, task: str, tier: ModelTier) -> float:
+        key, prior = self._key_and_prior(task, tier)
+        with self._lock:
+            escalations, attempts = self._counts.get(key, (0, 0))
+        return (escalations + prior * self.prior_weight) / (attempts + self.prior_weight)
+
+    def observe(self, task: str, tier: ModelTier, escalated: bool) -> None:
+        key, _ = self._key_and_prior(task, tier)
+        with self._lock:
+            escalations, attempts = self._counts.get(key, (0, 0))
+            self._counts[key] = (escalations + int(escalated), attempts + 1)
+
+
+@dataclass
+class SpeculationPolicy:
+    """When to start the next tier before the current tier's answer is judged."""
+    threshold: float = 0.5  # Speculate when predicted escalation probability >= threshold
+    predictor: EscalationPredictor = field(default_factory=EscalationPredictor)
+    max_workers: int = 8  # Threads shared by concurrent tier calls
+
+    def should_speculate(self, task: str, tier: ModelTier) -> bool:
+        return self.predictor.predict(task, tier) >= self.threshold
+
+
+@dataclass
+class _Attempt:
+    """One tier call made during escalation."""
+    content: str
+    input_tokens: int
+    output_tokens: int
+    cost: float
+    seconds: float
+    cancelled: bool = False
+    first_token_seconds: float | None = None  # Relative to the start of the whole execution
+    tokens_per_second: float | None = None
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+
+    @classmethod
+    def from_tokens(
+        cls,
+        model: ModelTier,
+        content: str,
+        tokens: tuple[int, int, int, int],
+        seconds: float,
+        **kwargs: Any,
+    ) -> _Attempt:
+        """Build from usage_tokens() output, pricing the call."""
+        input_tokens, output_tokens, cache_write, cache_read = tokens
+        return cls(
+            content=content,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost=calculate_cost(model, *tokens),
+            seconds=seconds,
+            cache_creation_input_tokens=cache_write,
+            cache_read_input_tokens=cache_read,
+            **kwargs,
+        )
+
+
+class _Totals:
+    """Token and cost totals over the attempts of one execution."""
+
+    def __init__(self) -> None:
+        self.input_tokens = self.output_tokens = 0
+        self.cache_creation_input_tokens = self.cache_read_input_tokens = 0
+        self.cost = 0.0
+
+    def add(self, attempt: _Attempt) -> None:
+        self.input_tokens += attempt.input_tokens
+        self.output_tokens += attempt.output_tokens
+        self.cache_creation_input_tokens += attempt.cache_creation_input_tokens
+        self.cache_read_input_tokens += attempt.cache_read_input_tokens
+        self.cost += attempt.cost
+
+    def as_result_fields(self) -> dict[str, Any]:
+        return {
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache_creation_input_tokens": self.cache_creation_input_tokens,
+            "cache_read_input_tokens": self.cache_read_input_tokens,
+            "cost": self.cost,
+        }
+
+
+def _stream_attempt(
+    client: anthropic.Anthropic,
+    model: ModelTier,
+    request: dict[str, Any],
+    max_tokens: int,
+    started: float,
+    spent: dict[ModelTier, float],
+) -> Generator[StreamUpdate, None, _Attempt]:
+    """Stream one tier for a build_request() payload, yielding an update per text chunk; returns the finished attempt."""
+    attempt_start = time.perf_counter()
+    first_token_at: float | None = None
+    prompt_tokens = (0, 0, 0, 0)
+    chunks: list[str] = []
+    generated_chars = 0
+    with client.messages.stream(model=model.value, max_tokens=max_tokens, **request) as stream:
+        for text in stream.text_stream:
+            now = time.perf_counter()
+            if first_token_at is None:
+                first_token_at = now
+                prompt_tokens = usage_tokens(stream.current_message_snapshot.usage)
+            chunks.append(text)
+            generated_chars += len(text)
+            output_tokens = max(1, generated_chars // 4)  # Final usage only arrives at message end
+            input_tokens, _, cache_write, cache_read = prompt_tokens
+            so_far = calculate_cost(model, input_tokens, output_tokens, cache_write, cache_read)
+            cost_by_tier = {**spent, model: spent.get(model, 0.0) + so_far}
+            yield StreamUpdate(
+                text=text,
+                model=model,
+                elapsed_seconds=now - started,
+                output_tokens=output_tokens,
+                running_cost=sum(cost_by_tier.values()),
+                cost_by_tier=cost_by_tier,
+            )
+        final = stream.get_final_message()
+
+    finished = time.perf_counter()
+    tokens = usage_tokens(final.usage)
+    generating = finished - first_token_at if first_token_at is not None else 0.0
+    return _Attempt.from_tokens(
+        model,
+        "".join(chunks),
+        tokens,
+        finished - attempt_start,
+        first_token_seconds=first_token_at - started if first_token_at is not None else None,
+        tokens_per_second=tokens[1] / generating if generating > 0 else None,
+    )
+
+
+# =============================================================================
+# Quality evaluation: local heuristics with an LLM judge for uncertain cases
+# =============================================================================
+
+@dataclass
+class QualityEstimate:
+    """A quality score (0-100) and how sure the evaluator is that it is on the right side of the threshold."""
+    score: float
+    confidence: float  # Calibrated probability that the pass/fail call is correct
+    source: str  # "llm_judge" or "heuristic"
+
+
+class QualityEvaluator(ABC):
+    """Scores a response to a task; used by the escalation routers."""
+
+    @abstractmethod
+    def evaluate(self, task: str, response: str, system_prompt: str | None = None) -> QualityEstimate:
+        """Score response on a 0-100 scale; system_prompt is the context the task was answered in."""
+        pass
+
+
+def parse_quality_score(text: str) -> float | None:
+    """First number in a judge reply, clamped to 0-100; None if there is none."""
+    match = re.search(r'\d+(?:\.\d+)?', text)
+    return min(100.0, max(0.0, float(match.group()))) if match else None
+
+
+class LLMJudgeEvaluator(QualityEvaluator):
+    """
+    Grades each response with one Haiku call.
+
+    The grading request repeats the answer request's system prompt and task
+    block before the grading instructions, so with prompt_caching it reads
+    the prefix cached by a Haiku answer instead of paying for it again.
     """
 
-    QUALITY_PROMPT = """Evaluate the quality of this response on a scale of 0-100.
+    MODEL = ModelTier.HAIKU
+    PROMPT = """Evaluate the quality of the response to the task above on a scale of 0-100.
 
-Original task: {task}
 Response: {response}
 
 Consider:
@@ -422,52 +1331,298 @@ Consider:
 
 Respond with ONLY a number between 0 and 100."""
 
+    def __init__(self, client: anthropic.Anthropic | None = None, prompt_caching: bool = True) -> None:
+        self.client = client or anthropic.Anthropic()
+        self.prompt_caching = prompt_caching
+
+    @classmethod
+    def grading_request(
+        cls,
+        task: str,
+        response: str,
+        system_prompt: str | None = None,
+        prompt_caching: bool = True,
+    ) -> dict[str, Any]:
+        """Grading request sharing the answer request's prefix (see build_request())."""
+        request = build_request(task, system_prompt, cache_system=prompt_caching, cache_task=prompt_caching)
+        request["messages"][0]["content"].append(_text_block(cls.PROMPT.format(response=response), cache=False))
+        return request
+
+    def evaluate(self, task: str, response: str, system_prompt: str | None = None) -> QualityEstimate:
+        eval_response = self.client.messages.create(
+            model=self.MODEL.value,
+            max_tokens=32,
+            **self.grading_request(task, response, system_prompt, self.prompt_caching),
+        )
+        score = parse_quality_score(eval_response.content[0].text)
+        if score is None:
+            return QualityEstimate(score=50.0, confidence=0.0, source="llm_judge")  # Unparseable reply
+        return QualityEstimate(score=score, confidence=1.0, source="llm_judge")
+
+
+class HeuristicQualityEvaluator(QualityEvaluator):
+    """
+    Local, zero-cost quality estimate from surface signals.
+
+    Signals: answer/task length ratio, refusal and hedging phrases, whether
+    code was expected and whether its code blocks compile, and overlap of
+    the task's content words with the answer. A logistic model maps them to
+    a pass probability p; fit() calibrates it on judge-scored examples.
+    Scores are placed so that p = 0.5 lands on pass_threshold.
+    """
+
+    SIGNALS = ["bias", "length_ratio", "too_short", "refusal", "hedges", "code_missing", "code_invalid", "overlap"]
+    DEFAULT_WEIGHTS = [-0.5, 0.4, -2.5, -4.0, -0.8, -2.5, -3.0, 3.0]
+
+    REFUSAL = re.compile(
+        r"\b(i can(?:no|')t|i am unable|i'm unable|i won't|i will not|as an ai|i'm not able)\b", re.IGNORECASE
+    )
+    HEDGE = re.compile(
+        r"\b(maybe|perhaps|possibly|might|not sure|i think|i believe|it depends|unclear|probably)\b", re.IGNORECASE
+    )
+    CODE_REQUEST = re.compile(
+        r"\b(implement|write (?:a |the )?(?:function|class|script|code)|refactor|fix (?:the )?bug|code)\b",
+        re.IGNORECASE,
+    )
+    CODE_BLOCK = re.compile(r"```(\w*)\n(.*?)```", re.DOTALL)
+    STOPWORDS = frozenset(
+        "a an and are as at be by for from how i in is it me my of on or our please the this to "
+        "what when where which who why with you your can do does".split()
+    )
+
+    def __init__(self, weights: list[float] | None = None, pass_threshold: float = 70.0) -> None:
+        self.weights = np.asarray(weights if weights is not None else self.DEFAULT_WEIGHTS, dtype=np.float64)
+        self.pass_threshold = pass_threshold
+
+    def _content_words(self, text: str) -> set[str]:
+        return {w for w in re.findall(r"[a-z0-9']+", text.lower()) if w not in self.STOPWORDS and len(w) > 2}
+
+    def signals(self, task: str, response: str) -> np.ndarray:
+        """Signal vector in SIGNALS order."""
+        response_words = len(response.split())
+        task_words = max(1, len(task.split()))
+        blocks = self.CODE_BLOCK.findall(response)
+        code_expected = bool(self.CODE_REQUEST.search(task))
+        invalid = response.count("```") % 2 == 1  # Unterminated fence
+        for language, code in blocks:
+            if language.lower() in ("", "py", "python"):
+                try:
+                    compile(code, "<response>", "exec")
+                except (SyntaxError, ValueError):
+                    invalid = True
+        task_terms = self._content_words(task)
+        overlap = len(task_terms & self._content_words(response)) / len(task_terms) if task_terms else 1.0
+        return np.array([
+            1.0,
+            float(np.clip(np.log(max(response_words, 1) / task_words), -3.0, 3.0)),
+            float(response_words < 5),
+            float(bool(self.REFUSAL.search(response))),
+            min(5.0, 100.0 * len(self.HEDGE.findall(response)) / max(response_words, 1)),
+            float(code_expected and not blocks),
+            float(invalid),
+            overlap,
+        ])
+
+    def pass_probability(self, task: str, response: str) -> float:
+        return float(1.0 / (1.0 + np.exp(-self.signals(task, response) @ self.weights)))
+
+    def evaluate(self, task: str, response: str, system_prompt: str | None = None) -> QualityEstimate:
+        p = self.pass_probability(task, response)
+        if p >= 0.5:
+            score = self.pass_threshold + (p - 0.5) * 2 * (100.0 - self.pass_threshold)
+        else:
+            score = p * 2 * self.pass_threshold
+        return QualityEstimate(score=score, confidence=max(p, 1.0 - p), source="heuristic")
+
+    def fit(
+        self,
+        samples: list[tuple[str, str, float]],
+        l2: float = 1e-3,
+        learning_rate: float = 0.5,
+        epochs: int = 2000,
+    ) -> HeuristicQualityEvaluator:
+        """Calibrate weights on (task, response, judge score) samples by logistic regression."""
+        if not samples:
+            raise ValueError("No judged samples to fit on")
+        X = np.stack([self.signals(task, response) for task, response, _ in samples])
+        y = np.array([score >= self.pass_threshold for _, _, score in samples], dtype=np.float64)
+        weights = self.weights.copy()
+        for _ in range(epochs):
+            error = 1.0 / (1.0 + np.exp(-X @ weights)) - y
+            weights -= learning_rate * (X.T @ error / len(y) + l2 * np.r_[0.0, weights[1:]])
+        self.weights = weights
+        return self
+
+
+class CascadingEvaluator(QualityEvaluator):
+    """
+    Local evaluator first; the LLM judge only when it is unsure.
+
+    Responses whose heuristic confidence is below min_confidence go to the
+    judge. Judged samples can be appended to record_path (JSON Lines) to
+    re-calibrate the heuristic later with load_judge_corpus().
+    """
+
+    def __init__(
+        self,
+        local: HeuristicQualityEvaluator | None = None,
+        judge: QualityEvaluator | None = None,
+        min_confidence: float = 0.8,
+        record_path: str | None = None,
+    ) -> None:
+        self.local = local or HeuristicQualityEvaluator()
+        self.judge = judge or LLMJudgeEvaluator()
+        self.min_confidence = min_confidence
+        self.record_path = record_path
+        self.local_decisions = 0
+        self.judge_calls = 0
+        self._lock = threading.Lock()
+
+    def evaluate(self, task: str, response: str, system_prompt: str | None = None) -> QualityEstimate:
+        estimate = self.local.evaluate(task, response)
+        if estimate.confidence >= self.min_confidence:
+            with self._lock:
+                self.local_decisions += 1
+            return estimate
+
+        judged = self.judge.evaluate(task, response, system_prompt)
+        with self._lock:
+            self.judge_calls += 1
+            if self.record_path and judged.confidence > 0:
+                with open(self.record_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"task": task, "response": response, "score": judged.score}) + "\n")
+        return judged
+
+    def get_stats(self) -> dict[str, Any]:
+        total = self.local_decisions + self.judge_calls
+        return {
+            "local_decisions": self.local_decisions,
+            "judge_calls": self.judge_calls,
+            "judge_rate": self.judge_calls / total if total > 0 else 0,
+        }
+
+
+def load_judge_corpus(path: str) -> list[tuple[str, str, float]]:
+    """Read (task, response, score) samples recorded by CascadingEvaluator."""
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(row["task"], row["response"], float(row["score"])) for row in rows]
+
+
+class DynamicEscalationRouter(RoutingStrategy):
+    """
+    Dynamic quality escalation: start cheap, upgrade if needed.
+
+    Attempts with Haiku first, escalates based on quality evaluation.
+
+    With a SpeculationPolicy, the next tier is started concurrently when the
+    predictor expects an escalation. If the cheaper answer passes, the
+    speculative stream is closed early and only the tokens generated so far
+    are billed (reported as wasted_cost).
+    """
+
+    QUALITY_PROMPT = LLMJudgeEvaluator.PROMPT
+
     def __init__(
         self,
         client: anthropic.Anthropic | None = None,
         quality_threshold: float = 70.0,
         max_escalations: int = 2,
+        speculation: SpeculationPolicy | None = None,
+        evaluator: QualityEvaluator | None = None,
+        prompt_caching: bool = True,
     ) -> None:
         self.client = client or anthropic.Anthropic()
         self.quality_threshold = quality_threshold
+        self.prompt_caching = prompt_caching
+        self.evaluator = evaluator or LLMJudgeEvaluator(self.client, prompt_caching=prompt_caching)
         self.max_escalations = max_escalations
         self.escalation_order = [ModelTier.HAIKU, ModelTier.SONNET, ModelTier.OPUS]
+        self.speculation = speculation
+        self.speculation_failures = 0  # Discarded speculative calls that raised (billed as nothing)
+        self._executor: ThreadPoolExecutor | None = None
 
-    def _evaluate_quality(self, task: str, response: str) -> float:
-        """Evaluate response quality using Haiku."""
-        eval_response = self.client.messages.create(
-            model=ModelTier.HAIKU.value,
-            max_tokens=32,
-            messages=[{
-                "role": "user",
-                "content": self.QUALITY_PROMPT.format(task=task, response=response)
-            }]
-        )
+    def _evaluate_quality(self, task: str, response: str, system_prompt: str | None = None) -> float:
+        """Score a response with the configured evaluator (the Haiku judge by default)."""
+        return self.evaluator.evaluate(task, response, system_prompt).score
 
-        try:
-            score_text = eval_response.content[0].text.strip()
-            score = float(re.search(r'\d+', score_text).group())
-            return min(100.0, max(0.0, score))
-        except (ValueError, AttributeError):
-            return 50.0  # Default to middle score
+    def _request(self, task: str, model: ModelTier, system_prompt: str | None) -> dict[str, Any]:
+        """
+        Request for one tier. The system prompt is cached for reuse across
+        requests; the task block too when the judge, running on the same
+        model, will read it back.
+        """
+        judged_on_same_model = (
+            isinstance(self.evaluator, (LLMJudgeEvaluator, CascadingEvaluator))
+            and model == LLMJudgeEvaluator.MODEL
+        )
+        return build_request(
+            task,
+            system_prompt,
+            cache_system=self.prompt_caching,
+            cache_task=self.prompt_caching and judged_on_same_model,
+        )
 
     def _execute_with_model(
         self,
         task: str,
         model: ModelTier,
         max_tokens: int = 4096,
-    ) -> tuple[str, int, int]:
-        """Execute task with specified model."""
+        system_prompt: str | None = None,
+    ) -> tuple[str, tuple[int, int, int, int]]:
+        """Execute task with specified model. Returns (text, usage_tokens())."""
         response = self.client.messages.create(
             model=model.value,
             max_tokens=max_tokens,
-            messages=[{"role": "user", "content": task}]
-        )
-        return (
-            response.content[0].text,
-            response.usage.input_tokens,
-            response.usage.output_tokens,
+            **self._request(task, model, system_prompt),
         )
+        return response.content[0].text, usage_tokens(response.usage)
+
+    def _attempt(
+        self,
+        task: str,
+        model: ModelTier,
+        max_tokens: int,
+        cancel: threading.Event | None = None,
+        system_prompt: str | None = None,
+    ) -> _Attempt:
+        """Run one tier, streaming so the call can be abandoned when cancel is set."""
+        start = time.perf_counter()
+        if cancel is None:
+            content, tokens = self._execute_with_model(task, model, max_tokens, system_prompt)
+            cancelled = False
+        else:
+            content, tokens, cancelled = self._stream_with_model(task, model, max_tokens, cancel, system_prompt)
+        return _Attempt.from_tokens(model, content, tokens, time.perf_counter() - start, cancelled=cancelled)
+
+    def _stream_with_model(
+        self,
+        task: str,
+        model: ModelTier,
+        max_tokens: int,
+        cancel: threading.Event,
+        system_prompt: str | None = None,
+    ) -> tuple[str, tuple[int, int, int, int], bool]:
+        """Stream a completion, stopping early if cancel is set. Returns (text, usage_tokens(), cancelled)."""
+        if cancel.is_set():
+            return "", (0, 0, 0, 0), True
+        chunks: list[str] = []
+        with self.client.messages.stream(
+            model=model.value,
+            max_tokens=max_tokens,
+            **self._request(task, model, system_prompt),
+        ) as stream:
+            for text in stream.text_stream:
+                chunks.append(text)
+                if cancel.is_set():
+                    input_tokens, output_tokens, cache_write, cache_read = usage_tokens(
+                        stream.current_message_snapshot.usage
+                    )
+                    # Output usage is only final at message end; estimate what was generated
+                    generated = max(output_tokens, len("".join(chunks)) // 4)
+                    return "".join(chunks), (input_tokens, generated, cache_write, cache_read), True
+            final = stream.get_final_message()
+        return final.content[0].text, usage_tokens(final.usage), False
 
     def route(self, task: str) -> RoutingDecision:
         """Route starting with cheapest model."""
@@ -482,46 +1637,108 @@ Respond with ONLY a number between 0 and 100."""
         self,
         task: str,
         max_tokens: int = 4096,
+        system_prompt: str | None = None,
     ) -> ExecutionResult:
         """Execute task with automatic escalation if quality is low."""
-        total_input_tokens = 0
-        total_output_tokens = 0
-        total_cost = 0.0
-        escalations = 0
+        if self.speculation is not None:
+            return self._execute_speculative(task, max_tokens, system_prompt)
 
-        for model in self.escalation_order:
-            if escalations >= self.max_escalations:
-                break
+        start = time.perf_counter()
+        result = self._execute_sequential(task, max_tokens, system_prompt)
+        result.latency_seconds = result.serial_latency_seconds = time.perf_counter() - start
+        return result
 
-            content, input_tokens, output_tokens = self._execute_with_model(
-                task, model, max_tokens
-            )
-            cost = calculate_cost(model, input_tokens, output_tokens)
-            total_input_tokens += input_tokens
-            total_output_tokens += output_tokens
-            total_cost += cost
+    def stream_with_escalation(
+        self,
+        task: str,
+        max_tokens: int = 4096,
+        system_prompt: str | None = None,
+    ) -> Iterator[StreamUpdate]:
+        """
+        Streamed execute_with_escalation: yields text as it arrives.
+
+        When an answer fails the quality check, an update with restart=True
+        is yielded and the next tier streams its answer from the start. The
+        last update carries the ExecutionResult.
+        """
+        started = time.perf_counter()
+        spent: dict[ModelTier, float] = {}
+        totals = _Totals()
+        tiers = self.escalation_order[:max(1, self.max_escalations)]
+
+        for index, model in enumerate(tiers):
+            request = self._request(task, model, system_prompt)
+            attempt = yield from _stream_attempt(self.client, model, request, max_tokens, started, spent)
+            spent[model] = spent.get(model, 0.0) + attempt.cost
+            totals.add(attempt)
+            if model == ModelTier.OPUS:
+                quality = 100.0
+            else:
+                quality = self._evaluate_quality(task, attempt.content, system_prompt)
+            passed = quality >= self.quality_threshold
+            if passed or index == len(tiers) - 1:
+                break
+            yield StreamUpdate(
+                text="",
+                model=model,
+                elapsed_seconds=time.perf_counter() - started,
+                output_tokens=attempt.output_tokens,
+                running_cost=sum(spent.values()),
+                cost_by_tier=dict(spent),
+                restart=True,
+            )
+
+        elapsed = time.perf_counter() - started
+        result = ExecutionResult(
+            content=attempt.content,
+            model_used=model,
+            **totals.as_result_fields(),
+            quality_score=quality,
+            escalated=index > 0 or not passed,
+            latency_seconds=elapsed,
+            serial_latency_seconds=elapsed,
+            first_token_seconds=attempt.first_token_seconds,
+            tokens_per_second=attempt.tokens_per_second,
+        )
+        yield StreamUpdate(
+            text="",
+            model=model,
+            elapsed_seconds=elapsed,
+            output_tokens=attempt.output_tokens,
+            running_cost=result.cost,
+            cost_by_tier=dict(spent),
+            result=result,
+        )
+
+    def _execute_sequential(self, task: str, max_tokens: int, system_prompt: str | None = None) -> ExecutionResult:
+        totals = _Totals()
+        escalations = 0
+
+        for model in self.escalation_order:
+            if escalations >= self.max_escalations:
+                break
+
+            attempt = self._attempt(task, model, max_tokens, system_prompt=system_prompt)
+            content = attempt.content
+            totals.add(attempt)
 
             # Evaluate quality (skip for Opus - highest tier)
             if model == ModelTier.OPUS:
                 return ExecutionResult(
                     content=content,
                     model_used=model,
-                    input_tokens=total_input_tokens,
-                    output_tokens=total_output_tokens,
-                    cost=total_cost,
+                    **totals.as_result_fields(),
                     quality_score=100.0,
                     escalated=escalations > 0,
                 )
 
-            quality = self._evaluate_quality(task, content)
+            quality = self._evaluate_quality(task, content, system_prompt)
 
             if quality >= self.quality_threshold:
                 return ExecutionResult(
                     content=content,
                     model_used=model,
-                    input_tokens=total_input_tokens,
-                    output_tokens=total_output_tokens,
-                    cost=total_cost,
+                    **totals.as_result_fields(),
                     quality_score=quality,
                     escalated=escalations > 0,
                 )
@@ -532,13 +1749,90 @@ Respond with ONLY a number between 0 and 100."""
         return ExecutionResult(
             content=content,
             model_used=model,
-            input_tokens=total_input_tokens,
-            output_tokens=total_output_tokens,
-            cost=total_cost,
+            **totals.as_result_fields(),
             quality_score=quality,
             escalated=True,
         )
 
+    def _execute_speculative(self, task: str, max_tokens: int, system_prompt: str | None = None) -> ExecutionResult:
+        """Escalation where the next tier may already be running while the current one is judged."""
+        policy = self.speculation
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=policy.max_workers, thread_name_prefix="escalation")
+        # Same tiers the sequential loop would try
+        tiers = self.escalation_order[:max(1, self.max_escalations)]
+        cancels = [threading.Event() for _ in tiers]
+        futures: dict[int, Future] = {}
+        speculated = False
+
+        def launch(index: int) -> None:
+            if index < len(tiers) and index not in futures:
+                futures[index] = self._executor.submit(
+                    self._attempt, task, tiers[index], max_tokens, cancels[index], system_prompt
+                )
+
+        start = time.perf_counter()
+        serial_seconds = 0.0
+        totals = _Totals()
+        quality = 0.0
+
+        for index, model in enumerate(tiers):
+            launch(index)
+            if index + 1 < len(tiers) and policy.should_speculate(task, model):
+                speculated = speculated or (index + 1) not in futures
+                launch(index + 1)
+
+            attempt = futures[index].result()
+            serial_seconds += attempt.seconds
+            totals.add(attempt)
+
+            if model == ModelTier.OPUS:
+                quality = 100.0
+                passed = True
+            else:
+                eval_start = time.perf_counter()
+                quality = self._evaluate_quality(task, attempt.content, system_prompt)
+                serial_seconds += time.perf_counter() - eval_start
+                passed = quality >= self.quality_threshold
+                policy.predictor.observe(task, model, escalated=not passed)
+
+            if passed or index == len(tiers) - 1:
+                wasted_cost = 0.0
+                for later in range(index + 1, len(tiers)):
+                    future = futures.get(later)
+                    if future is None:
+                        continue
+                    cancels[later].set()
+                    if future.cancel():
+                        continue  # Never started, nothing billed
+                    try:
+                        wasted = future.result()
+                    except Exception:
+                        # A losing branch never fails the request; its usage is unknown
+                        self.speculation_failures += 1
+                        continue
+                    totals.add(wasted)
+                    wasted_cost += wasted.cost
+                return ExecutionResult(
+                    content=attempt.content,
+                    model_used=model,
+                    **totals.as_result_fields(),
+                    quality_score=quality,
+                    escalated=index > 0 or not passed,
+                    latency_seconds=time.perf_counter() - start,
+                    serial_latency_seconds=serial_seconds,
+                    wasted_cost=wasted_cost,
+                    speculated=speculated,
+                )
+
+        raise RuntimeError("escalation_order is empty")
+
+    def close(self) -> None:
+        """Release the speculation thread pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
 
 class HybridRouter(RoutingStrategy):
     """
@@ -557,15 +1851,35 @@ class HybridRouter(RoutingStrategy):
         use_llm_classification: bool = True,
         enable_escalation: bool = True,
         quality_threshold: float = 70.0,
+        classification_cache: ClassificationCache | None = None,
+        speculation: SpeculationPolicy | None = None,
+        routing_log: RoutingLog | None = None,
+        quality_evaluator: QualityEvaluator | None = None,
+        metrics: RouterMetrics | None = None,
+        shadow: ShadowRouter | None = None,
+        prompt_caching: bool = True,
     ) -> None:
         self.client = client or anthropic.Anthropic()
+        self.prompt_caching = prompt_caching  # Cache the system prompt prefix across requests
+        self.stats = RouterStats()
+        self.routing_log = routing_log  # Outcomes logged here can train a LearnedRouter
+        self.metrics = metrics
+        self.shadow = shadow  # Candidate strategy compared against every live decision
         self.rule_router = RuleBasedRouter()
-        self.llm_router = LLMClassifierRouter(client) if use_llm_classification else None
+        self.llm_router = (
+            LLMClassifierRouter(client, cache=classification_cache, stats=self.stats)
+            if use_llm_classification else None
+        )
         self.escalation_router = (
-            DynamicEscalationRouter(client, quality_threshold)
+            DynamicEscalationRouter(
+                client,
+                quality_threshold,
+                speculation=speculation,
+                evaluator=quality_evaluator,
+                prompt_caching=prompt_caching,
+            )
             if enable_escalation else None
         )
-        self.stats = RouterStats()
         self.enable_escalation = enable_escalation
 
     def add_rule(self, rule: RoutingRule) -> None:
@@ -604,48 +1918,885 @@ class HybridRouter(RoutingStrategy):
         system_prompt: str | None = None,
     ) -> ExecutionResult:
         """Execute task with intelligent routing."""
-        decision = self.route(task)
+        decision = self._route_live(task)
 
         # Use escalation router if enabled and starting with Haiku
-        if (
-            self.enable_escalation
-            and self.escalation_router
-            and decision.model == ModelTier.HAIKU
-        ):
-            result = self.escalation_router.execute_with_escalation(task, max_tokens)
+        if self._escalates(decision):
+            result = self.escalation_router.execute_with_escalation(task, max_tokens, system_prompt)
         else:
             # Direct execution
-            messages = [{"role": "user", "content": task}]
+            start = time.perf_counter()
             response = self.client.messages.create(
                 model=decision.model.value,
                 max_tokens=max_tokens,
-                system=system_prompt or "",
-                messages=messages,
+                **build_request(task, system_prompt, cache_system=self.prompt_caching),
             )
+            tokens = usage_tokens(response.usage)
             result = ExecutionResult(
                 content=response.content[0].text,
                 model_used=decision.model,
-                input_tokens=response.usage.input_tokens,
-                output_tokens=response.usage.output_tokens,
-                cost=calculate_cost(
-                    decision.model,
-                    response.usage.input_tokens,
-                    response.usage.output_tokens,
-                ),
+                input_tokens=tokens[0],
+                output_tokens=tokens[1],
+                cost=calculate_cost(decision.model, *tokens),
+                cache_creation_input_tokens=tokens[2],
+                cache_read_input_tokens=tokens[3],
             )
+            result.latency_seconds = result.serial_latency_seconds = time.perf_counter() - start
+
+        self._record(task, decision, result)
+        return result
+
+    def execute_stream(
+        self,
+        task: str,
+        max_tokens: int = 4096,
+        system_prompt: str | None = None,
+    ) -> Iterator[StreamUpdate]:
+        """
+        Streamed execute(): yields text chunks with elapsed time and running cost.
+
+        On escalation an update with restart=True means the text so far was
+        discarded. The last update carries the ExecutionResult, which
+        includes time to first token and tokens/sec.
+        """
+        decision = self._route_live(task)
+        if self._escalates(decision):
+            updates = self.escalation_router.stream_with_escalation(task, max_tokens, system_prompt)
+        else:
+            updates = self._stream_direct(task, decision.model, max_tokens, system_prompt)
+        for update in updates:
+            if update.result is not None:
+                self._record(task, decision, update.result)
+            yield update
+
+    def _stream_direct(
+        self,
+        task: str,
+        model: ModelTier,
+        max_tokens: int,
+        system_prompt: str | None,
+    ) -> Iterator[StreamUpdate]:
+        started = time.perf_counter()
+        request = build_request(task, system_prompt, cache_system=self.prompt_caching)
+        attempt = yield from _stream_attempt(self.client, model, request, max_tokens, started, {})
+        elapsed = time.perf_counter() - started
+        totals = _Totals()
+        totals.add(attempt)
+        result = ExecutionResult(
+            content=attempt.content,
+            model_used=model,
+            **totals.as_result_fields(),
+            latency_seconds=elapsed,
+            serial_latency_seconds=elapsed,
+            first_token_seconds=attempt.first_token_seconds,
+            tokens_per_second=attempt.tokens_per_second,
+        )
+        yield StreamUpdate(
+            text="",
+            model=model,
+            elapsed_seconds=elapsed,
+            output_tokens=attempt.output_tokens,
+            running_cost=attempt.cost,
+            cost_by_tier={model: attempt.cost},
+            result=result,
+        )
+
+    def _route_live(self, task: str) -> RoutingDecision:
+        decision = self.route(task)
+        if self.shadow is not None:
+            self.shadow.observe(task, decision)
+        return decision
+
+    def _escalates(self, decision: RoutingDecision) -> bool:
+        """Whether execution starts at Haiku under the escalation router."""
+        return (
+            self.enable_escalation
+            and self.escalation_router is not None
+            and decision.model == ModelTier.HAIKU
+        )
 
-        # Record statistics
+    def _record(self, task: str, decision: RoutingDecision, result: ExecutionResult) -> None:
+        """Record statistics, metrics and the routing log for a finished execution."""
         self.stats.record(result, decision)
+        if self.metrics is not None:
+            self.metrics.observe(result, decision)
+        if self.routing_log is not None:
+            self.routing_log.record(task, decision, result)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get router statistics."""
+        return self.stats.summary()
+
+
+@dataclass
+class TierRateLimit:
+    """Request rate limit for one model tier."""
+    requests_per_second: float
+    burst: int = 1  # Requests allowed back to back after an idle period
+
+
+class AsyncRateLimiter:
+    """Token bucket for coroutines: waits until a request slot is available."""
+
+    def __init__(self, limit: TierRateLimit) -> None:
+        self.rate = limit.requests_per_second
+        self.burst = max(1, limit.burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AsyncHybridRouter:
+    """
+    Async counterpart of HybridRouter for request handlers running on an event loop.
+
+    - route_many() applies the rules to every task, then classifies the
+      ambiguous ones with one LLM prompt per batch instead of one per task
+    - execute_many() runs tasks concurrently, bounded by max_concurrency
+      overall and by an optional per-tier rate limit
+    """
+
+    BATCH_CLASSIFICATION_PROMPT = """Analyze each of the following tasks and classify it.
 
+Tasks:
+{tasks}
+
+Respond with a JSON array containing one object per task, in the same order, each with:
+- complexity: one of [trivial, simple, moderate, complex, expert]
+- category: one of [extraction, code, analysis, reasoning, translation, summarization, creative, security, general]
+- confidence: float between 0 and 1
+- reasoning: brief explanation of your classification
+
+Classification criteria:
+- trivial: Single-step, obvious tasks (e.g., "What is 2+2?")
+- simple: Basic tasks with clear logic (e.g., "Translate hello to Spanish")
+- moderate: Multi-step tasks (e.g., "Summarize this article and extract key points")
+- complex: Tasks requiring deep reasoning (e.g., "Design a caching strategy")
+- expert: Tasks requiring expert-level capability (e.g., "Prove this mathematical theorem")
+
+Respond ONLY with the JSON array, no other text."""
+
+    def __init__(
+        self,
+        client: anthropic.AsyncAnthropic | None = None,
+        use_llm_classification: bool = True,
+        enable_escalation: bool = True,
+        quality_threshold: float = 70.0,
+        max_concurrency: int = 32,
+        rate_limits: dict[ModelTier, TierRateLimit] | None = None,
+        classification_batch_size: int = 20,
+        classification_cache: ClassificationCache | None = None,
+        local_evaluator: HeuristicQualityEvaluator | None = None,
+        min_local_confidence: float = 0.8,
+        prompt_caching: bool = True,
+    ) -> None:
+        self.client = client or anthropic.AsyncAnthropic()
+        self.prompt_caching = prompt_caching
+        self.rule_router = RuleBasedRouter()
+        self.use_llm_classification = use_llm_classification
+        self.enable_escalation = enable_escalation
+        self.quality_threshold = quality_threshold
+        self.local_evaluator = local_evaluator  # Skips the judge call when it is confident
+        self.min_local_confidence = min_local_confidence
+        self.classification_batch_size = classification_batch_size
+        self.cache = classification_cache if classification_cache is not None else ClassificationCache()
+        self.stats = RouterStats()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._limiters = {tier: AsyncRateLimiter(limit) for tier, limit in (rate_limits or {}).items()}
+
+    async def _create(self, model: ModelTier, max_tokens: int, messages: list[dict], **kwargs: Any) -> Any:
+        """One API call under the concurrency bound and the tier's rate limit."""
+        # Wait for the tier's slot first, so a throttled tier cannot hold every concurrency slot
+        limiter = self._limiters.get(model)
+        if limiter is not None:
+            await limiter.acquire()
+        async with self._semaphore:
+            return await self.client.messages.create(
+                model=model.value, max_tokens=max_tokens, messages=messages, **kwargs
+            )
+
+    async def _classify_batch(self, tasks: list[str]) -> list[ClassificationResult]:
+        """Classify several tasks with a single LLM call."""
+        numbered = "\n".join(f"{i + 1}. {json.dumps(task)}" for i, task in enumerate(tasks))
+        response = await self._create(
+            ModelTier.HAIKU,
+            max_tokens=120 * len(tasks) + 100,
+            messages=[{"role": "user", "content": self.BATCH_CLASSIFICATION_PROMPT.format(tasks=numbered)}],
+        )
+
+        results = [LLMClassifierRouter.fallback_classification() for _ in tasks]
+        try:
+            text = response.content[0].text
+            data = json.loads(text[text.find("["):text.rfind("]") + 1])
+        except (json.JSONDecodeError, ValueError):
+            return results
+        if not isinstance(data, list):
+            return results
+        for i, item in enumerate(data[:len(tasks)]):
+            try:
+                results[i] = LLMClassifierRouter.parse_classification(item)
+                self.cache.put(tasks[i], results[i])
+            except (ValueError, AttributeError, TypeError):
+                pass
+        return results
+
+    async def route_many(self, tasks: list[str]) -> list[RoutingDecision]:
+        """Route a batch of tasks, coalescing LLM classification of ambiguous ones."""
+        decisions = [self.rule_router.route(task) for task in tasks]
+        if not self.use_llm_classification:
+            return decisions
+
+        pending: dict[str, list[int]] = {}  # Uncached ambiguous task -> positions
+        for i, (task, decision) in enumerate(zip(tasks, decisions)):
+            if decision.confidence >= 0.8 or decision.rule_matched != "default":
+                continue
+            cached, level = self.cache.get(task)
+            if cached is not None:
+                self.stats.record_classification(level)
+                self._apply_classification(decisions, i, cached)
+            else:
+                pending.setdefault(task, []).append(i)
+
+        unique = list(pending)
+        batches = [
+            unique[i:i + self.classification_batch_size]
+            for i in range(0, len(unique), self.classification_batch_size)
+        ]
+        for batch, results in zip(batches, await asyncio.gather(*(self._classify_batch(b) for b in batches))):
+            for task, classification in zip(batch, results):
+                for n, position in enumerate(pending[task]):
+                    # One LLM classification per unique task; duplicates count as exact hits
+                    self.stats.record_classification(None if n == 0 else "exact")
+                    self._apply_classification(decisions, position, classification)
+        return decisions
+
+    @staticmethod
+    def _apply_classification(
+        decisions: list[RoutingDecision],
+        position: int,
+        classification: ClassificationResult,
+    ) -> None:
+        # Same rule as HybridRouter.route: prefer the LLM decision if confident
+        llm_decision = LLMClassifierRouter.decision_for(classification)
+        if llm_decision.confidence >= 0.7:
+            decisions[position] = llm_decision
+
+    async def route(self, task: str) -> RoutingDecision:
+        """Route a single task."""
+        return (await self.route_many([task]))[0]
+
+    async def _evaluate_quality(self, task: str, response: str, system_prompt: str | None = None) -> float:
+        if self.local_evaluator is not None:
+            estimate = self.local_evaluator.evaluate(task, response)
+            if estimate.confidence >= self.min_local_confidence:
+                return estimate.score
+        eval_response = await self._create(
+            LLMJudgeEvaluator.MODEL,
+            max_tokens=32,
+            **LLMJudgeEvaluator.grading_request(task, response, system_prompt, self.prompt_caching),
+        )
+        score = parse_quality_score(eval_response.content[0].text)
+        return 50.0 if score is None else score
+
+    async def _execute_decision(
+        self,
+        task: str,
+        decision: RoutingDecision,
+        max_tokens: int,
+        system_prompt: str | None,
+    ) -> ExecutionResult:
+        start = time.perf_counter()
+        escalate = self.enable_escalation and decision.model == ModelTier.HAIKU
+        tiers = [ModelTier.HAIKU, ModelTier.SONNET] if escalate else [decision.model]
+
+        totals = _Totals()
+        quality = None
+        for index, model in enumerate(tiers):
+            attempt_start = time.perf_counter()
+            response = await self._create(
+                model,
+                max_tokens=max_tokens,
+                **build_request(
+                    task,
+                    system_prompt,
+                    cache_system=self.prompt_caching,
+                    cache_task=self.prompt_caching and escalate and model == LLMJudgeEvaluator.MODEL,
+                ),
+            )
+            content = response.content[0].text
+            totals.add(_Attempt.from_tokens(
+                model, content, usage_tokens(response.usage), time.perf_counter() - attempt_start
+            ))
+            if not escalate:
+                break
+            quality = await self._evaluate_quality(task, content, system_prompt)
+            if quality >= self.quality_threshold:
+                break
+
+        elapsed = time.perf_counter() - start
+        result = ExecutionResult(
+            content=content,
+            model_used=model,
+            **totals.as_result_fields(),
+            quality_score=quality,
+            escalated=escalate and (index > 0 or quality < self.quality_threshold),
+            latency_seconds=elapsed,
+            serial_latency_seconds=elapsed,
+        )
+        self.stats.record(result, decision)
         return result
 
+    async def execute_many(
+        self,
+        tasks: list[str],
+        max_tokens: int = 4096,
+        system_prompt: str | None = None,
+    ) -> list[ExecutionResult]:
+        """Route and execute tasks concurrently; results are in input order."""
+        decisions = await self.route_many(tasks)
+        return list(await asyncio.gather(*(
+            self._execute_decision(task, decision, max_tokens, system_prompt)
+            for task, decision in zip(tasks, decisions)
+        )))
+
+    async def execute(
+        self,
+        task: str,
+        max_tokens: int = 4096,
+        system_prompt: str | None = None,
+    ) -> ExecutionResult:
+        """Route and execute a single task."""
+        return (await self.execute_many([task], max_tokens, system_prompt))[0]
+
     def get_stats(self) -> dict[str, Any]:
         """Get router statistics."""
         return self.stats.summary()
 
 
+# =============================================================================
+# Learned routing: train a tier classifier from logged outcomes
+# =============================================================================
+
+class RoutingFeaturizer:
+    """
+    Turns a task into the features logged by RoutingLog and used by LearnedRouter.
+
+    Named features (length, keyword hits per target tier, matched rule) come
+    from the rule router; words and bigrams are also hashed into hash_dim
+    buckets so the model can pick up vocabulary the rules don't cover.
+    """
+
+    TIERS = list(ModelTier)
+    RULE_MODELS = [tier.value for tier in ModelTier] + ["default"]
+
+    def __init__(self, rule_router: RuleBasedRouter | None = None, hash_dim: int = 128) -> None:
+        self.rule_router = rule_router or RuleBasedRouter()
+        self.hash_dim = hash_dim
+
+    @property
+    def feature_names(self) -> list[str]:
+        return (
+            ["log_chars", "log_words"]
+            + [f"keyword_hits_{tier.name.lower()}" for tier in self.TIERS]
+            + [f"rule_model_{tier.name.lower()}" for tier in self.TIERS] + ["rule_model_default"]
+            + [f"term_{i}" for i in range(self.hash_dim)]
+        )
+
+    def describe(self, task: str) -> dict[str, Any]:
+        """Loggable features of a task (JSON-serializable, no raw text)."""
+        words = re.findall(r"[\w']+", task.lower())
+        decision = self.rule_router.route(task)
+        hits = {tier.value: 0 for tier in self.TIERS}
+        for rule in self.rule_router.match_all(task):
+            hits[rule.model.value] += 1
+        return {
+            "task_chars": len(task),
+            "task_words": len(words),
+            "keyword_hits": hits,
+            "rule_matched": decision.rule_matched,
+            "rule_model": "default" if decision.rule_matched == "default" else decision.model.value,
+            "terms": [
+                zlib.crc32(token.encode("utf-8"))
+                for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+            ],
+        }
+
+    def vectorize(self, features: dict[str, Any]) -> np.ndarray:
+        """Feature vector for a describe() dict, in feature_names order."""
+        named = [np.log1p(features["task_chars"]), np.log1p(features["task_words"])]
+        named += [features["keyword_hits"].get(tier.value, 0) for tier in self.TIERS]
+        named += [float(features["rule_model"] == m) for m in self.RULE_MODELS]
+        terms = np.asarray(features["terms"], dtype=np.int64) % self.hash_dim
+        hashed = np.log1p(np.bincount(terms, minlength=self.hash_dim))
+        return np.concatenate([np.asarray(named, dtype=np.float64), hashed])
+
+    def transform(self, task: str) -> np.ndarray:
+        return self.vectorize(self.describe(task))
+
+
+def cheapest_passing_tier(record: dict[str, Any], quality_threshold: float = 70.0) -> ModelTier:
+    """
+    Training label for a logged execution.
+
+    Passing answers label the tier that produced them; failing ones the next
+    tier up. Direct (unevaluated) executions only give an upper bound: the
+    routed tier, since no cheaper tier was tried.
+    """
+    used = ModelTier(record["model_used"])
+    score = record.get("quality_score")
+    if score is None or score >= quality_threshold:
+        return used
+    return RoutingFeaturizer.TIERS[min(TIER_RANK[used] + 1, len(TIER_RANK) - 1)]
+
+
+class RoutingLog:
+    """
+    Append-only JSON Lines store of routing features and outcomes.
+
+    One line per execution, holding RoutingFeaturizer.describe() output plus
+    the routed model, the model finally used, escalation and quality score.
+    Task text itself is not stored.
+    """
+
+    def __init__(self, path: str, featurizer: RoutingFeaturizer | None = None) -> None:
+        self.path = path
+        self.featurizer = featurizer or RoutingFeaturizer()
+        self._lock = threading.Lock()
+
+    def record(self, task: str, decision: RoutingDecision, result: ExecutionResult) -> None:
+        """Append one execution outcome."""
+        entry = {
+            **self.featurizer.describe(task),
+            "routed_model": decision.model.value,
+            "strategy": decision.strategy,
+            "model_used": result.model_used.value,
+            "escalated": result.escalated,
+            "quality_score": result.quality_score,
+            "cost": result.cost,
+            "timestamp": time.time(),
+        }
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def records(self) -> list[dict[str, Any]]:
+        """All logged records, oldest first; a missing file is an empty log."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def __len__(self) -> int:
+        return len(self.records())
+
+
+class TierClassifier:
+    """
+    Multinomial logistic regression over model tiers, in NumPy.
+
+    Predicts the distribution of the cheapest tier that passes the quality
+    check. Inputs are standardized; weights are fit by full-batch gradient
+    descent with L2 regularization.
+    """
+
+    def __init__(self, l2: float = 1e-3, learning_rate: float = 0.5, epochs: int = 500) -> None:
+        self.l2 = l2
+        self.learning_rate = learning_rate
+        self.epochs = epochs
+        self.mean: np.ndarray | None = None
+        self.scale: np.ndarray | None = None
+        self.weights: np.ndarray | None = None
+        self.bias: np.ndarray | None = None
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def fit(self, X: np.ndarray, y: np.ndarray) -> TierClassifier:
+        """Fit on features X (n, d) and tier ranks y (n,)."""
+        n, d = X.shape
+        classes = len(TIER_RANK)
+        self.mean = X.mean(axis=0)
+        self.scale = X.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+        Z = (X - self.mean) / self.scale
+        targets = np.eye(classes)[y]
+        self.weights = np.zeros((d, classes))
+        self.bias = np.log(targets.mean(axis=0) + 1e-6)
+        for _ in range(self.epochs):
+            error = self._softmax(Z @ self.weights + self.bias) - targets
+            self.weights -= self.learning_rate * (Z.T @ error / n + self.l2 * self.weights)
+            self.bias -= self.learning_rate * error.mean(axis=0)
+        return self
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Probability of each tier rank being the cheapest passing tier, shape (n, 3)."""
+        if self.weights is None:
+            raise RuntimeError("TierClassifier has not been fitted")
+        return self._softmax(((X - self.mean) / self.scale) @ self.weights + self.bias)
+
+    def save(self, path: str) -> None:
+        np.savez(path, mean=self.mean, scale=self.scale, weights=self.weights, bias=self.bias)
+
+    @classmethod
+    def load(cls, path: str) -> TierClassifier:
+        model = cls()
+        with np.load(path) as data:
+            model.mean, model.scale = data["mean"], data["scale"]
+            model.weights, model.bias = data["weights"], data["bias"]
+        return model
+
+
+class LearnedRouter(RoutingStrategy):
+    """
+    Zero-LLM-cost routing with a TierClassifier trained on logged outcomes.
+
+    Routes to the cheapest tier whose predicted probability of passing the
+    quality check (that tier or a cheaper one suffices) reaches
+    min_pass_probability. Raising it trades cost for fewer escalations.
+    """
+
+    def __init__(
+        self,
+        model: TierClassifier,
+        featurizer: RoutingFeaturizer | None = None,
+        min_pass_probability: float = 0.8,
+    ) -> None:
+        self.model = model
+        self.featurizer = featurizer or RoutingFeaturizer()
+        self.min_pass_probability = min_pass_probability
+
+    @classmethod
+    def train(
+        cls,
+        records: RoutingLog | list[dict[str, Any]],
+        featurizer: RoutingFeaturizer | None = None,
+        quality_threshold: float = 70.0,
+        min_pass_probability: float = 0.8,
+        **model_kwargs: Any,
+    ) -> LearnedRouter:
+        """Fit a router from a RoutingLog (or its records)."""
+        if isinstance(records, RoutingLog):
+            featurizer = featurizer or records.featurizer
+            records = records.records()
+        if not records:
+            raise ValueError("No routing records to train on")
+        featurizer = featurizer or RoutingFeaturizer()
+        X = np.stack([featurizer.vectorize(r) for r in records])
+        y = np.array([TIER_RANK[cheapest_passing_tier(r, quality_threshold)] for r in records])
+        model = TierClassifier(**model_kwargs).fit(X, y)
+        return cls(model, featurizer, min_pass_probability)
+
+    def route(self, task: str) -> RoutingDecision:
+        """Route to the cheapest tier likely to pass."""
+        probabilities = self.model.predict_proba(self.featurizer.transform(task)[None, :])[0]
+        pass_probability = np.cumsum(probabilities)
+        passing = np.flatnonzero(pass_probability >= self.min_pass_probability)
+        rank = int(passing[0]) if passing.size else len(pass_probability) - 1
+        return RoutingDecision(
+            model=RoutingFeaturizer.TIERS[rank],
+            strategy="learned",
+            confidence=float(pass_probability[rank]),
+        )
+
+
+# =============================================================================
+# Shadow routing and offline replay
+# =============================================================================
+
+def _decision_summary(decision: RoutingDecision) -> dict[str, Any]:
+    return {
+        "model": decision.model.name.lower(),
+        "rule": decision.rule_matched,
+        "strategy": decision.strategy,
+        "confidence": decision.confidence,
+    }
+
+
+def projected_call_cost(tier: ModelTier, task: str, input_tokens: int | None, output_tokens: int) -> float:
+    """Cost of one call at tier; input tokens default to a chars/4 estimate of the task."""
+    return calculate_cost(tier, input_tokens if input_tokens is not None else len(task) // 4, output_tokens)
+
+
+class ShadowRouter(RoutingStrategy):
+    """
+    Runs a candidate routing strategy next to the live one without executing it.
+
+    Every live decision is compared with the candidate's. Disagreements are
+    appended to log_path (JSON Lines; task text only with log_tasks=True)
+    together with the projected single-call cost of each choice. The
+    candidate runs on a background thread by default, so it adds no latency
+    and its errors never reach the live path.
+
+    Use it as a RoutingStrategy wrapping `live`, or pass it to
+    HybridRouter(shadow=...) to shadow the hybrid decision.
+    """
+
+    def __init__(
+        self,
+        candidate: RoutingStrategy,
+        live: RoutingStrategy | None = None,
+        log_path: str | None = None,
+        log_tasks: bool = False,
+        expected_output_tokens: int = 1000,
+        background: bool = True,
+    ) -> None:
+        self.candidate = candidate
+        self.live = live
+        self.log_path = log_path
+        self.log_tasks = log_tasks
+        self.expected_output_tokens = expected_output_tokens
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow") if background else None
+        self._lock = threading.Lock()
+        self.compared = 0
+        self.disagreements = 0
+        self.errors = 0
+        self.transitions: Counter[str] = Counter()
+        self.live_cost = 0.0
+        self.candidate_cost = 0.0
+
+    def route(self, task: str) -> RoutingDecision:
+        """Route with the live strategy and shadow it with the candidate."""
+        if self.live is None:
+            raise RuntimeError("ShadowRouter.route() needs a live strategy")
+        decision = self.live.route(task)
+        self.observe(task, decision)
+        return decision
+
+    def observe(self, task: str, live_decision: RoutingDecision, input_tokens: int | None = None) -> None:
+        """Compare a live decision with the candidate's (in the background unless background=False)."""
+        if self._executor is not None:
+            self._executor.submit(self._compare, task, live_decision, input_tokens)
+        else:
+            self._compare(task, live_decision, input_tokens)
+
+    def _compare(self, task: str, live_decision: RoutingDecision, input_tokens: int | None) -> None:
+        try:
+            candidate_decision = self.candidate.route(task)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            return
+
+        live_cost = projected_call_cost(live_decision.model, task, input_tokens, self.expected_output_tokens)
+        candidate_cost = projected_call_cost(candidate_decision.model, task, input_tokens, self.expected_output_tokens)
+        disagree = live_decision.model != candidate_decision.model
+        with self._lock:
+            self.compared += 1
+            self.live_cost += live_cost
+            self.candidate_cost += candidate_cost
+            if not disagree:
+                return
+            self.disagreements += 1
+            self.transitions[f"{live_decision.model.name.lower()}->{candidate_decision.model.name.lower()}"] += 1
+            if self.log_path:
+                entry = {
+                    "timestamp": time.time(),
+                    "task_sha1": hashlib.sha1(task.encode("utf-8")).hexdigest(),
+                    "live": _decision_summary(live_decision),
+                    "candidate": _decision_summary(candidate_decision),
+                    "projected_cost_delta": candidate_cost - live_cost,
+                }
+                if self.log_tasks:
+                    entry["task"] = task
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def flush(self) -> None:
+        """Wait for queued comparisons to finish."""
+        if self._executor is not None:
+            self._executor.submit(lambda: None).result()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "compared": self.compared,
+                "disagreements": self.disagreements,
+                "disagreement_rate": self.disagreements / self.compared if self.compared else 0,
+                "transitions": dict(self.transitions),
+                "errors": self.errors,
+                "projected_live_cost": round(self.live_cost, 6),
+                "projected_candidate_cost": round(self.candidate_cost, 6),
+                "projected_cost_delta": round(self.candidate_cost - self.live_cost, 6),
+            }
+
+
+def load_task_log(path: str) -> list[dict[str, Any]]:
+    """
+    Read a recorded task stream for replay_routing().
+
+    JSON Lines with a "task" field and optional "input_tokens" and
+    "output_tokens"; lines that are not JSON objects are taken as task text.
+    Objects without a "task" string are kept; replay_routing() skips them.
+    """
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = None
+            records.append(record if isinstance(record, dict) else {"task": line})
+    return records
+
+
+@dataclass
+class ReplayReport:
+    """Aggregate comparison of two routing strategies over a recorded task stream."""
+    tasks: int = 0
+    skipped: int = 0  # Records without a "task" string
+    disagreements: int = 0
+    transitions: dict[str, int] = field(default_factory=dict)  # "live->candidate" tier pairs
+    live_cost: float = 0.0  # Projected single-call cost at each strategy's tier
+    candidate_cost: float = 0.0
+    examples: list[dict[str, Any]] = field(default_factory=list)  # First disagreements
+    seconds: float = 0.0
+
+    @property
+    def disagreement_rate(self) -> float:
+        return self.disagreements / self.tasks if self.tasks else 0.0
+
+    @property
+    def cost_delta(self) -> float:
+        return self.candidate_cost - self.live_cost
+
+    def merge(self, other: ReplayReport, max_examples: int) -> None:
+        self.tasks += other.tasks
+        self.skipped += other.skipped
+        self.disagreements += other.disagreements
+        for transition, count in other.transitions.items():
+            self.transitions[transition] = self.transitions.get(transition, 0) + count
+        self.live_cost += other.live_cost
+        self.candidate_cost += other.candidate_cost
+        self.examples.extend(other.examples[:max(0, max_examples - len(self.examples))])
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "tasks": self.tasks,
+            "skipped": self.skipped,
+            "disagreements": self.disagreements,
+            "disagreement_rate": round(self.disagreement_rate, 4),
+            "transitions": dict(sorted(self.transitions.items(), key=lambda kv: -kv[1])),
+            "projected_live_cost": round(self.live_cost, 4),
+            "projected_candidate_cost": round(self.candidate_cost, 4),
+            "projected_cost_delta": round(self.cost_delta, 4),
+            "projected_cost_delta_pct": round(100 * self.cost_delta / self.live_cost, 2) if self.live_cost else 0.0,
+            "tasks_per_second": round(self.tasks / self.seconds) if self.seconds else 0,
+        }
+
+
+_replay_strategies: tuple[RoutingStrategy, RoutingStrategy] | None = None  # Per worker process
+
+
+def _init_replay_worker(
+    live_factory: Callable[[], RoutingStrategy],
+    candidate_factory: Callable[[], RoutingStrategy],
+) -> None:
+    global _replay_strategies
+    _replay_strategies = (live_factory(), candidate_factory())
+
+
+def _replay_shard(args: tuple[list[dict[str, Any]], int, int]) -> ReplayReport:
+    shard, expected_output_tokens, max_examples = args
+    live, candidate = _replay_strategies
+    report = ReplayReport()
+    transitions: Counter[str] = Counter()
+    for record in shard:
+        task = record["task"]
+        live_decision, candidate_decision = live.route(task), candidate.route(task)
+        input_tokens = record.get("input_tokens")
+        output_tokens = record.get("output_tokens", expected_output_tokens)
+        report.live_cost += projected_call_cost(live_decision.model, task, input_tokens, output_tokens)
+        report.candidate_cost += projected_call_cost(candidate_decision.model, task, input_tokens, output_tokens)
+        if live_decision.model != candidate_decision.model:
+            report.disagreements += 1
+            transitions[f"{live_decision.model.name.lower()}->{candidate_decision.model.name.lower()}"] += 1
+            if len(report.examples) < max_examples:
+                report.examples.append({
+                    "task": task,
+                    "live": _decision_summary(live_decision),
+                    "candidate": _decision_summary(candidate_decision),
+                })
+    report.tasks = len(shard)
+    report.transitions = dict(transitions)
+    return report
+
+
+def replay_routing(
+    records: list[dict[str, Any]] | list[str],
+    live_factory: Callable[[], RoutingStrategy],
+    candidate_factory: Callable[[], RoutingStrategy],
+    processes: int | None = None,
+    shard_size: int = 5_000,
+    expected_output_tokens: int = 1000,
+    max_examples: int = 20,
+) -> ReplayReport:
+    """
+    Route a recorded task stream through two strategies and compare them offline.
+
+    Strategies are built per worker by the factories (which must be
+    picklable, e.g. classes or module-level functions), and shards of
+    shard_size tasks are spread over processes (default: CPU count;
+    1 runs in this process). Nothing is executed; costs are projected from
+    recorded token counts where present. Records without a "task" string
+    are skipped and counted in ReplayReport.skipped.
+    """
+    records = [{"task": r} if isinstance(r, str) else r for r in records]
+    usable = [r for r in records if isinstance(r, dict) and isinstance(r.get("task"), str)]
+    shards = [
+        (usable[i:i + shard_size], expected_output_tokens, max_examples)
+        for i in range(0, len(usable), shard_size)
+    ]
+    processes = processes or os.cpu_count() or 1
+
+    report = ReplayReport()
+    start = time.perf_counter()
+    if processes == 1 or len(shards) <= 1:
+        _init_replay_worker(live_factory, candidate_factory)
+        partials = [_replay_shard(shard) for shard in shards]
+    else:
+        with multiprocessing.Pool(
+            min(processes, len(shards)),
+            initializer=_init_replay_worker,
+            initargs=(live_factory, candidate_factory),
+        ) as pool:
+            partials = pool.map(_replay_shard, shards)
+    for partial in partials:
+        report.merge(partial, max_examples)
+    report.skipped = len(records) - len(usable)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
 class CostEstimator:
-    """Utility class for cost estimation and comparison."""
+    """
+    Utility class for cost estimation and comparison.
+
+    Uses fixed averages; WorkloadSimulator gives cost, latency and quality
+    distributions for a routing policy and escalation behaviour.
+    """
 
     @staticmethod
     def estimate_monthly_cost(
@@ -708,6 +2859,216 @@ class CostEstimator:
         }
 
 
+
+# =============================================================================
+# Monte-Carlo workload simulation
+# =============================================================================
+
+# Rough per-tier (time to first token in seconds, output tokens per second); override per simulator
+DEFAULT_TIER_LATENCY = {
+    ModelTier.HAIKU: (0.4, 150.0),
+    ModelTier.SONNET: (0.8, 80.0),
+    ModelTier.OPUS: (1.5, 40.0),
+}
+
+
+@dataclass
+class WorkloadClass:
+    """
+    A slice of traffic for the simulator.
+
+    quality gives the judge-score distribution (mean, sd) of each tier's
+    answers for this kind of task; the escalation probability at a tier is
+    the chance its score falls below the quality threshold.
+    """
+    name: str
+    weight: float  # Relative share of requests
+    tier: ModelTier  # Tier the routing policy sends it to
+    quality: dict[ModelTier, tuple[float, float]]
+    example: str | None = None  # Representative task, used by routing_policy()
+
+    @classmethod
+    def from_escalation_rates(
+        cls,
+        name: str,
+        weight: float,
+        tier: ModelTier,
+        escalation_probability: dict[ModelTier, float],
+        quality_threshold: float = 70.0,
+        sd: float = 10.0,
+        example: str | None = None,
+    ) -> WorkloadClass:
+        """Build a class from observed escalation rates at a given threshold."""
+        normal = NormalDist()
+        quality = {
+            t: (quality_threshold + sd * normal.inv_cdf(min(max(1.0 - p, 1e-6), 1 - 1e-6)), sd)
+            for t, p in escalation_probability.items()
+        }
+        for t in ModelTier:
+            quality.setdefault(t, (100.0, 0.0))
+        return cls(name, weight, tier, quality, example)
+
+
+@dataclass
+class SimulationResult:
+    """Outcome distribution of one simulated configuration."""
+    quality_threshold: float
+    requests: int
+    cost_per_request: float  # Mean, including judge calls
+    monthly_cost: float
+    cost_percentiles: dict[float, float]
+    latency_percentiles: dict[float, float]  # Seconds
+    quality_percentiles: dict[float, float]  # Judge score of the returned answer
+    quality_pass_rate: float  # Returned answers scoring at least the threshold
+    escalation_rate: float
+    model_distribution: dict[ModelTier, float]  # Tier of the returned answer
+    policy: str = "default"
+
+
+class WorkloadSimulator:
+    """
+    Vectorized Monte-Carlo model of a routed workload.
+
+    Samples requests from workload classes and empirical token-length
+    distributions, then replays the HybridRouter flow in NumPy: Haiku-routed
+    requests escalate through the first max_escalations tiers while their
+    judge score is below the threshold (each check is a Haiku call), other
+    tiers run once. Random draws are shared across configurations, so
+    differences in sensitivity() come from the settings, not sampling noise.
+    """
+
+    PERCENTILES = (50.0, 95.0, 99.0)
+    JUDGE_OUTPUT_TOKENS = 4
+
+    def __init__(
+        self,
+        classes: list[WorkloadClass],
+        input_tokens: list[int] | np.ndarray | None = None,
+        output_tokens: list[int] | np.ndarray | None = None,
+        requests_per_day: int = 10_000,
+        enable_escalation: bool = True,
+        max_escalations: int = 2,
+        tier_latency: dict[ModelTier, tuple[float, float]] | None = None,
+    ) -> None:
+        if not classes:
+            raise ValueError("At least one workload class is required")
+        self.classes = classes
+        self.input_tokens = np.asarray(input_tokens, dtype=np.float64) if input_tokens is not None else None
+        self.output_tokens = np.asarray(output_tokens, dtype=np.float64) if output_tokens is not None else None
+        self.requests_per_day = requests_per_day
+        self.enable_escalation = enable_escalation
+        self.max_escalations = max_escalations
+        self.tier_latency = {**DEFAULT_TIER_LATENCY, **(tier_latency or {})}
+
+    def routing_policy(self, router: RoutingStrategy) -> dict[str, ModelTier]:
+        """Tier per class from routing each class's example task (e.g. with edited rule priorities)."""
+        return {c.name: router.route(c.example).model for c in self.classes if c.example is not None}
+
+    def _sample_tokens(self, observed: np.ndarray | None, median: float, n: int, rng: np.random.Generator) -> np.ndarray:
+        if observed is not None and observed.size:
+            return rng.choice(observed, size=n)  # Bootstrap from the empirical distribution
+        return np.maximum(1.0, np.round(rng.lognormal(np.log(median), 0.8, size=n)))
+
+    def sample(self, requests: int, seed: int = 0) -> dict[str, np.ndarray]:
+        """Draw the random part of a workload: class, token lengths and per-tier judge scores."""
+        rng = np.random.default_rng(seed)
+        weights = np.array([c.weight for c in self.classes], dtype=np.float64)
+        classes = rng.choice(len(self.classes), size=requests, p=weights / weights.sum())
+        means = np.array([[c.quality[t][0] for t in ModelTier] for c in self.classes])
+        sds = np.array([[c.quality[t][1] for t in ModelTier] for c in self.classes])
+        scores = means[classes] + sds[classes] * rng.standard_normal((requests, len(ModelTier)))
+        return {
+            "class": classes,
+            "input_tokens": self._sample_tokens(self.input_tokens, 500.0, requests, rng),
+            "output_tokens": self._sample_tokens(self.output_tokens, 1000.0, requests, rng),
+            "scores": np.clip(scores, 0.0, 100.0),
+        }
+
+    def evaluate(
+        self,
+        samples: dict[str, np.ndarray],
+        quality_threshold: float = 70.0,
+        policy: dict[str, ModelTier] | None = None,
+        policy_name: str = "default",
+    ) -> SimulationResult:
+        """Outcomes of sampled requests under a threshold and class -> tier policy."""
+        tiers = list(ModelTier)
+        policy = policy or {}
+        routed = np.array([TIER_RANK[policy.get(c.name, c.tier)] for c in self.classes])[samples["class"]]
+        input_tokens, output_tokens, scores = samples["input_tokens"], samples["output_tokens"], samples["scores"]
+        n = len(routed)
+
+        cost = np.zeros(n)
+        latency = np.zeros(n)
+        final = routed.copy()
+        judge_input = input_tokens + output_tokens + 100  # Task, answer and grading prompt
+        judge_cost = calculate_cost(ModelTier.HAIKU, judge_input, self.JUDGE_OUTPUT_TOKENS)
+        judge_latency = self.tier_latency[ModelTier.HAIKU][0]
+
+        def run(rank: int, rows: np.ndarray) -> None:
+            first_token, tokens_per_second = self.tier_latency[tiers[rank]]
+            cost[rows] += calculate_cost(tiers[rank], input_tokens[rows], output_tokens[rows])
+            latency[rows] += first_token + output_tokens[rows] / tokens_per_second
+
+        escalating = (routed == 0) if self.enable_escalation else np.zeros(n, dtype=bool)
+        direct = ~escalating
+        for rank in range(len(tiers)):
+            run(rank, direct & (routed == rank))
+
+        chain = range(min(max(1, self.max_escalations), len(tiers)))
+        active = escalating.copy()
+        for rank in chain:
+            run(rank, active)
+            if tiers[rank] == ModelTier.OPUS or rank == chain[-1]:
+                final[active] = rank
+                if tiers[rank] != ModelTier.OPUS:
+                    cost[active] += judge_cost[active]
+                    latency[active] += judge_latency
+                break
+            cost[active] += judge_cost[active]
+            latency[active] += judge_latency
+            passed = active & (scores[:, rank] >= quality_threshold)
+            final[passed] = rank
+            active &= ~passed
+
+        quality = scores[np.arange(n), final]
+        escalated = escalating & ((final > 0) | (quality < quality_threshold))
+        counts = np.bincount(final, minlength=len(tiers))
+        cost_per_request = float(cost.mean())
+        return SimulationResult(
+            quality_threshold=quality_threshold,
+            requests=n,
+            cost_per_request=cost_per_request,
+            monthly_cost=cost_per_request * self.requests_per_day * 30,
+            cost_percentiles=dict(zip(self.PERCENTILES, np.percentile(cost, self.PERCENTILES).tolist())),
+            latency_percentiles=dict(zip(self.PERCENTILES, np.percentile(latency, self.PERCENTILES).tolist())),
+            quality_percentiles=dict(zip((5.0, 50.0), np.percentile(quality, (5.0, 50.0)).tolist())),
+            quality_pass_rate=float((quality >= quality_threshold).mean()),
+            escalation_rate=float(escalated.mean()),
+            model_distribution={t: float(counts[i] / n) for i, t in enumerate(tiers)},
+            policy=policy_name,
+        )
+
+    def simulate(self, requests: int = 1_000_000, quality_threshold: float = 70.0, seed: int = 0) -> SimulationResult:
+        return self.evaluate(self.sample(requests, seed), quality_threshold)
+
+    def sensitivity(
+        self,
+        thresholds: list[float],
+        policies: dict[str, dict[str, ModelTier]] | None = None,
+        requests: int = 1_000_000,
+        seed: int = 0,
+    ) -> list[SimulationResult]:
+        """Evaluate every (policy, threshold) pair on one shared sample."""
+        samples = self.sample(requests, seed)
+        policies = policies or {"default": {}}
+        return [
+            self.evaluate(samples, threshold, policy, name)
+            for name, policy in policies.items()
+            for threshold in thresholds
+        ]
+
+
 # Convenience function for quick routing
 def get_recommended_model(task: str) -> ModelTier:
     """Quick function to get recommended model for a task."""